@@ -11,6 +11,7 @@ Características principales:
 - Formateo inteligente de respuestas según contexto
 - Interfaz gráfica basada en PyQt6
 - Sistema de logging automático con archivos de texto
+- Búsqueda semántica sobre las descripciones mediante embeddings (indice_embeddings.py)
 - Funciones avanzadas de limpieza de JSON generado por LLM
 
 Autor: Sistema de Consultas de Imágenes
@@ -44,6 +45,12 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon, QFont, QAction
 
+try:
+    from indice_embeddings import IndiceEmbeddings, busqueda_semantica
+    EMBEDDINGS_DISPONIBLES = True
+except ImportError:
+    EMBEDDINGS_DISPONIBLES = False
+
 # Suprimir warnings de deprecación para una mejor experiencia de usuario
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -578,6 +585,7 @@ class ImageSearchGUI(QMainWindow):
         # Variables
         self.historial_consultas = []
         self.guardar_automatico = True
+        self.indice_embeddings = None  # Se abre en la primera búsqueda semántica
 
         # Crear widgets
         self.create_widgets()
@@ -642,6 +650,12 @@ class ImageSearchGUI(QMainWindow):
         self.buscar_btn.clicked.connect(self.procesar_consulta)
         button_layout.addWidget(self.buscar_btn)
 
+        self.semantica_btn = QPushButton("🧠 Búsqueda semántica")
+        self.semantica_btn.setToolTip("Busca por significado en las descripciones (requiere indice_embeddings.py construir)")
+        self.semantica_btn.clicked.connect(self.procesar_consulta_semantica)
+        self.semantica_btn.setEnabled(EMBEDDINGS_DISPONIBLES)
+        button_layout.addWidget(self.semantica_btn)
+
         self.guardar_toggle_btn = QPushButton("💾 Auto-guardar: ON")
         self.guardar_toggle_btn.clicked.connect(self.toggle_guardar)
         button_layout.addWidget(self.guardar_toggle_btn)
@@ -769,6 +783,51 @@ class ImageSearchGUI(QMainWindow):
 
         self.query_entry.clear()
 
+    def procesar_consulta_semantica(self):
+        """
+        Busca las imágenes cuya descripción se parece a la consulta usando el índice de embeddings.
+
+        A diferencia de procesar_consulta, no genera un pipeline de MongoDB: compara el
+        significado de la consulta con el de todas las descripciones.
+        """
+        pregunta = self.query_entry.text().strip()
+        if not pregunta:
+            self.mostrar_mensaje("Por favor ingrese una consulta.", "error")
+            return
+
+        self.status_bar.showMessage("Buscando por significado...")
+        self.mostrar_mensaje(f"\n👉 Usuario (semántica): {pregunta}")
+        QApplication.processEvents()
+
+        try:
+            if self.indice_embeddings is None:
+                self.indice_embeddings = IndiceEmbeddings()
+            resultados = busqueda_semantica(db["imagenes"], pregunta, k=20, indice=self.indice_embeddings)
+
+            if not resultados:
+                resultado = "No hay resultados. ¿Se ha construido el índice? (python indice_embeddings.py construir)"
+            else:
+                lineas = [f"Encontradas {len(resultados)} imágenes similares:"]
+                for i, doc in enumerate(resultados, 1):
+                    lineas.append(f"{i}. [{doc['similitud']:.3f}] {doc.get('nombre_archivo', 'N/A')} - "
+                                  f"{doc.get('ruta_completa', 'N/A')}")
+                resultado = "\n".join(lineas)
+
+            self.mostrar_mensaje(f"🤖 Respuesta:\n{resultado}\n" + "=" * 50)
+            if self.guardar_automatico:
+                self.historial_consultas.append({
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'pregunta': f"[semántica] {pregunta}",
+                    'respuesta': resultado,
+                    'num_resultados': len(resultados)
+                })
+            self.status_bar.showMessage("Búsqueda semántica completada.")
+        except Exception as e:
+            self.mostrar_mensaje(f"❌ Error: {e}")
+            self.status_bar.showMessage("Error en la búsqueda semántica.")
+
+        self.query_entry.clear()
+
     def toggle_guardar(self):
         self.guardar_automatico = not self.guardar_automatico
         self.update_guardar_status()
@@ -0,0 +1,182 @@
+"""
+Caché en disco de respuestas de Ollama.
+
+Guarda en SQLite las respuestas generadas por los modelos, de modo que al repetir
+un procesamiento (tras un fallo o un pequeño cambio de configuración) las peticiones
+ya resueltas se devuelven desde disco en milisegundos en lugar de volver a generarse.
+
+La clave de cada entrada combina:
+- Modelo
+- Hash del prompt (o de los mensajes del chat)
+- Hash de las imágenes o textos de entrada
+- Opciones del modelo y formato de salida
+
+Cuando el tamaño total de las respuestas supera el máximo configurado se eliminan
+las entradas usadas hace más tiempo (LRU). La caché lleva estadísticas de aciertos
+y fallos para conocer su efectividad.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+RUTA_CACHE = "cache_ollama.sqlite"
+TAMAÑO_MAXIMO_MB = 256
+
+
+def hash_texto(texto):
+    """Devuelve el hash SHA-256 hexadecimal de un texto."""
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def hash_entradas(entradas):
+    """Devuelve un hash SHA-256 común para una lista de entradas (imágenes en base64, textos...)."""
+    h = hashlib.sha256()
+    for entrada in entradas or []:
+        h.update(hash_texto(entrada).encode("ascii"))
+    return h.hexdigest()
+
+
+class CacheRespuestas:
+    """Caché de respuestas de Ollama respaldada por SQLite con desalojo LRU por tamaño."""
+
+    def __init__(self, ruta=RUTA_CACHE, tamaño_maximo_mb=TAMAÑO_MAXIMO_MB):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            ruta (str): Archivo SQLite donde se guardan las respuestas
+            tamaño_maximo_mb (float): Tamaño máximo de las respuestas almacenadas
+        """
+        self.ruta = ruta
+        self.tamaño_maximo = int(tamaño_maximo_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                respuesta TEXT NOT NULL,
+                tamaño INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON respuestas(ultimo_acceso)")
+        self._conexion.commit()
+        self._tamaño_actual = self._conexion.execute(
+            "SELECT COALESCE(SUM(tamaño), 0) FROM respuestas").fetchone()[0]
+
+    @staticmethod
+    def calcular_clave(modelo, prompt, entradas=None, opciones=None):
+        """
+        Calcula la clave de una petición.
+
+        Args:
+            modelo (str): Nombre del modelo
+            prompt (str): Prompt o mensajes serializados
+            entradas (list): Imágenes en base64 u otros textos de entrada
+            opciones (dict): Opciones del modelo, formato de salida, etc.
+
+        Returns:
+            str: Clave SHA-256 de la petición
+        """
+        partes = {
+            "modelo": modelo,
+            "prompt": hash_texto(prompt),
+            "entradas": hash_entradas(entradas),
+            "opciones": opciones or {},
+        }
+        return hash_texto(json.dumps(partes, sort_keys=True, ensure_ascii=False))
+
+    def obtener(self, clave):
+        """Devuelve la respuesta guardada para la clave, o None si no existe."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT respuesta FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._conexion.execute(
+                "UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            self._conexion.commit()
+            return fila[0]
+
+    def guardar(self, clave, modelo, respuesta):
+        """Guarda una respuesta y desaloja las entradas más antiguas si se supera el tamaño máximo."""
+        tamaño = len(respuesta.encode("utf-8"))
+        ahora = time.time()
+        with self._lock:
+            anterior = self._conexion.execute(
+                "SELECT tamaño FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, modelo, respuesta, tamaño, creado, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, modelo, respuesta, tamaño, ahora, ahora))
+            self._tamaño_actual += tamaño - (anterior[0] if anterior else 0)
+            if self._tamaño_actual > self.tamaño_maximo:
+                self._desalojar()
+            self._conexion.commit()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar por debajo del 90% del tamaño máximo."""
+        objetivo = int(self.tamaño_maximo * 0.9)
+        filas = self._conexion.execute(
+            "SELECT clave, tamaño FROM respuestas ORDER BY ultimo_acceso")
+        eliminar = []
+        for clave, tamaño in filas:
+            if self._tamaño_actual <= objetivo:
+                break
+            eliminar.append((clave,))
+            self._tamaño_actual -= tamaño
+        self._conexion.executemany("DELETE FROM respuestas WHERE clave = ?", eliminar)
+
+    def estadisticas(self):
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            dict: entradas, tamaño en bytes, aciertos, fallos y tasa de aciertos de la sesión
+        """
+        with self._lock:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": entradas,
+                "tamaño_bytes": self._tamaño_actual,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+    def resumen(self):
+        """Devuelve las estadísticas en una línea legible."""
+        e = self.estadisticas()
+        return (f"Caché Ollama: {e['aciertos']} aciertos, {e['fallos']} fallos "
+                f"({e['tasa_aciertos']:.1%}) - {e['entradas']} entradas, "
+                f"{e['tamaño_bytes'] / (1024 * 1024):.1f} MB")
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché."""
+        with self._lock:
+            self._conexion.execute("DELETE FROM respuestas")
+            self._conexion.commit()
+            self._tamaño_actual = 0
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,510 @@
+"""
+Cliente compartido para la API HTTP de Ollama.
+
+Centraliza la comunicación con Ollama de los scripts que usan modelos de lenguaje
+(detección de objetos, descripción de imágenes, traducción y subtítulos), de forma
+que todos compartan la misma política de conexión:
+
+- Sesión HTTP con pool de conexiones keep-alive reutilizadas entre peticiones
+- Precalentamiento de modelos y gestión de ``keep_alive`` para mantenerlos cargados
+- Reintentos acotados con espera exponencial y jitter ante errores transitorios
+  (un timeout de lectura en una petición POST no se reintenta: el servidor ya
+  estaba generando y repetirla solo multiplicaría el tiempo y el trabajo)
+- Política de timeouts común (conexión / lectura)
+- Caché en disco opcional de las respuestas (ver cache_ollama.py)
+- Reparto entre varios servidores Ollama: cada petición va al servidor con menos
+  peticiones en curso que tenga el modelo cargado, y los servidores que fallan se
+  expulsan temporalmente del grupo
+
+Uso:
+    from cliente_ollama import obtener_cliente
+
+    cliente = obtener_cliente()
+    cliente.precalentar("gemma3:4b")
+    texto = cliente.generar("gemma3:4b", "Describe la imagen", imagenes=[imagen_b64])
+
+Los servidores se toman de la variable de entorno OLLAMA_HOSTS, separados por comas
+(ej: OLLAMA_HOSTS=http://gpu1:11434,http://gpu2:11434,http://gpu3:11434). Si no está
+definida se usa OLLAMA_HOST (por defecto http://localhost:11434), igual que hace el
+paquete oficial ``ollama``.
+La caché del cliente compartido se guarda en OLLAMA_CACHE (por defecto
+cache_ollama.sqlite); OLLAMA_CACHE=0 la desactiva.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_ollama import RUTA_CACHE, CacheRespuestas
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_HOSTS = [h.strip() for h in os.environ.get("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()]
+OLLAMA_CACHE = os.environ.get("OLLAMA_CACHE", RUTA_CACHE)
+
+# Política de timeouts común (segundos)
+TIMEOUT_CONEXION = 5
+TIMEOUT_LECTURA = 120
+TIMEOUT_DESCARGA = 3600  # Descarga de modelos con /api/pull
+
+# Tiempo que Ollama mantiene el modelo en memoria tras cada petición
+KEEP_ALIVE = "30m"
+
+# Reintentos con espera exponencial y jitter
+MAX_REINTENTOS = 3
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 8.0
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+TAMAÑO_POOL = 10
+
+# Salud de los servidores del grupo
+UMBRAL_FALLOS = 2         # Fallos consecutivos antes de expulsar un servidor
+TIEMPO_EXPULSION = 30.0   # Segundos iniciales de expulsión (se duplica si vuelve a fallar)
+EXPULSION_MAXIMA = 300.0
+TTL_MODELOS = 30.0        # Segundos de validez de la lista de modelos de cada servidor
+
+
+class ErrorOllama(Exception):
+    """Error devuelto por Ollama o producido al comunicarse con el servidor."""
+
+
+class TiempoAgotadoOllama(ErrorOllama, TimeoutError):
+    """Ollama no respondió dentro del timeout tras agotar los reintentos."""
+
+
+def normalizar_host(host):
+    """Devuelve la URL base del servidor con esquema y sin barra final."""
+    host = host.strip().rstrip("/")
+    if not host.startswith(("http://", "https://")):
+        host = f"http://{host}"
+    return host
+
+
+class ServidorOllama:
+    """Estado de un servidor del grupo: peticiones en curso, salud y modelos conocidos."""
+
+    def __init__(self, host):
+        self.host = normalizar_host(host)
+        self.en_curso = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expulsado_hasta = 0.0
+        self.modelos_instalados = set()
+        self.modelos_cargados = set()
+        self.modelos_actualizados = 0.0
+
+    def disponible(self, ahora=None):
+        """True si el servidor no está expulsado."""
+        return (ahora or time.monotonic()) >= self.expulsado_hasta
+
+    def tiene_modelo(self, modelo):
+        """True si el modelo (o su variante :latest) está instalado en el servidor."""
+        return modelo in self.modelos_instalados or f"{modelo}:latest" in self.modelos_instalados
+
+    def __repr__(self):
+        return f"ServidorOllama({self.host!r}, en_curso={self.en_curso}, fallos={self.fallos})"
+
+
+class ClienteOllama:
+    """
+    Cliente HTTP para Ollama con pool de conexiones, reintentos y keep_alive.
+
+    Puede trabajar con uno o varios servidores. Con varios, cada petición se envía
+    al servidor disponible con menos peticiones en curso, prefiriendo los que ya
+    tienen el modelo cargado en memoria (/api/ps) o al menos instalado (/api/tags).
+
+    Una misma instancia puede usarse desde varios hilos: ``requests.Session``
+    reutiliza las conexiones del pool y el estado propio está protegido por un lock.
+    """
+
+    def __init__(self, hosts=None, keep_alive=KEEP_ALIVE,
+                 timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA),
+                 max_reintentos=MAX_REINTENTOS, tamaño_pool=TAMAÑO_POOL, cache=None):
+        """
+        Inicializa el cliente.
+
+        Args:
+            hosts (str|list): URL base del servidor o lista de servidores (por defecto OLLAMA_HOSTS)
+            keep_alive (str|int): Tiempo que el modelo permanece cargado tras cada petición
+            timeout (tuple): Timeouts (conexión, lectura) en segundos
+            max_reintentos (int): Reintentos ante errores transitorios
+            tamaño_pool (int): Conexiones keep-alive máximas por servidor
+            cache (CacheRespuestas): Caché de respuestas (None para no usar caché)
+        """
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        self.servidores = [ServidorOllama(h) for h in (hosts or OLLAMA_HOSTS)]
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.max_reintentos = max_reintentos
+        self.cache = cache
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamaño_pool, pool_maxsize=tamaño_pool, max_retries=0)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+
+        self._lock = threading.Lock()
+        self._precalentados = set()
+        self._disponibles = set()
+
+    # ------------------ Grupo de servidores ------------------
+
+    def _registrar_fallo(self, servidor):
+        """Cuenta un fallo del servidor y lo expulsa si supera el umbral."""
+        with self._lock:
+            servidor.fallos += 1
+            if servidor.fallos >= UMBRAL_FALLOS:
+                duracion = min(EXPULSION_MAXIMA, TIEMPO_EXPULSION * (2 ** servidor.expulsiones))
+                servidor.expulsiones += 1
+                servidor.fallos = 0
+                servidor.expulsado_hasta = time.monotonic() + duracion
+                servidor.modelos_actualizados = 0.0
+                if len(self.servidores) > 1:
+                    print(f"⚠️ Servidor Ollama {servidor.host} expulsado durante {duracion:.0f} s")
+
+    def _registrar_exito(self, servidor, modelo=None):
+        """Restablece la salud del servidor y anota el modelo como cargado."""
+        with self._lock:
+            servidor.fallos = 0
+            servidor.expulsiones = 0
+            if modelo:
+                servidor.modelos_cargados.add(modelo)
+                servidor.modelos_instalados.add(modelo)
+
+    def _actualizar_modelos(self, servidor):
+        """
+        Consulta los modelos instalados y cargados del servidor si la información ha caducado.
+
+        Las versiones antiguas de Ollama no tienen /api/ps: un 404 significa que no se
+        sabe qué modelos están cargados (se conservan los anotados tras cada petición
+        correcta), no que el servidor falle.
+        """
+        if time.monotonic() - servidor.modelos_actualizados < TTL_MODELOS:
+            return
+        try:
+            timeout = (TIMEOUT_CONEXION, TIMEOUT_CONEXION)
+            instalados = self.sesion.get(f"{servidor.host}/api/tags", timeout=timeout)
+            instalados.raise_for_status()
+            cargados = self.sesion.get(f"{servidor.host}/api/ps", timeout=timeout)
+            if cargados.status_code == 404:
+                cargados = None
+            else:
+                cargados.raise_for_status()
+        except requests.exceptions.RequestException:
+            self._registrar_fallo(servidor)
+            return
+        with self._lock:
+            servidor.modelos_instalados = {m.get("name") or m.get("model") for m in instalados.json().get("models", [])}
+            if cargados is not None:
+                servidor.modelos_cargados = {m.get("name") or m.get("model") for m in cargados.json().get("models", [])}
+            servidor.modelos_actualizados = time.monotonic()
+
+    def _elegir_servidor(self, modelo=None):
+        """
+        Elige el servidor para una petición y anota la petición como en curso.
+
+        Entre los servidores no expulsados se prefieren los que tienen el modelo
+        cargado, después los que lo tienen instalado y, dentro de cada grupo, el
+        de menos peticiones en curso. Si todos están expulsados se prueba el que
+        antes termina su expulsión.
+        """
+        if len(self.servidores) > 1 and modelo:
+            for servidor in self.servidores:
+                if servidor.disponible():
+                    self._actualizar_modelos(servidor)
+
+        with self._lock:
+            ahora = time.monotonic()
+            candidatos = [s for s in self.servidores if s.disponible(ahora)]
+            if not candidatos:
+                candidatos = [min(self.servidores, key=lambda s: s.expulsado_hasta)]
+
+            if modelo and len(candidatos) > 1:
+                cargados = [s for s in candidatos if modelo in s.modelos_cargados
+                            or f"{modelo}:latest" in s.modelos_cargados]
+                instalados = [s for s in candidatos if s.tiene_modelo(modelo)]
+                candidatos = cargados or instalados or candidatos
+
+            minimo = min(s.en_curso for s in candidatos)
+            servidor = random.choice([s for s in candidatos if s.en_curso == minimo])
+            servidor.en_curso += 1
+            return servidor
+
+    def _liberar_servidor(self, servidor):
+        """Anota el final de una petición en el servidor."""
+        with self._lock:
+            servidor.en_curso -= 1
+
+    def estado_servidores(self):
+        """Devuelve una lista con el estado de cada servidor del grupo."""
+        with self._lock:
+            ahora = time.monotonic()
+            return [{
+                "host": s.host,
+                "disponible": s.disponible(ahora),
+                "en_curso": s.en_curso,
+                "modelos_cargados": sorted(s.modelos_cargados),
+            } for s in self.servidores]
+
+    # ------------------ Transporte ------------------
+
+    def _espera(self, intento):
+        """Espera exponencial con jitter completo para el intento indicado."""
+        return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * (2 ** intento)))
+
+    def _peticion(self, metodo, ruta, payload=None, timeout=None, modelo=None, servidor=None):
+        """
+        Realiza una petición a la API reintentando los errores transitorios.
+
+        Cada intento elige servidor de nuevo, de modo que un reintento tras un
+        fallo puede ir a otro servidor del grupo. Los timeouts de lectura solo se
+        reintentan en peticiones GET: en una generación el timeout es el límite
+        total de la petición, no el de cada intento.
+
+        Args:
+            metodo (str): Método HTTP ("GET" o "POST")
+            ruta (str): Ruta de la API (ej: "/api/generate")
+            payload (dict): Cuerpo JSON de la petición
+            timeout (float|tuple): Timeout de lectura o tupla (conexión, lectura)
+            modelo (str): Modelo usado, para dirigir la petición a un servidor que lo tenga cargado
+            servidor (ServidorOllama): Servidor concreto al que enviar la petición
+
+        Returns:
+            dict: Respuesta JSON de Ollama
+
+        Raises:
+            TiempoAgotadoOllama: Si una petición POST o todos los intentos exceden el timeout
+            ErrorOllama: Si Ollama devuelve un error no recuperable o se agotan los reintentos
+        """
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (TIMEOUT_CONEXION, timeout)
+
+        ultimo_error = None
+
+        for intento in range(self.max_reintentos + 1):
+            if servidor is None:
+                elegido = self._elegir_servidor(modelo)
+            else:
+                elegido = servidor
+                with self._lock:
+                    elegido.en_curso += 1
+            try:
+                respuesta = self.sesion.request(metodo, f"{elegido.host}{ruta}", json=payload, timeout=timeout)
+            except requests.exceptions.ReadTimeout as e:
+                self._registrar_fallo(elegido)
+                if metodo != "GET":
+                    raise TiempoAgotadoOllama(f"Tiempo de espera agotado: {e}") from e
+                ultimo_error = e
+            except requests.exceptions.Timeout as e:
+                ultimo_error = e
+                self._registrar_fallo(elegido)
+            except requests.exceptions.ConnectionError as e:
+                ultimo_error = e
+                self._registrar_fallo(elegido)
+            else:
+                if respuesta.status_code == 200:
+                    self._registrar_exito(elegido, modelo)
+                    return respuesta.json()
+                ultimo_error = ErrorOllama(f"{respuesta.status_code} - {respuesta.text}")
+                if respuesta.status_code not in CODIGOS_REINTENTABLES:
+                    raise ultimo_error
+                self._registrar_fallo(elegido)
+            finally:
+                self._liberar_servidor(elegido)
+
+            if intento < self.max_reintentos:
+                time.sleep(self._espera(intento))
+
+        if isinstance(ultimo_error, requests.exceptions.Timeout):
+            raise TiempoAgotadoOllama(
+                f"Tiempo de espera agotado tras {self.max_reintentos + 1} intentos: {ultimo_error}")
+        raise ErrorOllama(f"Error de conexión con Ollama tras {self.max_reintentos + 1} intentos: {ultimo_error}")
+
+    # ------------------ Modelos ------------------
+
+    def listar_modelos(self):
+        """Devuelve la lista de nombres de modelos instalados en los servidores disponibles."""
+        if len(self.servidores) == 1:
+            datos = self._peticion("GET", "/api/tags")
+            return [modelo.get("name") or modelo.get("model") for modelo in datos.get("models", [])]
+
+        modelos = set()
+        for servidor in self.servidores:
+            if servidor.disponible():
+                self._actualizar_modelos(servidor)
+                modelos.update(servidor.modelos_instalados)
+        return sorted(modelos)
+
+    def descargar_modelo(self, modelo):
+        """Descarga un modelo en un servidor del grupo (equivalente a ``ollama pull``)."""
+        print(f"Modelo {modelo} no encontrado. Descargando...")
+        self._peticion("POST", "/api/pull", {"model": modelo, "stream": False}, timeout=TIMEOUT_DESCARGA)
+        with self._lock:
+            self._disponibles.add(modelo)
+
+    def asegurar_modelo(self, modelo, descargar=True):
+        """
+        Comprueba que el modelo está instalado, descargándolo si se indica.
+
+        El resultado se recuerda, de modo que solo se consulta al servidor la primera vez.
+
+        Returns:
+            bool: True si el modelo está disponible
+        """
+        with self._lock:
+            if modelo in self._disponibles:
+                return True
+
+        instalados = self.listar_modelos()
+        # "llama3.2" equivale a "llama3.2:latest"
+        if modelo in instalados or f"{modelo}:latest" in instalados:
+            with self._lock:
+                self._disponibles.add(modelo)
+            return True
+
+        if descargar:
+            self.descargar_modelo(modelo)
+            return True
+        return False
+
+    def precalentar(self, modelo):
+        """
+        Carga el modelo en memoria con el keep_alive configurado.
+
+        Una petición sin prompt hace que Ollama cargue el modelo sin generar nada,
+        evitando que la primera imagen o línea pague el tiempo de carga. Solo se
+        realiza una vez por modelo y cliente; los errores se notifican sin interrumpir.
+        """
+        with self._lock:
+            if modelo in self._precalentados:
+                return
+            self._precalentados.add(modelo)
+        try:
+            self._peticion("POST", "/api/generate", {"model": modelo, "keep_alive": self.keep_alive},
+                           modelo=modelo)
+        except ErrorOllama as e:
+            print(f"⚠️ No se pudo precalentar el modelo {modelo}: {e}")
+
+    def liberar(self, modelo):
+        """Descarga el modelo de la memoria de los servidores (keep_alive = 0)."""
+        for servidor in self.servidores:
+            if modelo in servidor.modelos_cargados or len(self.servidores) == 1:
+                self._peticion("POST", "/api/generate", {"model": modelo, "keep_alive": 0}, servidor=servidor)
+                with self._lock:
+                    servidor.modelos_cargados.discard(modelo)
+        with self._lock:
+            self._precalentados.discard(modelo)
+
+    # ------------------ Generación ------------------
+
+    def _con_cache(self, modelo, prompt, entradas, opciones, formato, usar_cache, generar):
+        """Devuelve la respuesta desde la caché o la genera y la guarda."""
+        if self.cache is None or not usar_cache:
+            return generar()
+
+        clave = self.cache.calcular_clave(modelo, prompt, entradas, {"opciones": opciones, "formato": formato})
+        respuesta = self.cache.obtener(clave)
+        if respuesta is None:
+            respuesta = generar()
+            self.cache.guardar(clave, modelo, respuesta)
+        return respuesta
+
+    def generar(self, modelo, prompt, imagenes=None, opciones=None, formato=None, timeout=None,
+                usar_cache=True):
+        """
+        Genera una respuesta con /api/generate.
+
+        Args:
+            modelo (str): Nombre del modelo
+            prompt (str): Texto del prompt
+            imagenes (list): Imágenes codificadas en base64 (modelos de visión)
+            opciones (dict): Opciones del modelo (temperature, num_ctx...)
+            formato (str|dict): "json" o esquema JSON para salida estructurada
+            timeout (float|tuple): Timeout específico para esta petición
+            usar_cache (bool): Consultar y actualizar la caché de respuestas
+
+        Returns:
+            str: Texto generado por el modelo
+        """
+        payload = {"model": modelo, "prompt": prompt, "stream": False, "keep_alive": self.keep_alive}
+        if imagenes:
+            payload["images"] = imagenes
+        if opciones:
+            payload["options"] = opciones
+        if formato:
+            payload["format"] = formato
+        return self._con_cache(
+            modelo, prompt, imagenes, opciones, formato, usar_cache,
+            lambda: self._peticion("POST", "/api/generate", payload, timeout, modelo).get("response", ""))
+
+    def chat(self, modelo, mensajes, opciones=None, formato=None, timeout=None, usar_cache=True):
+        """
+        Genera una respuesta con /api/chat.
+
+        Args:
+            modelo (str): Nombre del modelo
+            mensajes (list): Mensajes con 'role', 'content' y opcionalmente 'images'
+            opciones (dict): Opciones del modelo
+            formato (str|dict): "json" o esquema JSON para salida estructurada
+            timeout (float|tuple): Timeout específico para esta petición
+            usar_cache (bool): Consultar y actualizar la caché de respuestas
+
+        Returns:
+            str: Contenido del mensaje de respuesta
+        """
+        payload = {"model": modelo, "messages": mensajes, "stream": False, "keep_alive": self.keep_alive}
+        if opciones:
+            payload["options"] = opciones
+        if formato:
+            payload["format"] = formato
+        # Las imágenes se separan del texto para que la clave use su hash
+        textos = [{"role": m.get("role"), "content": m.get("content")} for m in mensajes]
+        imagenes = [imagen for m in mensajes for imagen in m.get("images", [])]
+        return self._con_cache(
+            modelo, json.dumps(textos, ensure_ascii=False), imagenes, opciones, formato, usar_cache,
+            lambda: self._peticion("POST", "/api/chat", payload, timeout, modelo).get("message", {}).get("content", ""))
+
+    def embeber(self, modelo, textos, timeout=None):
+        """
+        Calcula los embeddings de una lista de textos con /api/embed.
+
+        Args:
+            modelo (str): Modelo de embeddings (ej: "nomic-embed-text")
+            textos (list): Textos a convertir en vectores
+            timeout (float|tuple): Timeout específico para esta petición
+
+        Returns:
+            list: Un vector (lista de floats) por cada texto, en el mismo orden
+        """
+        payload = {"model": modelo, "input": list(textos), "keep_alive": self.keep_alive}
+        return self._peticion("POST", "/api/embed", payload, timeout, modelo).get("embeddings", [])
+
+    def cerrar(self):
+        """Cierra las conexiones del pool y la caché."""
+        self.sesion.close()
+        if self.cache is not None:
+            self.cache.cerrar()
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def obtener_cliente():
+    """Devuelve el cliente compartido del proceso, creándolo la primera vez."""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            cache = None
+            if OLLAMA_CACHE and OLLAMA_CACHE != "0":
+                cache = CacheRespuestas(OLLAMA_CACHE)
+            _cliente = ClienteOllama(cache=cache)
+        return _cliente
@@ -0,0 +1,562 @@
+"""
+Script para construir la galería HTML responsive a partir de la carpeta MODIFICADAS
+
+Este script se ejecuta en la misma carpeta que redimensionar_imagen.py (la que
+contiene MODIFICADAS) después de generar las imágenes, y escribe un index.html
+estático con la galería: imagen principal, tira de miniaturas y botones de
+navegación, con el mismo aspecto que la galería de tordesillas.
+
+Características principales:
+- Lee MODIFICADAS/manifest.json si existe (modo --rendiciones de
+  redimensionar_imagen.py); si no, deduce las rendiciones de los nombres de
+  archivo (<nombre>_<ancho>.jpg / .webp) y lee sus dimensiones
+- srcset/sizes cuando hay varios anchos de una imagen: el navegador descarga
+  solo el ancho que necesita (con un único ancho basta con src)
+- WebP preferente mediante <picture> cuando existe, con JPEG como alternativa
+- width/height explícitos para que la página no salte al cargar
+- loading="lazy" en las miniaturas
+- Marcador de posición desenfocado en línea solo para la imagen principal, la
+  única visible al abrir la página; las miniaturas no lo necesitan
+- Conserva el orden de la página existente; las imágenes nuevas se añaden al
+  final en orden natural (IMG_2 antes que IMG_10)
+
+Uso:
+    cd tordesillas
+    python ../codigo/construir_galeria.py
+    python ../codigo/construir_galeria.py --titulo "Tordesillas" --salida index.html
+"""
+
+import argparse
+import base64
+import html
+import io
+import json
+import os
+import re
+import sys
+from urllib.parse import quote, unquote
+
+from PIL import Image, ImageFilter
+
+CARPETA_IMAGENES = "MODIFICADAS"
+MANIFIESTO = "manifest.json"
+# Nombres generados por redimensionar_imagen.py: <nombre>_<ancho>.<formato>
+PATRON_RENDICION = re.compile(r"^(?P<base>.+)_(?P<ancho>\d+)\.(?P<formato>jpg|webp)$", re.IGNORECASE)
+# Archivos de imagen citados en una página ya generada (src, srcset o lista en JavaScript)
+PATRON_ARCHIVO_PAGINA = re.compile(r"""[/"']([^"'/<>]+?_\d+\.(?:jpg|webp))""", re.IGNORECASE)
+# Ancho del marcador de posición desenfocado
+ANCHO_MARCADOR = 12
+
+# Altura (px) de la imagen principal y de las miniaturas en cada punto de corte del CSS
+ALTURAS_PRINCIPAL = ((576, 200), (768, 250), (None, 400))
+ALTURAS_MINIATURA = ((576, 120), (768, 150), (None, 200))
+
+
+def clave_natural(texto):
+    """
+    Clave de ordenación natural: los números se comparan por su valor.
+
+    Args:
+        texto (str): Nombre a ordenar
+
+    Returns:
+        list: Trozos del nombre, con los números convertidos a enteros
+    """
+    return [int(trozo) if trozo.isdigit() else trozo.lower() for trozo in re.split(r"(\d+)", texto)]
+
+
+def orden_existente(salida):
+    """
+    Lee el orden de las imágenes de una galería ya generada (o hecha a mano).
+
+    Args:
+        salida (str): Página HTML de la galería
+
+    Returns:
+        list: Nombres base en el orden en que aparecen, sin repeticiones
+              (vacía si la página no existe)
+    """
+    if not os.path.exists(salida):
+        return []
+    with open(salida, "r", encoding="utf-8") as f:
+        contenido = f.read()
+    bases = []
+    for archivo in PATRON_ARCHIVO_PAGINA.findall(contenido):
+        coincidencia = PATRON_RENDICION.match(unquote(archivo))
+        if coincidencia:
+            bases.append(coincidencia.group("base"))
+    return list(dict.fromkeys(bases))
+
+
+def ordenar(bases, orden):
+    """
+    Ordena las imágenes respetando un orden previo.
+
+    Args:
+        bases (iterable): Nombres base disponibles
+        orden (list): Orden de la página existente (ver orden_existente)
+
+    Returns:
+        list: Primero las imágenes de 'orden' que siguen existiendo, en ese orden;
+              después las nuevas, en orden natural
+    """
+    bases = set(bases)
+    conocidas = [base for base in orden if base in bases]
+    nuevas = sorted(bases - set(conocidas), key=clave_natural)
+    return conocidas + nuevas
+
+
+def leer_rendiciones(carpeta):
+    """
+    Obtiene las rendiciones disponibles de cada imagen.
+
+    Usa el manifiesto de redimensionar_imagen.py si existe. Si no, agrupa los
+    archivos de la carpeta por nombre base y lee las dimensiones de cada uno
+    (solo la cabecera, sin decodificar la imagen).
+
+    Args:
+        carpeta (str): Carpeta con las imágenes (MODIFICADAS)
+
+    Returns:
+        dict: nombre base -> lista de rendiciones {archivo, formato, ancho, alto, bytes}
+    """
+    imagenes = {}
+    ruta_manifiesto = os.path.join(carpeta, MANIFIESTO)
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        for entrada in manifiesto.values():
+            for rendicion in entrada["rendiciones"]:
+                if os.path.exists(os.path.join(carpeta, rendicion["archivo"])):
+                    base = PATRON_RENDICION.match(rendicion["archivo"]).group("base")
+                    imagenes.setdefault(base, []).append(rendicion)
+        return imagenes
+
+    for archivo in os.listdir(carpeta):
+        coincidencia = PATRON_RENDICION.match(archivo)
+        if not coincidencia:
+            continue
+        ruta = os.path.join(carpeta, archivo)
+        try:
+            with Image.open(ruta) as img:
+                ancho, alto = img.size
+        except Exception as e:
+            print(f"⚠️  Se omite {archivo}: {e}")
+            continue
+        imagenes.setdefault(coincidencia.group("base"), []).append({
+            "archivo": archivo,
+            "formato": coincidencia.group("formato").lower(),
+            "ancho": ancho,
+            "alto": alto,
+            "bytes": os.path.getsize(ruta),
+        })
+    return imagenes
+
+
+def marcador_desenfocado(ruta):
+    """
+    Genera una miniatura diminuta y desenfocada en base64 para usar como fondo.
+
+    Args:
+        ruta (str): Imagen de la que se obtiene el marcador (la rendición más pequeña)
+
+    Returns:
+        str: URI data: con un WebP de ANCHO_MARCADOR píxeles de ancho (unos 100 bytes;
+             un JPEG de ese tamaño ocupa más de 600 por sus tablas de cabecera)
+    """
+    with Image.open(ruta) as img:
+        img.draft("RGB", (ANCHO_MARCADOR * 4, ANCHO_MARCADOR * 4))
+        img = img.convert("RGB")
+        alto = max(1, round(img.height * ANCHO_MARCADOR / img.width))
+        pequeña = img.resize((ANCHO_MARCADOR, alto), Image.Resampling.BILINEAR)
+        pequeña = pequeña.filter(ImageFilter.GaussianBlur(1))
+        buffer = io.BytesIO()
+        pequeña.save(buffer, "WEBP", quality=40)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def atributo_sizes(alturas, relacion):
+    """
+    Construye el atributo sizes a partir de la altura fija que el CSS da a la imagen.
+
+    Como el CSS fija la altura, el ancho mostrado es altura x relación de aspecto.
+
+    Args:
+        alturas (tuple): Pares (ancho máximo de la pantalla o None, altura en px)
+        relacion (float): Relación ancho / alto de la imagen
+
+    Returns:
+        str: Valor del atributo sizes
+    """
+    partes = []
+    for ancho_pantalla, altura in alturas:
+        ancho = f"{round(altura * relacion)}px"
+        partes.append(f"(max-width: {ancho_pantalla}px) {ancho}" if ancho_pantalla else ancho)
+    return ", ".join(partes)
+
+
+def srcset(rendiciones):
+    """
+    Devuelve el atributo srcset de una lista de rendiciones del mismo formato.
+
+    Con una sola rendición no hay nada que elegir: se devuelve solo su URL, sin
+    descriptor de ancho, y no hace falta el atributo sizes.
+    """
+    if len(rendiciones) == 1:
+        return f"{CARPETA_IMAGENES}/{quote(rendiciones[0]['archivo'])}"
+    return ", ".join(f"{CARPETA_IMAGENES}/{quote(r['archivo'])} {r['ancho']}w"
+                     for r in sorted(rendiciones, key=lambda r: r["ancho"]))
+
+
+def datos_imagen(base, rendiciones):
+    """
+    Prepara los atributos HTML de una imagen de la galería.
+
+    Args:
+        base (str): Nombre base de la imagen
+        rendiciones (list): Rendiciones disponibles de la imagen
+
+    Returns:
+        dict: srcset JPEG y WebP, src por defecto, dimensiones, sizes y la rendición
+              JPEG más pequeña (para el marcador), o None si la imagen no tiene
+              ninguna rendición JPEG. Los srcset y sizes quedan vacíos cuando no
+              hay varios anchos entre los que elegir.
+    """
+    jpeg = [r for r in rendiciones if r["formato"] == "jpg"]
+    webp = [r for r in rendiciones if r["formato"] == "webp"]
+    if not jpeg:
+        return None
+    mayor = max(jpeg, key=lambda r: r["ancho"])
+    menor = min(jpeg, key=lambda r: r["ancho"])
+    # src for browsers without srcset: the rendition closest to 1024px
+    por_defecto = min(jpeg, key=lambda r: abs(r["ancho"] - 1024))
+    relacion = mayor["ancho"] / mayor["alto"]
+    varios_anchos = len(jpeg) > 1 or len(webp) > 1
+    return {
+        "nombre": base,
+        "srcset_jpg": srcset(jpeg) if len(jpeg) > 1 else "",
+        "srcset_webp": srcset(webp) if webp else "",
+        "src": f"{CARPETA_IMAGENES}/{quote(por_defecto['archivo'])}",
+        "ancho": por_defecto["ancho"],
+        "alto": por_defecto["alto"],
+        "sizes_principal": atributo_sizes(ALTURAS_PRINCIPAL, relacion) if varios_anchos else "",
+        "sizes_miniatura": atributo_sizes(ALTURAS_MINIATURA, relacion) if varios_anchos else "",
+        "menor": menor["archivo"],
+        "bytes": sum(r["bytes"] for r in jpeg),
+    }
+
+
+def picture(imagen, clase, sizes, indice, perezosa=True, id_img=None, marcador=None):
+    """
+    Genera el HTML de una imagen: <picture> con la fuente WebP, o solo <img> si no hay WebP.
+
+    Args:
+        imagen (dict): Datos de datos_imagen()
+        clase (str): Clase CSS del <img>
+        sizes (str): Atributo sizes (vacío si la imagen tiene un solo ancho)
+        indice (int): Posición de la imagen en la galería
+        perezosa (bool): Añadir loading="lazy"
+        id_img (str): id opcional del <img>; la imagen principal va siempre dentro de
+            <picture> para poder mostrar después la fuente WebP de cualquier miniatura
+        marcador (str): URI data: del marcador desenfocado, si se quiere mostrar
+
+    Returns:
+        str: Fragmento HTML
+    """
+    e = lambda valor: html.escape(str(valor), quote=True)
+    atributo_sizes_html = f' sizes="{e(sizes)}"' if sizes else ""
+    fuente = (f'<source type="image/webp" srcset="{e(imagen["srcset_webp"])}"{atributo_sizes_html}>'
+              if imagen["srcset_webp"] else "")
+    atributos = [
+        f'id="{id_img}"' if id_img else "",
+        f'class="{clase}"',
+        f'src="{e(imagen["src"])}"',
+        f'srcset="{e(imagen["srcset_jpg"])}"' if imagen["srcset_jpg"] else "",
+        atributo_sizes_html.strip(),
+        f'width="{imagen["ancho"]}" height="{imagen["alto"]}"',
+        f'alt="Imagen {indice + 1}"',
+        'loading="lazy"' if perezosa else 'fetchpriority="high"',
+        f'style="background-image: url({marcador})"' if marcador else "",
+    ]
+    img = f'<img {" ".join(a for a in atributos if a)}>'
+    if not fuente and not id_img:
+        return img
+    return f'<picture>{fuente}{img}</picture>'
+
+
+PLANTILLA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{titulo}</title>
+    <!-- Generado por construir_galeria.py: no editar a mano -->
+    <!-- Bootstrap CSS -->
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+    <!-- Bootstrap Icons -->
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.css" rel="stylesheet">
+    <style>
+        body {{
+            font-family: 'Times New Roman', serif;
+            background: linear-gradient(135deg, #0f0f23, #1a1a2e, #16213e);
+            color: #e0e0e0;
+            text-align: center;
+            padding: 50px;
+        }}
+        .construction-message {{
+            font-size: 4rem;
+            font-weight: bold;
+            color: #ff6b6b;
+            text-shadow: 2px 2px 4px #000;
+            margin-top: 100px;
+        }}
+        .border-formal {{
+            border: 3px solid #00d4ff;
+            padding: 30px;
+            border-radius: 15px;
+            background-color: rgba(26, 26, 46, 0.95);
+            box-shadow: 0 8px 20px rgba(0, 212, 255, 0.3);
+        }}
+        .main-image-container {{
+            margin-bottom: 20px;
+        }}
+        .main-image {{
+            max-width: 100%;
+            width: auto;
+            height: 400px;
+            object-fit: contain;
+            border: 3px solid #ffd93d;
+            border-radius: 10px;
+            box-shadow: 0 4px 15px rgba(255, 217, 61, 0.5);
+        }}
+        .filmstrip {{
+            display: flex;
+            overflow-x: auto;
+            padding: 10px;
+            gap: 15px;
+            scrollbar-color: #00d4ff #1a1a2e;
+        }}
+        .filmstrip img {{
+            width: auto;
+            height: 200px;
+            flex-shrink: 0;
+            cursor: pointer;
+            border: 2px solid transparent;
+            border-radius: 8px;
+            transition: transform 0.2s ease, border-color 0.2s ease, box-shadow 0.2s ease;
+        }}
+        .filmstrip img:hover {{
+            border-color: #00d4ff;
+            transform: scale(1.05);
+            box-shadow: 0 0 15px rgba(0, 212, 255, 0.7);
+        }}
+        /* Blurred placeholder shown until the main image is loaded */
+        .main-image {{
+            background-size: cover;
+            background-repeat: no-repeat;
+        }}
+        .navigation-buttons {{
+            text-align: center;
+            margin-top: 25px;
+        }}
+        .navigation-buttons button {{
+            margin: 0 15px;
+            background: linear-gradient(45deg, #ff6b6b, #ffd93d);
+            border: none;
+            color: #000;
+            padding: 12px 30px;
+            border-radius: 25px;
+            font-weight: bold;
+            box-shadow: 0 4px 10px rgba(0,0,0,0.3);
+            transition: transform 0.2s ease, box-shadow 0.2s ease;
+        }}
+        .navigation-buttons button:hover {{
+            transform: scale(1.05);
+            box-shadow: 0 6px 15px rgba(0,0,0,0.5);
+        }}
+
+        /* Responsiveness */
+        @media (max-width: 768px) {{
+            body {{
+                padding: 20px;
+            }}
+            .construction-message {{
+                font-size: 2.5rem;
+            }}
+            .border-formal {{
+                padding: 15px;
+                margin: 0;
+            }}
+            .main-image {{
+                height: 250px;
+            }}
+            .filmstrip img {{
+                height: 150px;
+            }}
+            .navigation-buttons button {{
+                padding: 10px 20px;
+                margin: 0 5px;
+                font-size: 0.9rem;
+            }}
+        }}
+
+        @media (max-width: 576px) {{
+            .construction-message {{
+                font-size: 2rem;
+            }}
+            .main-image {{
+                height: 200px;
+            }}
+            .filmstrip img {{
+                height: 120px;
+            }}
+            .navigation-buttons button {{
+                padding: 8px 16px;
+                margin: 5px;
+                font-size: 0.8rem;
+            }}
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="row justify-content-center">
+            <div class="col-md-12">
+                <div class="border-formal">
+                    <h1 class="construction-message">{titulo}</h1>
+                    <div class="mt-4">
+                        <div class="main-image-container">
+                            {principal}
+                        </div>
+                        <div class="filmstrip">
+{miniaturas}
+                        </div>
+                        <div class="navigation-buttons">
+                            <button type="button" class="btn btn-primary" id="prevBtn">Anterior</button>
+                            <button type="button" class="btn btn-primary" id="nextBtn">Siguiente</button>
+                        </div>
+                    </div>
+                    <p class="mt-3"></p>
+                </div>
+            </div>
+        </div>
+    </div>
+    <!-- Bootstrap JS -->
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+    <script>
+        const thumbnails = Array.from(document.querySelectorAll('.filmstrip img'));
+        const mainImage = document.getElementById('mainImage');
+        let mainSource = mainImage.parentElement.querySelector('source');
+        const prevBtn = document.getElementById('prevBtn');
+        const nextBtn = document.getElementById('nextBtn');
+        // Empty when the images have a single width and need no sizes
+        const mainSizes = {sizes_principal};
+        let currentIndex = 0;
+
+        function updateMainImage() {{
+            const thumb = thumbnails[currentIndex];
+            // Thumbnails without a WebP version are a bare <img>, not a <picture>
+            const previous = thumb.previousElementSibling;
+            const thumbSource = previous && previous.tagName === 'SOURCE' ? previous : null;
+            if (thumbSource && !mainSource) {{
+                mainSource = document.createElement('source');
+                mainSource.type = 'image/webp';
+                mainImage.before(mainSource);
+            }}
+            if (mainSource) {{
+                mainSource.srcset = thumbSource ? thumbSource.srcset : '';
+                mainSource.sizes = mainSizes[currentIndex] || '';
+            }}
+            mainImage.sizes = mainSizes[currentIndex] || '';
+            mainImage.srcset = thumb.srcset;
+            mainImage.src = thumb.getAttribute('src');
+            mainImage.setAttribute('width', thumb.getAttribute('width'));
+            mainImage.setAttribute('height', thumb.getAttribute('height'));
+            mainImage.style.backgroundImage = thumb.style.backgroundImage;
+            mainImage.alt = `Imagen ${{currentIndex + 1}}`;
+        }}
+
+        thumbnails.forEach((img, i) => {{
+            img.addEventListener('click', function() {{
+                currentIndex = i;
+                updateMainImage();
+            }});
+        }});
+
+        prevBtn.addEventListener('click', function() {{
+            currentIndex = (currentIndex - 1 + thumbnails.length) % thumbnails.length;
+            updateMainImage();
+        }});
+
+        nextBtn.addEventListener('click', function() {{
+            currentIndex = (currentIndex + 1) % thumbnails.length;
+            updateMainImage();
+        }});
+    </script>
+</body>
+</html>
+"""
+
+
+def construir_galeria(titulo, salida):
+    """
+    Función principal que genera el HTML de la galería.
+
+    Args:
+        titulo (str): Título de la página y de la cabecera
+        salida (str): Ruta del archivo HTML a escribir
+
+    Returns:
+        bool: True si se generó la galería, False si no hay imágenes
+    """
+    if not os.path.isdir(CARPETA_IMAGENES):
+        print(f"❌ Error: No se encontró la carpeta '{CARPETA_IMAGENES}'")
+        return False
+
+    rendiciones = leer_rendiciones(CARPETA_IMAGENES)
+    imagenes = []
+    for base in ordenar(rendiciones, orden_existente(salida)):
+        imagen = datos_imagen(base, rendiciones[base])
+        if imagen:
+            imagenes.append(imagen)
+
+    if not imagenes:
+        print(f"❌ No se encontraron imágenes <nombre>_<ancho>.jpg en '{CARPETA_IMAGENES}'")
+        return False
+
+    marcador = marcador_desenfocado(os.path.join(CARPETA_IMAGENES, imagenes[0]["menor"]))
+    principal = picture(imagenes[0], "main-image", imagenes[0]["sizes_principal"], 0,
+                        perezosa=False, id_img="mainImage", marcador=marcador)
+    miniaturas = "\n".join(
+        "                            " + picture(imagen, "thumbnail", imagen["sizes_miniatura"], i)
+        for i, imagen in enumerate(imagenes))
+    contenido = PLANTILLA.format(
+        titulo=html.escape(titulo),
+        principal=principal,
+        miniaturas=miniaturas,
+        sizes_principal=json.dumps([imagen["sizes_principal"] for imagen in imagenes]
+                                   if any(imagen["sizes_principal"] for imagen in imagenes) else []),
+    )
+
+    with open(salida, "w", encoding="utf-8") as f:
+        f.write(contenido)
+
+    con_srcset = sum(1 for imagen in imagenes if imagen["srcset_jpg"] or imagen["srcset_webp"])
+    print(f"✓ {len(imagenes)} imágenes en {salida} ({con_srcset} con varios anchos o WebP)")
+    print(f"  HTML: {len(contenido.encode('utf-8'))/1024:.1f}KB")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera la galería HTML a partir de la carpeta MODIFICADAS")
+    parser.add_argument("--titulo", default=None,
+                        help="Título de la galería (por defecto: nombre de la carpeta actual)")
+    parser.add_argument("--salida", default="index.html", help="Archivo HTML de salida (por defecto: index.html)")
+    args = parser.parse_args()
+
+    titulo = args.titulo or os.path.basename(os.getcwd()).capitalize()
+    print("🖼️  Construcción de la galería")
+    if construir_galeria(titulo, args.salida):
+        print("🎉 ¡Galería generada con éxito!")
+    else:
+        sys.exit(1)
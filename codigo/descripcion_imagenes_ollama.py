@@ -1,15 +1,235 @@
-import ollama
+import argparse
 import base64
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
 from PIL import Image
 import io
 import os
 
+from cliente_ollama import obtener_cliente
+
+try:
+    from pymongo import MongoClient, UpdateOne
+    PYMONGO_AVAILABLE = True
+except ImportError:
+    PYMONGO_AVAILABLE = False
+
 ruta = "./imagenes/"
 modelo = "gemma3:12b"  # Modelo a elegir
+indice = "descripciones_indice.sqlite"  # Registro de imágenes ya descritas
+salida_jsonl = "descripciones_ollama.jsonl"  # Resultados, un objeto JSON por línea
+mongo_uri = "mongodb://localhost:27017/"
+mongo_db = "album"
+mongo_coleccion = "imagenes_2"
+tamaño_lote = 50  # Descripciones acumuladas antes de escribir en disco o en MongoDB
+
+# Tamaño de bloque para la codificación base64 por partes (múltiplo de 3 bytes)
+BLOQUE_BASE64 = 3 * 256 * 1024
+
+class IndiceDescripciones:
+    """
+    Registro local de las imágenes ya descritas, identificadas por el hash de su contenido.
+
+    Permite reanudar un análisis interrumpido y procesar solo las imágenes nuevas o
+    modificadas. Para no leer de nuevo todos los archivos en cada ejecución, se guarda
+    también el tamaño y la fecha de modificación de cada ruta: si no han cambiado,
+    se reutiliza el hash calculado la vez anterior.
+    """
+
+    def __init__(self, ruta_indice):
+        """
+        Abre (o crea) el índice.
+
+        Args:
+            ruta_indice (str): Archivo SQLite del índice
+        """
+        self.conexion = sqlite3.connect(ruta_indice)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS descritas (
+                hash TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                fecha REAL NOT NULL
+            )
+        """)
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS rutas (
+                ruta TEXT PRIMARY KEY,
+                tamaño INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                hash TEXT NOT NULL
+            )
+        """)
+        self.conexion.commit()
+
+    def hash_archivo(self, image_path):
+        """
+        Devuelve el hash SHA-256 del contenido del archivo.
+
+        Si el tamaño y la fecha de modificación coinciden con los registrados,
+        se devuelve el hash guardado sin leer el archivo.
+        """
+        info = os.stat(image_path)
+        fila = self.conexion.execute(
+            "SELECT tamaño, mtime, hash FROM rutas WHERE ruta = ?", (image_path,)).fetchone()
+        if fila and fila[0] == info.st_size and fila[1] == info.st_mtime:
+            return fila[2]
+
+        h = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                h.update(chunk)
+        hash_imagen = h.hexdigest()
+
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO rutas (ruta, tamaño, mtime, hash) VALUES (?, ?, ?, ?)",
+            (image_path, info.st_size, info.st_mtime, hash_imagen))
+        self.conexion.commit()
+        return hash_imagen
+
+    def esta_descrita(self, hash_imagen):
+        """Indica si la imagen con ese hash ya fue descrita."""
+        return self.conexion.execute(
+            "SELECT 1 FROM descritas WHERE hash = ?", (hash_imagen,)).fetchone() is not None
+
+    def marcar_descrita(self, hash_imagen, modelo_usado):
+        """Registra la imagen como descrita."""
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO descritas (hash, modelo, fecha) VALUES (?, ?, ?)",
+            (hash_imagen, modelo_usado, time.time()))
+        self.conexion.commit()
+
+    def cerrar(self):
+        """Cierra la conexión con el índice."""
+        self.conexion.close()
+
+class SalidaPorLotes:
+    """
+    Base de los destinos de resultados: acumula registros y los guarda por lotes.
+
+    Los registros se guardan juntos cada ``tamaño_lote`` registros (y al cerrar).
+    Cada destino implementa guardar(), que devuelve los registros realmente
+    guardados, y liberar(), que cierra el archivo o la conexión.
+    """
+
+    def __init__(self, tamaño_lote=tamaño_lote, al_guardar=None):
+        """
+        Args:
+            tamaño_lote (int): Registros acumulados antes de guardar
+            al_guardar (callable): Función llamada con la lista de registros ya guardados
+        """
+        self.tamaño_lote = tamaño_lote
+        self.al_guardar = al_guardar
+        self.pendientes = []
+
+    def escribir(self, registro):
+        """Añade un registro al lote y lo vuelca si está completo."""
+        self.pendientes.append(registro)
+        if len(self.pendientes) >= self.tamaño_lote:
+            self.volcar()
+
+    def volcar(self):
+        """Guarda los registros pendientes y notifica los guardados."""
+        if not self.pendientes:
+            return
+        guardados = self.guardar(self.pendientes)
+        self.pendientes = []
+        if self.al_guardar:
+            self.al_guardar(guardados)
+
+    def guardar(self, registros):
+        """Guarda un lote de registros y devuelve los que se guardaron."""
+        raise NotImplementedError
+
+    def liberar(self):
+        """Cierra el archivo o la conexión del destino."""
+
+    def cerrar(self):
+        """Vuelca los registros pendientes y libera el destino."""
+        self.volcar()
+        self.liberar()
+
+class SalidaJSONL(SalidaPorLotes):
+    """
+    Destino de resultados en formato JSONL con escritura por lotes.
+
+    Las descripciones se acumulan en memoria y se escriben juntas, manteniendo el
+    archivo abierto. Cada línea es un objeto JSON independiente que puede consumir
+    un indexador.
+    """
+
+    def __init__(self, ruta_salida, tamaño_lote=tamaño_lote, al_guardar=None):
+        """
+        Args:
+            ruta_salida (str): Archivo JSONL de salida (se añade al final)
+            tamaño_lote (int): Registros acumulados antes de escribir
+            al_guardar (callable): Función llamada con la lista de registros ya guardados
+        """
+        super().__init__(tamaño_lote, al_guardar)
+        self.archivo = open(ruta_salida, "a", encoding="utf-8")
+
+    def guardar(self, registros):
+        """Escribe los registros al final del archivo."""
+        self.archivo.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros))
+        self.archivo.flush()
+        return registros
+
+    def liberar(self):
+        """Cierra el archivo."""
+        self.archivo.close()
+
+class SalidaMongo(SalidaPorLotes):
+    """
+    Destino de resultados en MongoDB con escrituras agrupadas en un único bulk_write.
+
+    Actualiza los campos 'descripcion' y 'descrito' del documento cuya 'ruta'
+    coincide con la de la imagen. En MongoDB la ruta se guarda completa, así que
+    se busca la ruta absoluta (y también la relativa, tal como se recorrió la carpeta).
+    Solo se notifican como guardados (al_guardar) los registros cuyo documento
+    existe; los demás se reintentan en la siguiente ejecución.
+    """
+
+    def __init__(self, uri=mongo_uri, base_datos=mongo_db, coleccion=mongo_coleccion,
+                 tamaño_lote=tamaño_lote, al_guardar=None):
+        if not PYMONGO_AVAILABLE:
+            raise ImportError("pymongo no disponible. Instálalo con: pip install pymongo")
+        super().__init__(tamaño_lote, al_guardar)
+        self.cliente_mongo = MongoClient(uri)
+        self.coleccion = self.cliente_mongo[base_datos][coleccion]
+
+    def guardar(self, registros):
+        """Envía las actualizaciones en una sola operación y devuelve las de documentos existentes."""
+        rutas = {r["ruta"]: [os.path.abspath(r["ruta"]), r["ruta"]] for r in registros}
+        existentes = {doc["ruta"] for doc in self.coleccion.find(
+            {"ruta": {"$in": [ruta for formas in rutas.values() for ruta in formas]}}, {"ruta": 1})}
+        guardados, no_encontrados = [], []
+        for r in registros:
+            (guardados if existentes.intersection(rutas[r["ruta"]]) else no_encontrados).append(r)
+        if guardados:
+            operaciones = [
+                UpdateOne({"ruta": {"$in": rutas[r["ruta"]]}},
+                          {"$set": {"descripcion": r["descripcion"], "descrito": True}})
+                for r in guardados
+            ]
+            self.coleccion.bulk_write(operaciones, ordered=False)
+        for r in no_encontrados:
+            print(f"⚠️ Imagen no encontrada en MongoDB, se reintentará: {r['ruta']}")
+        return guardados
+
+    def liberar(self):
+        """Cierra la conexión."""
+        self.cliente_mongo.close()
 
 def encode_image_to_base64(image_path):    
     """
     Codifica una imagen a formato base64 para enviarla a Ollama.
+
+    Los archivos JPEG se envían tal cual: sus bytes se codifican por bloques sin
+    decodificar la imagen. Solo los demás formatos (PNG, etc.) se convierten a JPEG.
     
     Args:
         image_path (str): Ruta completa a la imagen que se desea codificar.
@@ -22,9 +242,20 @@ def encode_image_to_base64(image_path):
         Exception: Si ocurre algún otro error durante el procesamiento de la imagen.
     """
     try:
+        with open(image_path, "rb") as f:
+            if f.read(3) == b"\xff\xd8\xff":
+                # JPEG: codificar los bytes originales por bloques, sin recomprimir
+                f.seek(0)
+                partes = []
+                while bloque := f.read(BLOQUE_BASE64):
+                    partes.append(base64.b64encode(bloque).decode('ascii'))
+                return "".join(partes)
+
         with Image.open(image_path) as img:
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
             buffer = io.BytesIO()
-            img.save(buffer, format="JPEG")  # Puedes usar JPEG o PNG
+            img.save(buffer, format="JPEG")
             return base64.b64encode(buffer.getvalue()).decode('utf-8')
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo de imagen en la ruta: {image_path}")
@@ -33,17 +264,23 @@ def encode_image_to_base64(image_path):
         print(f"Ocurrió un error al procesar la imagen: {e}")
         return None
 
-def main():
+def main(forzar=False, destino="jsonl"):
     """
     Función principal que procesa todas las imágenes de la carpeta especificada.
     
     Esta función:
     - Verifica la existencia de la carpeta de imágenes
     - Recorre todas las imágenes en la carpeta (y subcarpetas)
+    - Salta las imágenes ya descritas según el índice local (por hash de contenido)
     - Codifica cada imagen a base64
     - Envía las imágenes a Ollama para análisis
-    - Guarda las descripciones generadas en un archivo de texto
+    - Guarda las descripciones por lotes en un archivo JSONL o en MongoDB
     
+    Args:
+        forzar (bool): Describir de nuevo todas las imágenes aunque ya estén en el índice,
+            sin usar la caché de respuestas de Ollama
+        destino (str): "jsonl" para escribir en salida_jsonl o "mongo" para actualizar MongoDB
+
     Returns:
         None
     """
@@ -53,51 +290,98 @@ def main():
     if not os.path.exists(ruta):
         print(f"Error: No se encontró la carpeta: {ruta}")
         return
+
+    cliente = obtener_cliente()
+    cliente.precalentar(modelo)
+    indice_descripciones = IndiceDescripciones(indice)
+    descritas = 0
+    omitidas = 0
+
+    # Las imágenes se marcan en el índice solo cuando su descripción ya está guardada
+    def marcar_guardadas(registros):
+        for registro in registros:
+            indice_descripciones.marcar_descrita(registro["hash"], registro["modelo"])
+
+    if destino == "mongo":
+        salida = SalidaMongo(al_guardar=marcar_guardadas)
+    else:
+        salida = SalidaJSONL(salida_jsonl, al_guardar=marcar_guardadas)
     
-    for root, dirs, files in os.walk(ruta):
-        for file in files:
-            if file.lower().endswith((".png", ".jpg", ".jpeg")):
-                image_path = os.path.join(root, file)
-                print(f"Procesando imagen: {image_path}")
-
-                # Prompt para el análisis de la imagen
-                prompt = "Describe detalladamente la imagen. Limitate a describir la imagen. No hagas suposiciones."
-
-                # Codifica la imagen y prepara los mensajes para Ollama
-                encoded_image = encode_image_to_base64(image_path)
-
-                if encoded_image:
-                    messages = [
-                        {
-                            'role': 'user',
-                            'content': prompt,
-                            'images': [encoded_image]  # Aquí se pasa la imagen codificada
-                        }
-                    ]
-                
-                    print("Enviando la imagen a Ollama para su análisis...")
+    try:
+        for root, dirs, files in os.walk(ruta):
+            for file in files:
+                if file.lower().endswith((".png", ".jpg", ".jpeg")):
+                    image_path = os.path.join(root, file)
+
                     try:
-                        response = ollama.chat(
-                            model=modelo,  # Corregido: eliminada la asignación incorrecta
-                            messages=messages
-                        )
-
-                        # Muestra la descripción generada
-                        description = response['message']['content']
-                        print("\nDescripción de la imagen:")
-                        print("------------------------")
-                        print(description)
+                        hash_imagen = indice_descripciones.hash_archivo(image_path)
+                    except OSError as e:
+                        print(f"No se pudo leer la imagen {image_path}: {e}")
+                        continue
+
+                    if not forzar and indice_descripciones.esta_descrita(hash_imagen):
+                        omitidas += 1
+                        continue
+
+                    print(f"Procesando imagen: {image_path}")
+
+                    # Prompt para el análisis de la imagen
+                    prompt = "Describe detalladamente la imagen. Limitate a describir la imagen. No hagas suposiciones."
+
+                    # Codifica la imagen y prepara los mensajes para Ollama
+                    encoded_image = encode_image_to_base64(image_path)
+
+                    if encoded_image:
+                        messages = [
+                            {
+                                'role': 'user',
+                                'content': prompt,
+                                'images': [encoded_image]  # Aquí se pasa la imagen codificada
+                            }
+                        ]
+                
+                        print("Enviando la imagen a Ollama para su análisis...")
+                        try:
+                            # Con forzar se pide una descripción nueva, sin la caché de respuestas
+                            description = cliente.chat(modelo, messages, usar_cache=not forzar)
+
+                            # Muestra la descripción generada
+                            print("\nDescripción de la imagen:")
+                            print("------------------------")
+                            print(description)
                         
-                        # Guarda la descripción en un archivo
-                        with open("descripciones_ollama.txt", "a", encoding="utf-8") as f:
-                            f.write(f"Imagen: {file}\nDescripción: {description}\n\n")
-                        print("\nDescripción guardada en 'descripciones_ollama.txt'\n")
+                            # Añade la descripción al lote de salida
+                            salida.escribir({
+                                "imagen": file,
+                                "ruta": image_path,
+                                "hash": hash_imagen,
+                                "modelo": modelo,
+                                "descripcion": description,
+                                "fecha": datetime.now().isoformat(timespec="seconds")
+                            })
+                            print()
+                            descritas += 1
+
+                        except Exception as e:
+                            print(f"Ocurrió un error al comunicarse con Ollama: {e}")
+                            print("Asegúrate de que el servidor de Ollama esté en ejecución y que el modelo 'llava' esté descargado.")
+                    else:
+                        print(f"No se pudo procesar la imagen: {file}")
+    finally:
+        # Guardar lo pendiente también si el proceso se interrumpe
+        salida.cerrar()
+        indice_descripciones.cerrar()
+
+    print(f"Imágenes descritas: {descritas} | Ya descritas anteriormente: {omitidas}")
 
-                    except Exception as e:
-                        print(f"Ocurrió un error al comunicarse con Ollama: {e}")
-                        print("Asegúrate de que el servidor de Ollama esté en ejecución y que el modelo 'llava' esté descargado.")
-                else:
-                    print(f"No se pudo procesar la imagen: {file}")
+    if cliente.cache is not None:
+        print(cliente.cache.resumen())
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Describe las imágenes de la carpeta con Ollama")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Describir de nuevo todas las imágenes, aunque ya estén en el índice o en la caché de respuestas")
+    parser.add_argument("--destino", choices=["jsonl", "mongo"], default="jsonl",
+                        help=f"Dónde guardar las descripciones (por defecto: {salida_jsonl})")
+    args = parser.parse_args()
+    main(forzar=args.forzar, destino=args.destino)
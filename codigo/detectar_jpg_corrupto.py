@@ -1,267 +1,645 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Detector de Imágenes JPG Corruptas con PySide6
+Detector de Imágenes JPG Corruptas
+
+Sin argumentos abre la interfaz gráfica (PySide6, en detectar_jpg_corrupto_gui.py).
+Con argumentos funciona en modo consola, sin importar Qt, y escribe un registro por
+archivo en JSONL o CSV:
+
+    python detectar_jpg_corrupto.py /ruta/fotos --procesos 8 --formato csv > informe.csv
+    python detectar_jpg_corrupto.py /ruta/fotos --profundidad completa --solo-corruptos
+
+Códigos de salida: 0 sin archivos corruptos, 1 con archivos corruptos, 2 error de uso
+o ruta inexistente, 130 interrumpido.
 """
 
+import argparse
+import csv
+import io
+import json
 import os
+import re
+import signal
+import sqlite3
 import sys
-import threading
 import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from PIL import Image, ImageFile
+from PIL import Image, UnidentifiedImageError
+
+# Profundidad del análisis: estructura de marcadores o, además, decodificación completa
+DEPTH_FAST = "rapida"
+DEPTH_DEEP = "completa"
+
+# Intervalo mínimo entre envíos de eventos a la interfaz (segundos)
+INTERVALO_EVENTOS = 0.1
+
+# Códigos de salida del modo consola
+SALIDA_OK = 0
+SALIDA_CORRUPTOS = 1
+SALIDA_ERROR = 2
+SALIDA_INTERRUMPIDO = 130
+
+# Resultados de análisis anteriores, para no repetir los archivos que no han cambiado
+RUTA_CACHE_VERIFICACION = "verificacion_jpg.sqlite"
+# Resultados escritos en la caché entre cada commit
+COMMIT_CADA = 500
+
+# Marcadores JPEG
+MARKER_SOI = 0xD8
+MARKER_EOI = 0xD9
+MARKER_SOS = 0xDA
+MARKER_TEM = 0x01
+MARKER_RST0, MARKER_RST7 = 0xD0, 0xD7
+MARKERS_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# End of the entropy-coded data: 0xFF (plus fill bytes) followed by something other than 0x00 or RSTn
+ENTROPY_END = re.compile(rb'\xff+[^\x00\xd0-\xd7\xff]')
+
+# Archivos enviados a cada proceso de una vez (menos coste de comunicación)
+TAMAÑO_LOTE = 32
+# Lotes en curso por proceso: mantiene ocupados a los procesos sin encolar todo el árbol
+LOTES_POR_PROCESO = 4
+
+
+# ------------------ Comprobaciones ------------------
+# Funciones de módulo para poder ejecutarlas en los procesos del pool.
+
+def is_jpg_file(file_path):
+    return Path(file_path).suffix.lower() in {'.jpg', '.jpeg'}
+
+
+def check_file_size(size):
+    if size == 0:
+        return False, "Archivo vacío"
+    elif size < 100:
+        return False, f"Archivo muy pequeño ({size} bytes)"
+    return True, f"Tamaño: {size} bytes"
+
+
+def check_jpeg_structure(data):
+    """
+    Recorre los marcadores del JPEG sin decodificar píxeles.
+
+    Comprueba SOI, la longitud de cada segmento, que haya SOF antes de SOS, que los
+    datos comprimidos tras cada SOS terminen en un marcador y que el archivo acabe en EOI.
+    """
+    size = len(data)
+    if size < 4 or data[:3] != b'\xff\xd8\xff':
+        return False, "Cabecera JPG inválida"
+
+    pos = 2
+    has_frame = False
+    scans = 0
+    while True:
+        if pos >= size:
+            return False, "Falta el marcador EOI (archivo truncado)"
+        if data[pos] != 0xFF:
+            return False, f"Se esperaba un marcador en el byte {pos}"
+        # Fill bytes: any number of 0xFF before the marker code
+        while pos < size and data[pos] == 0xFF:
+            pos += 1
+        if pos >= size:
+            return False, "Falta el marcador EOI (archivo truncado)"
+        marker = data[pos]
+        pos += 1
+
+        if marker == MARKER_EOI:
+            if not scans:
+                return False, "EOI sin datos de imagen"
+            return True, f"Estructura válida ({scans} scan{'s' if scans > 1 else ''})"
+        if marker == MARKER_SOI:
+            return False, f"SOI inesperado en el byte {pos - 2}"
+        if MARKER_RST0 <= marker <= MARKER_RST7 or marker == MARKER_TEM:
+            continue  # Standalone markers, no length
+
+        if pos + 2 > size:
+            return False, "Segmento truncado"
+        length = int.from_bytes(data[pos:pos + 2], 'big')
+        if length < 2 or pos + length > size:
+            return False, f"Longitud de segmento 0x{marker:02X} inválida en el byte {pos - 2}"
+        if marker in MARKERS_SOF:
+            has_frame = True
+        pos += length
+
+        if marker == MARKER_SOS:
+            if not has_frame:
+                return False, "SOS sin marcador SOF previo"
+            scans += 1
+            # Entropy-coded data runs until the next marker that isn't a stuffed 0xFF00 or RSTn
+            match = ENTROPY_END.search(data, pos)
+            if match is None:
+                return False, "Falta el marcador EOI (archivo truncado)"
+            pos = match.start()
+
+
+def check_with_pil(data):
+    """Decodifica la imagen completa una sola vez desde los bytes ya leídos."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format not in ['JPEG', 'JPG']:
+                return False, f"Formato incorrecto: {img.format}"
+            img.load()
+            return True, f"Imagen válida {img.size}"
+    except UnidentifiedImageError:
+        return False, "Error PIL: formato de imagen no reconocido"
+    except Exception as e:
+        return False, f"Error PIL: {str(e)}"
+
+
+def detect_corruption(file_path, depth=DEPTH_FAST):
+    if not is_jpg_file(file_path):
+        return False, "No es un archivo JPG"
+
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except Exception as e:
+        return False, {'read': (False, f"Error leyendo archivo: {str(e)}")}
+
+    results = {}
+    results['size'] = check_file_size(len(data))
+    results['structure'] = check_jpeg_structure(data)
+    if depth == DEPTH_DEEP:
+        results['pil'] = check_with_pil(data)
+
+    is_corrupted = not all(ok for ok, _ in results.values())
+    return not is_corrupted, results
+
+
+# ------------------ Búsqueda de archivos ------------------
+
+JPG_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def iter_jpg_files(root, recursive=True, max_depth=None):
+    """
+    Recorre el árbol una sola vez con os.scandir y devuelve las rutas JPG según las encuentra.
+
+    La extensión se compara sin distinguir mayúsculas (.jpg, .JPG, .Jpeg...). Los
+    directorios que no se pueden leer se saltan. max_depth limita cuántos niveles de
+    subcarpetas se recorren (0: solo la carpeta indicada).
+    """
+    if os.path.isfile(root):
+        yield str(root)
+        return
+    stack = [(str(root), 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and (max_depth is None or depth < max_depth):
+                            subdirs.append((entry.path, depth + 1))
+                    elif entry.name.lower().endswith(JPG_EXTENSIONS) and entry.is_file():
+                        yield entry.path
+                except OSError:
+                    continue
+        # Depth first, in directory order
+        stack.extend(reversed(subdirs))
+
+
+# ------------------ Caché de verificación ------------------
+
+class VerificationCache:
+    """
+    Último veredicto de cada archivo, válido mientras no cambien su tamaño, fecha e inodo.
+
+    Un análisis rápido no sirve para una petición de decodificación completa, pero uno
+    completo sí sirve para una rápida. Las entradas se guardan por ruta absoluta, para
+    que el mismo archivo se encuentre aunque se analice con otra ruta relativa o desde
+    otro directorio.
+    """
+
+    DEPTH_RANK = {DEPTH_FAST: 0, DEPTH_DEEP: 1}
+
+    def __init__(self, path=RUTA_CACHE_VERIFICACION):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS verificaciones (
+                ruta TEXT PRIMARY KEY,
+                tamaño INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inodo INTEGER NOT NULL,
+                profundidad TEXT NOT NULL,
+                valido INTEGER NOT NULL,
+                detalles TEXT NOT NULL,
+                verificado REAL NOT NULL
+            )
+        """)
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def lookup(self, path, st, depth):
+        """Devuelve (válido, detalles) si el archivo no ha cambiado desde el último análisis, o None."""
+        row = self._connection.execute(
+            "SELECT tamaño, mtime_ns, inodo, profundidad, valido, detalles FROM verificaciones WHERE ruta = ?",
+            (os.path.abspath(path),)).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, inode, cached_depth, valid, details = row
+        if (size, mtime_ns, inode) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        if self.DEPTH_RANK.get(cached_depth, -1) < self.DEPTH_RANK[depth]:
+            return None
+        return bool(valid), {check: tuple(result) for check, result in json.loads(details).items()}
+
+    def store(self, path, st, depth, valid, results):
+        if not isinstance(results, dict):
+            return
+        self._connection.execute(
+            "INSERT OR REPLACE INTO verificaciones "
+            "(ruta, tamaño, mtime_ns, inodo, profundidad, valido, detalles, verificado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino, depth, int(valid),
+             json.dumps(results, ensure_ascii=False), time.time()))
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_CADA:
+            self.commit()
 
-from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QFileDialog, QMessageBox,
-    QVBoxLayout, QWidget, QPushButton, QLabel, QProgressBar,
-    QTextEdit, QHBoxLayout, QCheckBox
-)
-from PySide6.QtCore import Qt, Signal, QObject
+    def commit(self):
+        self._connection.commit()
+        self._uncommitted = 0
 
-# Permitir cargar imágenes truncadas
-ImageFile.LOAD_TRUNCATED_IMAGES = True
+    def close(self):
+        self.commit()
+        self._connection.close()
 
 
-# ------------------ Lógica Detector ------------------
+# ------------------ Motor paralelo ------------------
 
-class JPGCorruptionDetector(QObject):
-    log_signal = Signal(str)
-    progress_signal = Signal(int, int, str)
-    finished_signal = Signal(list, list, int)
+class CancellationToken:
+    """Señal de parada compartida entre el proceso principal y los procesos del pool."""
 
     def __init__(self):
-        super().__init__()
-        self.corrupted_files = []
-        self.valid_files = []
-        self.total_files = 0
+        self._event = multiprocessing.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+_worker_cancel_event = None
+
+
+def _init_worker(event):
+    global _worker_cancel_event
+    _worker_cancel_event = event
+    # Ctrl-C reaches the whole process group; the main process stops the workers
+    # through the token instead of each one dying with its own traceback
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _check_batch(paths, depth):
+    """Analiza un lote en un proceso del pool. Deja de analizar en cuanto se cancela."""
+    results = []
+    for path in paths:
+        if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+            break
+        results.append((path, *detect_corruption(path, depth)))
+    return results
+
+
+def _batches(paths, size):
+    batch = []
+    for path in paths:
+        batch.append(str(path))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def check_files(paths, workers=None, token=None, depth=DEPTH_FAST, cache=None, force=False,
+                batch_size=TAMAÑO_LOTE):
+    """
+    Analiza los archivos en paralelo y devuelve (ruta, válido, detalles, de_caché) en el orden de entrada.
+
+    Los lotes se reparten entre todos los núcleos con un número limitado en vuelo, y los
+    resultados se recogen en orden de envío. Al cancelar el token se dejan de enviar
+    lotes, se descartan los pendientes y los procesos abandonan el lote en curso.
+    Con una caché, los archivos sin cambios desde el último análisis no se envían a
+    los procesos (salvo con force) y los nuevos resultados se guardan en ella.
+    Si el recorrido se interrumpe (Ctrl+C) o se cierra el generador antes de terminar,
+    se cancela el token antes de esperar a los procesos.
+    """
+    workers = workers or os.cpu_count() or 1
+    token = token or CancellationToken()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(token._event,))
+    pending = deque()
+    batches = _batches(paths, batch_size)
+    finished = False
+    try:
+        while True:
+            while not token.cancelled and len(pending) < workers * LOTES_POR_PROCESO:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                stats = [_stat(path) for path in batch] if cache is not None else [None] * len(batch)
+                known = {}
+                if cache is not None and not force:
+                    for i, (path, st) in enumerate(zip(batch, stats)):
+                        if st is not None:
+                            cached = cache.lookup(path, st, depth)
+                            if cached is not None:
+                                known[i] = cached
+                todo = [path for i, path in enumerate(batch) if i not in known]
+                future = executor.submit(_check_batch, todo, depth) if todo else None
+                pending.append((batch, stats, known, future))
+            if not pending or token.cancelled:
+                break
+            batch, stats, known, future = pending.popleft()
+            checked = iter(future.result() if future is not None else [])
+            for i, (path, st) in enumerate(zip(batch, stats)):
+                if i in known:
+                    yield Path(path), *known[i], True
+                    continue
+                result = next(checked, None)
+                if result is None:
+                    break  # Cancelled in the middle of the batch
+                _, is_valid, results = result
+                if cache is not None and st is not None:
+                    cache.store(path, st, depth, is_valid, results)
+                yield Path(path), is_valid, results, False
+        finished = True
+    finally:
+        if not finished:
+            # Interrupted or abandoned by the caller: make the workers drop their
+            # current batch, otherwise shutdown() waits for it to finish
+            token.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if cache is not None:
+            cache.commit()
+
+
+# ------------------ Eventos ------------------
+
+class EventBatcher:
+    """
+    Agrupa líneas de log, progreso y archivos corruptos y los entrega juntos como mucho
+    cada `interval` segundos, para que la interfaz no reciba un evento por archivo.
+    """
+
+    def __init__(self, deliver, interval=INTERVALO_EVENTOS):
+        self.deliver = deliver
+        self.interval = interval
+        self.lines = []
+        self.progress = None
+        self.corrupted = []
+        self.last_delivery = 0.0
+
+    def log(self, msg):
+        self.lines.append(msg)
+        self._maybe_flush()
+
+    def set_progress(self, current, total, status):
+        self.progress = (current, total, status)
+        self._maybe_flush()
+
+    def add_corrupted(self, path, results):
+        self.corrupted.append((path, results))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self.last_delivery >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.lines or self.progress or self.corrupted:
+            self.deliver(self.lines, self.progress, self.corrupted)
+            self.lines, self.progress, self.corrupted = [], None, []
+        self.last_delivery = time.monotonic()
 
-    def is_jpg_file(self, file_path):
-        return Path(file_path).suffix.lower() in {'.jpg', '.jpeg'}
 
-    def check_file_header(self, file_path):
-        try:
-            with open(file_path, 'rb') as f:
-                header = f.read(10)
-                if len(header) < 3 or header[:3] != b'\xff\xd8\xff':
-                    return False, "Cabecera JPG inválida"
-                return True, "Cabecera válida"
-        except Exception as e:
-            return False, f"Error leyendo archivo: {str(e)}"
-
-    def check_with_pil(self, file_path):
-        try:
-            with Image.open(file_path) as img:
-                if img.format not in ['JPEG', 'JPG']:
-                    return False, f"Formato incorrecto: {img.format}"
-                img.verify()
-                with Image.open(file_path) as img2:
-                    img2.load()
-                return True, f"Imagen válida {img.size}"
-        except Exception as e:
-            return False, f"Error PIL: {str(e)}"
-
-    def check_file_size(self, file_path):
-        try:
-            size = os.path.getsize(file_path)
-            if size == 0:
-                return False, "Archivo vacío"
-            elif size < 100:
-                return False, f"Archivo muy pequeño ({size} bytes)"
-            return True, f"Tamaño: {size} bytes"
-        except Exception as e:
-            return False, f"Error obteniendo tamaño: {str(e)}"
+# ------------------ Lógica Detector ------------------
 
-    def detect_corruption(self, file_path):
-        if not self.is_jpg_file(file_path):
-            return False, "No es un archivo JPG"
+def _ignore(*args):
+    pass
 
-        results = {}
-        is_valid_size, size_msg = self.check_file_size(file_path)
-        results['size'] = (is_valid_size, size_msg)
 
-        is_valid_header, header_msg = self.check_file_header(file_path)
-        results['header'] = (is_valid_header, header_msg)
+class JPGCorruptionDetector:
+    """
+    Núcleo del detector, sin dependencias de Qt. Informa mediante funciones:
 
-        is_valid_pil, pil_msg = self.check_with_pil(file_path)
-        results['pil'] = (is_valid_pil, pil_msg)
+    - on_events(lines, progress, corrupted): eventos agrupados (ver EventBatcher)
+    - on_result(path, is_valid, results, from_cache): cada archivo analizado, en orden
+    - on_finished(valid_files, corrupted_files, total): al terminar o detenerse
 
-        is_corrupted = not (is_valid_size and is_valid_header and is_valid_pil)
-        return not is_corrupted, results
+    La interfaz gráfica conecta estas funciones a señales de Qt; el modo consola
+    escribe directamente cada resultado.
+    """
 
-    def scan(self, path, recursive=True):
+    def __init__(self, workers=None, depth=DEPTH_FAST, cache_path=RUTA_CACHE_VERIFICACION, force=False,
+                 on_events=None, on_result=None, on_finished=None):
         self.corrupted_files = []
         self.valid_files = []
+        self.total_files = 0
+        self.discovering = False
+        self.workers = workers or os.cpu_count() or 1
+        self.depth = depth
+        self.cache_path = cache_path
+        self.force = force
+        self.token = CancellationToken()
+        self.events = EventBatcher(on_events or _ignore)
+        self.on_result = on_result or _ignore
+        self.on_finished = on_finished or _ignore
+
+    def stop(self):
+        self.token.cancel()
+
+    def scan(self, paths, recursive=True, max_depth=None):
+        self.corrupted_files = []
+        self.valid_files = []
+        self.token = CancellationToken()
+
+        self.total_files = 0
 
-        if os.path.isfile(path):
-            jpg_files = [Path(path)]
+        self.events.log(f"Buscando y analizando archivos JPG con {self.workers} procesos")
+        checked = 0
+        reused = 0
+        cache = VerificationCache(self.cache_path) if self.cache_path else None
+        results_iter = check_files(self._discover(paths, recursive, max_depth), self.workers, self.token,
+                                   self.depth, cache, self.force)
+        try:
+            for jpg_file, is_valid, results, from_cache in results_iter:
+                checked += 1
+                reused += from_cache
+                self.on_result(jpg_file, is_valid, results, from_cache)
+                self._report(checked, jpg_file, is_valid, results)
+        finally:
+            # Close the generator now (it cancels the workers and commits the cache)
+            # rather than whenever it is garbage collected, after the cache is closed
+            results_iter.close()
+            if cache is not None:
+                cache.close()
+
+        if not self.total_files:
+            self.events.log("No se encontraron archivos JPG")
+        if reused:
+            self.events.log(f"♻ {reused} archivos sin cambios desde el último análisis")
+        if self.token.cancelled:
+            found = f"{self.total_files}+" if self.discovering else self.total_files
+            self.events.log(f"⏹ Escaneo detenido tras {checked} de {found} archivos")
+        self.events.flush()
+        self.on_finished(self.valid_files, self.corrupted_files, checked)
+
+    def _discover(self, paths, recursive, max_depth):
+        """Cuenta los archivos según se encuentran; los workers empiezan sin esperar al final del recorrido."""
+        self.discovering = True
+        for path in [paths] if isinstance(paths, (str, os.PathLike)) else paths:
+            for jpg_file in iter_jpg_files(path, recursive, max_depth):
+                self.total_files += 1
+                yield jpg_file
+        self.discovering = False
+
+    def _report(self, checked, jpg_file, is_valid, results):
+        searching = " (buscando más...)" if self.discovering else ""
+        self.events.set_progress(checked, self.total_files, f"Analizado: {jpg_file.name}{searching}")
+
+        if is_valid:
+            self.valid_files.append(jpg_file)
+            self.events.log(f"✅ {jpg_file}")
         else:
-            if recursive:
-                jpg_files = list(Path(path).rglob("*.jpg")) + list(Path(path).rglob("*.jpeg"))
-            else:
-                jpg_files = list(Path(path).glob("*.jpg")) + list(Path(path).glob("*.jpeg"))
-
-        self.total_files = len(jpg_files)
-        if not jpg_files:
-            self.log_signal.emit("No se encontraron archivos JPG")
-            self.finished_signal.emit(self.valid_files, self.corrupted_files, 0)
-            return
+            self.corrupted_files.append((jpg_file, results))
+            self.events.log(f"❌ {jpg_file} - CORRUPTA")
+            self.events.add_corrupted(jpg_file, results)
+            for check_type, (ok, msg) in _as_checks(results).items():
+                if not ok:
+                    self.events.log(f"   └─ {check_type}: {msg}")
 
-        for i, jpg_file in enumerate(jpg_files, start=1):
-            self.progress_signal.emit(i, len(jpg_files), f"Analizando: {jpg_file.name}")
-            is_valid, results = self.detect_corruption(jpg_file)
 
-            if is_valid:
-                self.valid_files.append(jpg_file)
-                self.log_signal.emit(f"✅ {jpg_file}")
-            else:
-                self.corrupted_files.append((jpg_file, results))
-                self.log_signal.emit(f"❌ {jpg_file} - CORRUPTA")
-                for check_type, (ok, msg) in results.items():
-                    if not ok:
-                        self.log_signal.emit(f"   └─ {check_type}: {msg}")
+# ------------------ Modo consola ------------------
 
-        self.finished_signal.emit(self.valid_files, self.corrupted_files, len(jpg_files))
+def _as_checks(results):
+    """Devuelve los resultados como {comprobación: (ok, mensaje)}, también cuando son un texto (p. ej. no es JPG)."""
+    if not isinstance(results, dict):
+        return {'file': (False, str(results))}
+    return results
 
 
-# ------------------ Interfaz Gráfica ------------------
+def _record(path, is_valid, results, from_cache):
+    results = _as_checks(results)
+    return {
+        'ruta': str(path),
+        'valido': is_valid,
+        'cache': bool(from_cache),
+        'comprobaciones': {check: {'ok': ok, 'detalle': msg} for check, (ok, msg) in results.items()},
+    }
 
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.detector = JPGCorruptionDetector()
-        self.scanning = False
-        self.path = ""
-
-        self.setWindowTitle("Detector de Imágenes JPG Corruptas - PySide6")
-        self.setGeometry(200, 200, 800, 600)
-
-        layout = QVBoxLayout()
-
-        # Botones selección
-        btn_layout = QHBoxLayout()
-        self.btn_folder = QPushButton("📁 Seleccionar Carpeta")
-        self.btn_file = QPushButton("📄 Seleccionar Archivo")
-        btn_layout.addWidget(self.btn_folder)
-        btn_layout.addWidget(self.btn_file)
-        layout.addLayout(btn_layout)
-
-        self.path_label = QLabel("Ruta seleccionada: Ninguna")
-        layout.addWidget(self.path_label)
-
-        # Opción recursiva
-        self.chk_recursive = QCheckBox("Búsqueda recursiva")
-        self.chk_recursive.setChecked(True)
-        layout.addWidget(self.chk_recursive)
-
-        # Botones acción
-        action_layout = QHBoxLayout()
-        self.btn_scan = QPushButton("🔍 Iniciar Análisis")
-        self.btn_stop = QPushButton("⏹ Detener")
-        self.btn_stop.setEnabled(False)
-        action_layout.addWidget(self.btn_scan)
-        action_layout.addWidget(self.btn_stop)
-        layout.addLayout(action_layout)
-
-        # Progreso
-        self.progress = QProgressBar()
-        self.progress_label = QLabel("Listo para analizar")
-        layout.addWidget(self.progress)
-        layout.addWidget(self.progress_label)
-
-        # Log
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        layout.addWidget(self.log_text)
-
-        # Estadísticas
-        self.stats_label = QLabel("Total: 0 | Válidas: 0 | Corruptas: 0")
-        layout.addWidget(self.stats_label)
-
-        container = QWidget()
-        container.setLayout(layout)
-        self.setCentralWidget(container)
-
-        # Conectar señales
-        self.btn_folder.clicked.connect(self.select_folder)
-        self.btn_file.clicked.connect(self.select_file)
-        self.btn_scan.clicked.connect(self.start_scan)
-        self.btn_stop.clicked.connect(self.stop_scan)
-
-        self.detector.log_signal.connect(self.log_message)
-        self.detector.progress_signal.connect(self.update_progress)
-        self.detector.finished_signal.connect(self.scan_finished)
-
-    def select_folder(self):
-        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta")
-        if folder:
-            self.path = folder
-            self.path_label.setText(f"Ruta seleccionada: {folder}")
-
-    def select_file(self):
-        file, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar archivo", "", "Imágenes JPG (*.jpg *.jpeg);;Todos (*.*)")
-        if file:
-            self.path = file
-            self.path_label.setText(f"Ruta seleccionada: {file}")
-
-    def log_message(self, msg):
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {msg}")
-
-    def update_progress(self, current, total, status):
-        self.progress.setMaximum(total)
-        self.progress.setValue(current)
-        self.progress_label.setText(f"{current}/{total} - {status}")
-
-    def start_scan(self):
-        if not self.path:
-            QMessageBox.warning(self, "Advertencia", "Selecciona una carpeta o archivo primero")
-            return
-        if not os.path.exists(self.path):
-            QMessageBox.critical(self, "Error", "La ruta seleccionada no existe")
-            return
 
-        self.log_text.clear()
-        self.scanning = True
-        self.btn_scan.setEnabled(False)
-        self.btn_stop.setEnabled(True)
-
-        recursive = self.chk_recursive.isChecked()
-
-        thread = threading.Thread(target=self.detector.scan, args=(self.path, recursive), daemon=True)
-        thread.start()
-
-    def stop_scan(self):
-        self.scanning = False
-        self.btn_scan.setEnabled(True)
-        self.btn_stop.setEnabled(False)
-        self.log_message("⏹ Escaneo detenido (no implementado completamente)")
-
-    def scan_finished(self, valid_files, corrupted_files, total):
-        self.scanning = False
-        self.btn_scan.setEnabled(True)
-        self.btn_stop.setEnabled(False)
-
-        resumen = (
-            f"\n📊 RESUMEN:\n"
-            f"Total analizados: {total}\n"
-            f"✅ Válidos: {len(valid_files)}\n"
-            f"❌ Corruptos: {len(corrupted_files)}"
-        )
-        self.log_message(resumen)
-        self.stats_label.setText(f"Total: {total} | Válidas: {len(valid_files)} | Corruptas: {len(corrupted_files)}")
-
-        if corrupted_files:
-            QMessageBox.information(self, "Análisis Completado",
-                                    f"Se encontraron {len(corrupted_files)} archivos corruptos.\nRevisa el log.")
+class ReportWriter:
+    """Escribe un registro por archivo en JSONL o CSV según llegan los resultados."""
+
+    CSV_FIELDS = ['ruta', 'valido', 'cache', 'errores']
+
+    def __init__(self, stream, fmt, only_corrupted=False):
+        self.stream = stream
+        self.fmt = fmt
+        self.only_corrupted = only_corrupted
+        if fmt == 'csv':
+            self.csv = csv.writer(stream)
+            self.csv.writerow(self.CSV_FIELDS)
+
+    def write(self, path, is_valid, results, from_cache):
+        if is_valid and self.only_corrupted:
+            return
+        record = _record(path, is_valid, results, from_cache)
+        if self.fmt == 'csv':
+            errors = "; ".join(f"{check}: {r['detalle']}"
+                               for check, r in record['comprobaciones'].items() if not r['ok'])
+            self.csv.writerow([record['ruta'], int(is_valid), int(record['cache']), errors])
         else:
-            QMessageBox.information(self, "Análisis Completado", "¡Todas las imágenes están en buen estado!")
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _progress_to_stderr(lines, progress, corrupted):
+    if progress:
+        current, total, _ = progress
+        sys.stderr.write(f"\r{current}/{total} analizados")
+        sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detecta imágenes JPG corruptas sin interfaz gráfica")
+    parser.add_argument("rutas", nargs="+", help="Carpetas o archivos a analizar")
+    parser.add_argument("-j", "--procesos", type=int, default=None,
+                        help="Procesos de análisis (por defecto: todos los núcleos)")
+    parser.add_argument("--no-recursivo", action="store_true", help="No entrar en subcarpetas")
+    parser.add_argument("--max-niveles", type=int, default=None,
+                        help="Niveles máximos de subcarpetas a recorrer")
+    parser.add_argument("--profundidad", choices=[DEPTH_FAST, DEPTH_DEEP], default=DEPTH_FAST,
+                        help="rapida: estructura de marcadores; completa: además decodifica la imagen")
+    parser.add_argument("--formato", choices=["jsonl", "csv"], default="jsonl", help="Formato del informe")
+    parser.add_argument("-o", "--salida", help="Archivo del informe (por defecto: salida estándar)")
+    parser.add_argument("--solo-corruptos", action="store_true", help="Incluir en el informe solo los corruptos")
+    parser.add_argument("--forzar", action="store_true", help="Volver a analizar aunque el archivo no haya cambiado")
+    parser.add_argument("--sin-cache", action="store_true", help="No leer ni guardar la caché de verificación")
+    args = parser.parse_args(argv)
+
+    missing = [ruta for ruta in args.rutas if not os.path.exists(ruta)]
+    if missing:
+        for ruta in missing:
+            print(f"La ruta no existe: {ruta}", file=sys.stderr)
+        return SALIDA_ERROR
+
+    stream = open(args.salida, "w", encoding="utf-8", newline="") if args.salida else sys.stdout
+    writer = ReportWriter(stream, args.formato, args.solo_corruptos)
+    detector = JPGCorruptionDetector(
+        workers=args.procesos, depth=args.profundidad, force=args.forzar,
+        cache_path=None if args.sin_cache else RUTA_CACHE_VERIFICACION,
+        on_result=writer.write,
+        on_events=_progress_to_stderr if sys.stderr.isatty() else None)
+
+    start = time.time()
+    try:
+        detector.scan(args.rutas, recursive=not args.no_recursivo, max_depth=args.max_niveles)
+    except KeyboardInterrupt:
+        # scan() has already cancelled the workers and closed the cache on its way out
+        return SALIDA_INTERRUMPIDO
+    except BrokenPipeError:
+        # The reader closed the pipe (e.g. `| head`): silence the final flush and stop
+        os.dup2(os.open(os.devnull, os.O_WRONLY), stream.fileno())
+        return SALIDA_ERROR
+    finally:
+        stream.flush()
+        if stream is not sys.stdout:
+            stream.close()
+
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+    checked = len(detector.valid_files) + len(detector.corrupted_files)
+    print(f"Total analizados: {checked} | Válidos: {len(detector.valid_files)} | "
+          f"Corruptos: {len(detector.corrupted_files)} ({time.time() - start:.1f} s)", file=sys.stderr)
+    return SALIDA_CORRUPTOS if detector.corrupted_files else SALIDA_OK
 
 
 # ------------------ MAIN ------------------
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    # Sin argumentos: interfaz gráfica (importa Qt solo en este caso)
+    from detectar_jpg_corrupto_gui import run_gui
+    sys.exit(run_gui())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Interfaz gráfica (PySide6) del detector de imágenes JPG corruptas.
+
+Se abre ejecutando detectar_jpg_corrupto.py sin argumentos.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QFileDialog, QMessageBox,
+    QVBoxLayout, QWidget, QPushButton, QLabel, QProgressBar,
+    QPlainTextEdit, QHBoxLayout, QCheckBox, QTableView, QSplitter, QHeaderView
+)
+from PySide6.QtCore import Qt, Signal, QObject, QAbstractTableModel, QModelIndex
+
+from detectar_jpg_corrupto import JPGCorruptionDetector, DEPTH_FAST, DEPTH_DEEP
+
+# Líneas que conserva el log de la interfaz
+MAX_LINEAS_LOG = 5000
+
+
+# ------------------ Puente Qt ------------------
+
+class DetectorSignals(QObject):
+    """Señales de Qt para las funciones del detector, que se llaman desde el hilo de análisis."""
+    # Lines, (current, total, status) or None, [(path, results)] of new corrupted files
+    events_signal = Signal(list, object, list)
+    finished_signal = Signal(list, list, int)
+
+
+# ------------------ Interfaz Gráfica ------------------
+
+class CorruptedFilesModel(QAbstractTableModel):
+    """Tabla de archivos corruptos: una fila por comprobación fallida."""
+
+    HEADERS = ["Archivo", "Comprobación", "Detalle"]
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.rows[index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def add_files(self, corrupted):
+        new_rows = []
+        for path, results in corrupted:
+            if not isinstance(results, dict):
+                new_rows.append((str(path), "-", str(results)))
+                continue
+            new_rows.extend((str(path), check_type, msg)
+                            for check_type, (ok, msg) in results.items() if not ok)
+        if new_rows:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            self.rows.extend(new_rows)
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows = []
+        self.endResetModel()
+
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.signals = DetectorSignals()
+        self.detector = JPGCorruptionDetector(on_events=self.signals.events_signal.emit,
+                                              on_finished=self.signals.finished_signal.emit)
+        self.scanning = False
+        self.path = ""
+
+        self.setWindowTitle("Detector de Imágenes JPG Corruptas - PySide6")
+        self.setGeometry(200, 200, 800, 600)
+
+        layout = QVBoxLayout()
+
+        # Botones selección
+        btn_layout = QHBoxLayout()
+        self.btn_folder = QPushButton("📁 Seleccionar Carpeta")
+        self.btn_file = QPushButton("📄 Seleccionar Archivo")
+        btn_layout.addWidget(self.btn_folder)
+        btn_layout.addWidget(self.btn_file)
+        layout.addLayout(btn_layout)
+
+        self.path_label = QLabel("Ruta seleccionada: Ninguna")
+        layout.addWidget(self.path_label)
+
+        # Opción recursiva
+        self.chk_recursive = QCheckBox("Búsqueda recursiva")
+        self.chk_recursive.setChecked(True)
+        layout.addWidget(self.chk_recursive)
+
+        # Opción de decodificación completa (más lenta que revisar solo la estructura)
+        self.chk_deep = QCheckBox("Decodificación completa")
+        layout.addWidget(self.chk_deep)
+
+        # Volver a analizar también los archivos sin cambios desde el último análisis
+        self.chk_force = QCheckBox("Forzar reanálisis (ignorar caché)")
+        layout.addWidget(self.chk_force)
+
+        # Botones acción
+        action_layout = QHBoxLayout()
+        self.btn_scan = QPushButton("🔍 Iniciar Análisis")
+        self.btn_stop = QPushButton("⏹ Detener")
+        self.btn_stop.setEnabled(False)
+        action_layout.addWidget(self.btn_scan)
+        action_layout.addWidget(self.btn_stop)
+        layout.addLayout(action_layout)
+
+        # Progreso
+        self.progress = QProgressBar()
+        self.progress_label = QLabel("Listo para analizar")
+        layout.addWidget(self.progress)
+        layout.addWidget(self.progress_label)
+
+        # Log (limitado) y tabla de archivos corruptos
+        self.log_text = QPlainTextEdit()
+        self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(MAX_LINEAS_LOG)
+        self.results_model = CorruptedFilesModel()
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.log_text)
+        splitter.addWidget(self.results_table)
+        layout.addWidget(splitter)
+
+        # Estadísticas
+        self.stats_label = QLabel("Total: 0 | Válidas: 0 | Corruptas: 0")
+        layout.addWidget(self.stats_label)
+
+        container = QWidget()
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+        # Conectar señales
+        self.btn_folder.clicked.connect(self.select_folder)
+        self.btn_file.clicked.connect(self.select_file)
+        self.btn_scan.clicked.connect(self.start_scan)
+        self.btn_stop.clicked.connect(self.stop_scan)
+
+        self.signals.events_signal.connect(self.handle_events)
+        self.signals.finished_signal.connect(self.scan_finished)
+
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta")
+        if folder:
+            self.path = folder
+            self.path_label.setText(f"Ruta seleccionada: {folder}")
+
+    def select_file(self):
+        file, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar archivo", "", "Imágenes JPG (*.jpg *.jpeg);;Todos (*.*)")
+        if file:
+            self.path = file
+            self.path_label.setText(f"Ruta seleccionada: {file}")
+
+    def log_message(self, msg):
+        timestamp = time.strftime("%H:%M:%S")
+        self.log_text.appendPlainText(f"[{timestamp}] {msg}")
+
+    def handle_events(self, lines, progress, corrupted):
+        if lines:
+            timestamp = time.strftime("%H:%M:%S")
+            self.log_text.appendPlainText("\n".join(f"[{timestamp}] {msg}" for msg in lines))
+        if progress:
+            self.update_progress(*progress)
+        self.results_model.add_files(corrupted)
+
+    def update_progress(self, current, total, status):
+        self.progress.setMaximum(total)
+        self.progress.setValue(current)
+        self.progress_label.setText(f"{current}/{total} - {status}")
+
+    def start_scan(self):
+        if not self.path:
+            QMessageBox.warning(self, "Advertencia", "Selecciona una carpeta o archivo primero")
+            return
+        if not os.path.exists(self.path):
+            QMessageBox.critical(self, "Error", "La ruta seleccionada no existe")
+            return
+
+        self.log_text.clear()
+        self.results_model.clear()
+        self.scanning = True
+        self.btn_scan.setEnabled(False)
+        self.btn_stop.setEnabled(True)
+
+        recursive = self.chk_recursive.isChecked()
+        self.detector.depth = DEPTH_DEEP if self.chk_deep.isChecked() else DEPTH_FAST
+        self.detector.force = self.chk_force.isChecked()
+
+        thread = threading.Thread(target=self.detector.scan, args=(self.path, recursive), daemon=True)
+        thread.start()
+
+    def stop_scan(self):
+        # Los botones se restablecen en scan_finished, cuando los procesos han parado
+        self.btn_stop.setEnabled(False)
+        self.log_message("⏹ Deteniendo escaneo...")
+        self.detector.stop()
+
+    def scan_finished(self, valid_files, corrupted_files, total):
+        self.scanning = False
+        self.btn_scan.setEnabled(True)
+        self.btn_stop.setEnabled(False)
+
+        resumen = (
+            f"\n📊 RESUMEN:\n"
+            f"Total analizados: {total}\n"
+            f"✅ Válidos: {len(valid_files)}\n"
+            f"❌ Corruptos: {len(corrupted_files)}"
+        )
+        self.log_message(resumen)
+        self.stats_label.setText(f"Total: {total} | Válidas: {len(valid_files)} | Corruptas: {len(corrupted_files)}")
+
+        if corrupted_files:
+            QMessageBox.information(self, "Análisis Completado",
+                                    f"Se encontraron {len(corrupted_files)} archivos corruptos.\nRevisa la tabla de resultados.")
+        else:
+            QMessageBox.information(self, "Análisis Completado", "¡Todas las imágenes están en buen estado!")
+
+
+# ------------------ MAIN ------------------
+
+def run_gui():
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(run_gui())
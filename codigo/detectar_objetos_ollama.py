@@ -1,4 +1,4 @@
-import ollama
+import argparse
 import base64
 import json
 import re
@@ -6,26 +6,22 @@ from pathlib import Path
 from typing import List, Optional
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
-import signal
-from contextlib import contextmanager
 
-TAMAÑO_MAXIMO_IMAGEN_KB = 512  # 1 MB
-
-@contextmanager
-def timeout_context(seconds):
-    """Context manager for timeout handling"""
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Tiempo de espera agotado después de {seconds} segundos")
+from cliente_ollama import obtener_cliente
 
-    # Set the timeout handler
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(seconds)
-
-    try:
-        yield
-    finally:
-        # Cancel the alarm
-        signal.alarm(0)
+TAMAÑO_MAXIMO_IMAGEN_KB = 512  # 1 MB
+TIMEOUT_DETECCION = 40  # Segundos máximos de respuesta por imagen
+TIMEOUT_ANALISIS_COMBINADO = 90  # Objetos + descripción en una sola petición
+
+# Esquema de salida estructurada para el modo combinado (objetos + descripción)
+ESQUEMA_ANALISIS = {
+    "type": "object",
+    "properties": {
+        "objetos": {"type": "array", "items": {"type": "string"}},
+        "descripcion": {"type": "string"}
+    },
+    "required": ["objetos", "descripcion"]
+}
 
 class ObjectDetector:
     def __init__(self, model_name: str = "gemma3:4b"):
@@ -36,17 +32,14 @@ class ObjectDetector:
             model_name: Nombre del modelo de Ollama a usar (por defecto: llava)
         """
         self.model_name = model_name
+        self.cliente = obtener_cliente()
         self._verify_model()
+        self.cliente.precalentar(self.model_name)
     
     def _verify_model(self):
         """Verifica que el modelo esté disponible en Ollama"""
         try:
-            models = ollama.list()
-            available_models = []
-            if 'models' in models:
-                for model in models['models']:
-                    if isinstance(model, dict) and 'name' in model:
-                        available_models.append(model['name'])
+            available_models = self.cliente.listar_modelos()
 
             if self.model_name not in available_models:
                 print(f"Advertencia: El modelo '{self.model_name}' no está instalado.")
@@ -136,22 +129,101 @@ class ObjectDetector:
         
         try:
             # Llamar a Ollama
-            response = ollama.generate(
-                model=self.model_name,
-                prompt=prompt,
-                images=[image_base64]
+            response_text = self.cliente.generar(
+                self.model_name,
+                prompt,
+                imagenes=[image_base64],
+                timeout=TIMEOUT_DETECCION
             )
 
-            response_text = response['response']
-
             # Extraer objetos de la respuesta
             objects = self._extract_objects_from_response(response_text)
 
             return objects
 
+        except TimeoutError:
+            raise
         except Exception as e:
             raise Exception(f"Error al procesar con Ollama: {e}")
     
+    def _parse_json_response(self, response_text: str) -> dict:
+        """
+        Interpreta la respuesta JSON del modelo
+
+        Args:
+            response_text: Texto de respuesta del modelo
+
+        Returns:
+            Diccionario con el contenido JSON de la respuesta
+        """
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            # Algunos modelos envuelven el JSON en texto o bloques markdown
+            match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if not match:
+                raise
+            return json.loads(match.group(0))
+
+    def detect_objects_and_describe(self, image_path: str, prompt_language: str = "es") -> dict:
+        """
+        Detecta objetos y describe la imagen en una única petición a Ollama
+
+        La imagen se envía una sola vez y el modelo devuelve un JSON con la lista
+        de objetos y la descripción, evitando pagar dos veces el procesado de la imagen.
+
+        Args:
+            image_path: Ruta a la imagen
+            prompt_language: Idioma del prompt ("es" para español, "en" para inglés)
+
+        Returns:
+            Diccionario con las claves "objetos" (lista) y "descripcion" (texto)
+        """
+        if not Path(image_path).exists():
+            raise FileNotFoundError(f"La imagen {image_path} no existe")
+
+        try:
+            image_base64 = self._encode_image(image_path)
+        except Exception as e:
+            raise Exception(f"Error al procesar la imagen: {e}")
+
+        if prompt_language == "es":
+            prompt = """Analiza esta imagen y responde ÚNICAMENTE con un objeto JSON con dos campos:
+            - "objetos": lista con los nombres en ESPAÑOL de todos los objetos que puedes identificar
+            - "descripcion": descripción detallada de la imagen en español. Limítate a describir la imagen, no hagas suposiciones.
+
+            Ejemplo: {"objetos": ["mesa", "silla", "taza"], "descripcion": "Una mesa de madera con..."}"""
+        else:
+            prompt = """Analyze this image and respond ONLY with a JSON object with two fields:
+            - "objetos": list with the names of all objects you can identify
+            - "descripcion": detailed description of the image. Just describe the image, do not make assumptions.
+
+            Example: {"objetos": ["table", "chair", "cup"], "descripcion": "A wooden table with..."}"""
+
+        try:
+            response_text = self.cliente.generar(
+                self.model_name,
+                prompt,
+                imagenes=[image_base64],
+                formato=ESQUEMA_ANALISIS,
+                timeout=TIMEOUT_ANALISIS_COMBINADO
+            )
+            data = self._parse_json_response(response_text)
+
+        except TimeoutError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error al procesar con Ollama: {e}")
+
+        objetos = data.get("objetos") or []
+        if isinstance(objetos, str):
+            objetos = [objetos]
+
+        return {
+            "objetos": self._extract_objects_from_response(", ".join(str(obj) for obj in objetos)),
+            "descripcion": str(data.get("descripcion", "")).strip()
+        }
+
     def detect_objects_detailed(self, image_path: str) -> dict:
         """
         Detecta objetos con información adicional
@@ -182,8 +254,17 @@ def connect_to_mongodb():
         print("Error al conectar a MongoDB. Asegúrate de que MongoDB esté ejecutándose.")
         return None
 
-def process_images_from_database():
-    """Procesa imágenes desde la base de datos MongoDB"""
+def process_images_from_database(combinado: bool = False):
+    """
+    Procesa imágenes desde la base de datos MongoDB
+
+    Args:
+        combinado: Si es True, obtiene objetos y descripción en una sola petición
+                   y actualiza 'objetos' y 'descripcion' en la misma escritura.
+                   Las imágenes que ya tienen descripción solo se analizan para
+                   obtener objetos; las que no se pudieron describir quedan con
+                   descrito=False y 'descripcion_error', y no se vuelven a intentar
+    """
 
     # Conectar a MongoDB
     client = connect_to_mongodb()
@@ -205,6 +286,10 @@ def process_images_from_database():
                 {"objeto_procesado": False}
             ]
         }
+        if combinado:
+            # En modo combinado también las que aún no tienen descripción,
+            # salvo las que ya fallaron (descripcion_error)
+            query["$or"].append({"descrito": {"$ne": True}, "descripcion_error": {"$exists": False}})
 
         images_to_process = collection.find(query)
 
@@ -226,16 +311,41 @@ def process_images_from_database():
 
             print(f"Procesando imagen: {image_path}")
 
+            # Describir solo si aún no tiene descripción: no se sobrescriben las existentes
+            describir = combinado and image_doc.get('descrito') is not True
+
+            def marcar_fallida(error):
+                """Estado final de una imagen que no se pudo procesar"""
+                fallo = {"objeto_procesado": True}
+                if describir:
+                    fallo.update({"descrito": False, "descripcion_error": error})
+                collection.update_one({"_id": image_doc["_id"]}, {"$set": fallo})
+
             try:
-                # Detectar objetos con timeout de 40 segundos
-                with timeout_context(40):
+                if describir:
+                    # Objetos y descripción con una sola subida de la imagen
+                    analisis = detector.detect_objects_and_describe(image_path)
+                    objects = analisis["objetos"]
+                    update_data = {
+                        "objetos": objects,
+                        "objeto_procesado": True
+                    }
+                    if analisis["descripcion"]:
+                        update_data["descripcion"] = analisis["descripcion"]
+                        update_data["descrito"] = True
+                    else:
+                        update_data["descrito"] = False
+                        update_data["descripcion_error"] = "El modelo devolvió una descripción vacía"
+                else:
+                    # Detectar objetos (como máximo TIMEOUT_DETECCION segundos de respuesta)
                     objects = detector.detect_objects(image_path)
 
+                    update_data = {
+                        "objetos": objects,
+                        "objeto_procesado": True
+                    }
+
                 # Actualizar documento en MongoDB
-                update_data = {
-                    "objetos": objects,
-                    "objeto_procesado": True
-                }
 
                 collection.update_one(
                     {"_id": image_doc["_id"]},
@@ -248,26 +358,19 @@ def process_images_from_database():
             except FileNotFoundError:
                 print(f"Imagen no encontrada: {image_path}")
                 # Marcar como procesada aunque no se encontró la imagen
-                collection.update_one(
-                    {"_id": image_doc["_id"]},
-                    {"$set": {"objeto_procesado": True}}
-                )
+                marcar_fallida("Imagen no encontrada")
             except TimeoutError as e:
                 print(f"Timeout procesando {image_path}: {e}")
                 # Marcar como procesada aunque excedió el tiempo límite
-                collection.update_one(
-                    {"_id": image_doc["_id"]},
-                    {"$set": {"objeto_procesado": True}}
-                )
+                marcar_fallida(f"Timeout: {e}")
             except Exception as e:
                 print(f"Error procesando {image_path}: {e}")
                 # Marcar como procesada aunque hubo error
-                collection.update_one(
-                    {"_id": image_doc["_id"]},
-                    {"$set": {"objeto_procesado": True}}
-                )
+                marcar_fallida(str(e))
 
         print(f"\nProcesamiento completado. Imágenes procesadas: {processed_count}")
+        if detector.cliente.cache is not None:
+            print(detector.cliente.cache.resumen())
 
     except Exception as e:
         print(f"Error durante el procesamiento: {e}")
@@ -276,8 +379,12 @@ def process_images_from_database():
 
 def main():
     """Función principal para procesar imágenes desde MongoDB"""
+    parser = argparse.ArgumentParser(description="Detecta objetos en las imágenes de MongoDB usando Ollama")
+    parser.add_argument('--combinado', action='store_true',
+                        help="Obtener objetos y descripción en una sola petición al modelo de visión")
+    args = parser.parse_args()
 
-    process_images_from_database()
+    process_images_from_database(combinado=args.combinado)
 
 if __name__ == "__main__":
     main()
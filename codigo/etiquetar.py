@@ -1,9 +1,707 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QListWidget, QComboBox, QMessageBox, QHBoxLayout, QLineEdit
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
-from pymongo import MongoClient
+import bisect
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QListWidget, QComboBox, QMessageBox, QHBoxLayout, QLineEdit, QCompleter, QListView, QAbstractItemView, QCheckBox, QDateEdit, QGroupBox
+from PyQt5.QtGui import QPixmap, QImage, QImageReader
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, QSize, QStringListModel, QTimer, QAbstractListModel, QModelIndex, QDate, pyqtSignal
+from pymongo import MongoClient, UpdateOne, ASCENDING, DESCENDING
+
+# Only the fields needed to show and tag an image
+PROYECCION_VISOR = {'_id': 1, 'ruta': 1, 'nombre': 1, 'personas': 1}
+
+# Width of the image shown in the viewer
+ANCHO_VISOR = 515
+# Width of the thumbnails in the grid view
+ANCHO_MINIATURA = 160
+# On-disk thumbnail cache, shared between runs
+CACHE_MINIATURAS = os.path.join(os.path.expanduser("~"), ".cache", "etiquetar", "miniaturas")
+# Milliseconds pending tag edits wait before being written
+INTERVALO_ESCRITURA = 2000
+# Date fields, stored as zero-padded strings
+CAMPOS_FECHA = ('fecha_creacion_anio', 'fecha_creacion_mes', 'fecha_creacion_dia')
+
+def hash_archivo(ruta):
+    """Calcular el hash del contenido de un archivo."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(ruta, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    return h.hexdigest()
+
+class IndiceHashes:
+    """
+    Hash de contenido de cada archivo, recordado por (ruta, tamaño, mtime) en SQLite.
+
+    Evita leer el original completo en cada petición de miniatura: solo se vuelve a
+    calcular el hash si el archivo es nuevo o ha cambiado. Se usa desde los hilos de
+    trabajo, así que la conexión está protegida por un lock.
+    """
+    def __init__(self, ruta_bd):
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta_bd, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                ruta TEXT PRIMARY KEY,
+                tamaño INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            )""")
+        self.conexion.commit()
+
+    def hash(self, ruta):
+        """Devolver el hash del archivo, calculándolo solo si no está registrado o ha cambiado."""
+        info = os.stat(ruta)
+        with self.lock:
+            fila = self.conexion.execute(
+                "SELECT hash FROM hashes WHERE ruta = ? AND tamaño = ? AND mtime = ?",
+                (ruta, info.st_size, info.st_mtime_ns)).fetchone()
+        if fila:
+            return fila[0]
+        valor = hash_archivo(ruta)
+        with self.lock:
+            self.conexion.execute("INSERT OR REPLACE INTO hashes (ruta, tamaño, mtime, hash) VALUES (?, ?, ?, ?)",
+                                  (ruta, info.st_size, info.st_mtime_ns, valor))
+            self.conexion.commit()
+        return valor
+
+def cargar_miniatura(directorio, ruta, ancho, indice=None):
+    """
+    Devolver la imagen reducida a 'ancho' píxeles, desde la caché en disco o decodificándola.
+
+    Se ejecuta en un hilo de trabajo: solo usa QImage, que (a diferencia de QPixmap)
+    puede crearse fuera del hilo de la interfaz. La decodificación pide directamente
+    el tamaño reducido, lo que permite al lector JPEG decodificar a escala. Con un
+    IndiceHashes, un acierto de caché no necesita leer el original.
+    """
+    try:
+        valor_hash = indice.hash(ruta) if indice is not None else hash_archivo(ruta)
+        archivo_cache = os.path.join(directorio, f"{valor_hash}_{ancho}.jpg")
+    except OSError:
+        return QImage()
+
+    if os.path.exists(archivo_cache):
+        imagen = QImage(archivo_cache)
+        if not imagen.isNull():
+            return imagen
+
+    reader = QImageReader(ruta)
+    reader.setAutoTransform(True)
+    tamaño = reader.size()
+    if tamaño.isValid() and tamaño.width() > ancho:
+        reader.setScaledSize(QSize(ancho, max(1, round(tamaño.height() * ancho / tamaño.width()))))
+    imagen = reader.read()
+    if imagen.isNull():
+        return imagen
+    if imagen.width() > ancho:
+        imagen = imagen.scaledToWidth(ancho, Qt.SmoothTransformation)
+
+    temporal = f"{archivo_cache}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if imagen.save(temporal, "JPEG", 85):
+        os.replace(temporal, archivo_cache)
+    return imagen
+
+class TareaMiniatura(QRunnable):
+    """Tarea del pool de hilos que prepara una miniatura."""
+    def __init__(self, cache, ruta, ancho):
+        super().__init__()
+        self.cache = cache
+        self.ruta = ruta
+        self.ancho = ancho
+
+    def run(self):
+        imagen = cargar_miniatura(self.cache.directorio, self.ruta, self.ancho, self.cache.hashes)
+        self.cache.decodificada.emit(self.ruta, self.ancho, imagen)
+
+class CacheMiniaturas(QObject):
+    """
+    Miniaturas de las imágenes: caché en disco por hash de contenido y ancho, decodificación
+    en segundo plano y una pequeña caché LRU en memoria de QPixmap listos para mostrar.
+    Los hashes se recuerdan en un IndiceHashes dentro de la misma carpeta.
+    """
+    decodificada = pyqtSignal(str, int, QImage)  # Emitted from the worker threads
+    lista = pyqtSignal(str, int)  # Emitted in the GUI thread when the pixmap is ready
+
+    def __init__(self, directorio=CACHE_MINIATURAS, max_memoria=32, hilos=2):
+        """
+        Inicializar la caché.
+
+        Args:
+            directorio (str): Carpeta de la caché en disco
+            max_memoria (int): Número de QPixmap conservados en memoria
+            hilos (int): Hilos de decodificación
+        """
+        super().__init__()
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self.hashes = IndiceHashes(os.path.join(directorio, "hashes.sqlite"))
+        self.max_memoria = max_memoria
+        self.memoria = OrderedDict()
+        self.pendientes = set()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(hilos)
+        self.decodificada.connect(self._al_decodificar)
+
+    def obtener(self, ruta, ancho):
+        """Devolver el QPixmap si ya está en memoria (puede ser nulo si la imagen no se pudo leer), o None."""
+        clave = (ruta, ancho)
+        if clave not in self.memoria:
+            return None
+        self.memoria.move_to_end(clave)
+        return self.memoria[clave]
+
+    def solicitar(self, ruta, ancho, prioridad=0):
+        """Encargar la miniatura a un hilo de trabajo si no está en memoria ni en curso."""
+        clave = (ruta, ancho)
+        if clave in self.memoria or clave in self.pendientes:
+            return
+        self.pendientes.add(clave)
+        self.pool.start(TareaMiniatura(self, ruta, ancho), prioridad)
+
+    def _al_decodificar(self, ruta, ancho, imagen):
+        """Convertir la imagen en QPixmap (en el hilo de la interfaz) y guardarla en memoria."""
+        clave = (ruta, ancho)
+        self.pendientes.discard(clave)
+        self.memoria[clave] = QPixmap.fromImage(imagen) if not imagen.isNull() else QPixmap()
+        self.memoria.move_to_end(clave)
+        while len(self.memoria) > self.max_memoria:
+            self.memoria.popitem(last=False)
+        self.lista.emit(ruta, ancho)
+
+def hay_fechas(collection):
+    """
+    Comprobar si alguna imagen de la colección tiene fecha de creación.
+
+    Los campos de fecha los escribe 1-alimentar_mongodb_openstreet.py en album_2.imagenes;
+    los documentos de album.imagenes_2 normalmente no los tienen, y entonces cualquier
+    filtro por fechas devolvería cero imágenes.
+    """
+    return collection.find_one({CAMPOS_FECHA[0]: {'$exists': True}}, {'_id': 1}) is not None
+
+def crear_indices(collection, fechas=True):
+    """
+    Crear los índices que usan los filtros del visor.
+
+    Los de personas y objetos son multiclave y terminan en _id, de modo que una página
+    filtrada ordenada por _id se lee directamente del índice, sin ordenar en memoria.
+    El índice de fechas solo se crea si la colección tiene esos campos (ver hay_fechas).
+    """
+    collection.create_index([('personas', ASCENDING), ('_id', ASCENDING)])
+    collection.create_index([('objetos', ASCENDING), ('_id', ASCENDING)])
+    if fechas:
+        collection.create_index([(campo, ASCENDING) for campo in CAMPOS_FECHA])
+
+def _fecha_desde(fecha, operador):
+    """Condición 'fecha >= (o <=) fecha' sobre los tres campos de fecha, usable con el índice compuesto."""
+    anio, mes, dia = CAMPOS_FECHA
+    estricto = '$gt' if operador == '$gte' else '$lt'
+    return {'$or': [
+        {anio: {estricto: fecha[0]}},
+        {anio: fecha[0], mes: {estricto: fecha[1]}},
+        {anio: fecha[0], mes: fecha[1], dia: {operador: fecha[2]}},
+    ]}
+
+def construir_filtro(persona=None, sin_personas=False, desde=None, hasta=None, objeto=None):
+    """
+    Construir la consulta de MongoDB para recorrer un subconjunto de imágenes.
+
+    Args:
+        persona (str): Solo imágenes en las que aparece esta persona
+        sin_personas (bool): Solo imágenes sin ninguna persona etiquetada
+        desde (tuple): Fecha mínima ('AAAA', 'MM', 'DD')
+        hasta (tuple): Fecha máxima ('AAAA', 'MM', 'DD')
+        objeto (str): Solo imágenes en las que se detectó este objeto
+
+    Returns:
+        dict: Consulta (vacía si no hay ningún criterio)
+    """
+    condiciones = []
+    if persona:
+        condiciones.append({'personas': persona})
+    if sin_personas:
+        # Matches missing, null and empty arrays, and can use the personas index
+        condiciones.append({'personas': {'$in': [None, []]}})
+    if desde:
+        condiciones.append(_fecha_desde(desde, '$gte'))
+    if hasta:
+        condiciones.append(_fecha_desde(hasta, '$lte'))
+    if objeto:
+        condiciones.append({'objetos': objeto})
+    if not condiciones:
+        return {}
+    if len(condiciones) == 1:
+        return condiciones[0]
+    return {'$and': condiciones}
+
+class DocumentosPaginados:
+    """
+    Ventana de documentos de MongoDB recorrida por páginas ordenadas por _id.
+
+    En lugar de cargar toda la colección, mantiene en memoria solo unas pocas páginas
+    alrededor de la imagen actual. Las páginas se piden por rango de _id ($gt / $lt
+    sobre el último o primer documento cargado), que usa el índice de _id y no se
+    degrada como skip() en colecciones grandes.
+    """
+
+    def __init__(self, collection, filtro=None, tamaño_pagina=200, max_paginas=3):
+        """
+        Inicializar la ventana y cargar la primera página.
+
+        Args:
+            collection: Colección de MongoDB con las imágenes
+            filtro (dict): Consulta que deben cumplir los documentos
+            tamaño_pagina (int): Documentos pedidos en cada consulta
+            max_paginas (int): Páginas que se conservan en memoria como máximo
+        """
+        self.collection = collection
+        self.filtro = filtro or {}
+        self.tamaño_pagina = tamaño_pagina
+        self.max_documentos = tamaño_pagina * max_paginas
+        self.docs = []
+        self.indice = 0
+        self.posicion = 0  # Absolute position of the current image within the filter
+        self._total = None
+        self.docs = self._pagina(None, ASCENDING)
+
+    def _pagina(self, desde_id, orden):
+        """Pedir una página de documentos posteriores (o anteriores) a desde_id."""
+        consulta = self.filtro
+        if desde_id is not None:
+            rango = {'_id': {'$gt' if orden == ASCENDING else '$lt': desde_id}}
+            consulta = {'$and': [self.filtro, rango]} if self.filtro else rango
+        cursor = (self.collection.find(consulta, PROYECCION_VISOR)
+                  .sort('_id', orden)
+                  .limit(self.tamaño_pagina))
+        docs = list(cursor)
+        if orden == DESCENDING:
+            docs.reverse()
+        return docs
+
+    def vacio(self):
+        """Indica si no hay ningún documento."""
+        return not self.docs
+
+    def actual(self):
+        """Devolver el documento de la imagen actual."""
+        return self.docs[self.indice]
+
+    def vecinos(self):
+        """Devolver los documentos anterior y siguiente que ya están en la ventana."""
+        return [self.docs[i] for i in (self.indice + 1, self.indice - 1) if 0 <= i < len(self.docs)]
+
+    def total(self):
+        """Número de documentos que cumplen el filtro (se calcula una sola vez)."""
+        if self._total is None:
+            if not self.filtro:
+                self._total = self.collection.estimated_document_count()
+            else:
+                self._total = self.collection.count_documents(self.filtro)
+        return self._total
+
+    def siguiente(self):
+        """Avanzar a la siguiente imagen, pidiendo otra página si hace falta. Devuelve False al final."""
+        if self.indice + 1 >= len(self.docs):
+            nuevos = self._pagina(self.docs[-1]['_id'], ASCENDING) if self.docs else []
+            if not nuevos:
+                return False
+            self.docs.extend(nuevos)
+            sobrantes = len(self.docs) - self.max_documentos
+            if sobrantes > 0:
+                del self.docs[:sobrantes]
+                self.indice -= sobrantes
+        self.indice += 1
+        self.posicion += 1
+        return True
+
+    def anterior(self):
+        """Retroceder a la imagen anterior, pidiendo otra página si hace falta. Devuelve False al inicio."""
+        if self.indice == 0:
+            nuevos = self._pagina(self.docs[0]['_id'], DESCENDING) if self.docs else []
+            if not nuevos:
+                return False
+            self.docs[:0] = nuevos
+            self.indice += len(nuevos)
+            sobrantes = len(self.docs) - self.max_documentos
+            if sobrantes > 0:
+                del self.docs[-sobrantes:]
+        self.indice -= 1
+        self.posicion -= 1
+        return True
+
+    def eliminar_actual(self):
+        """Quitar la imagen actual de la ventana. Devuelve False si no quedan imágenes."""
+        del self.docs[self.indice]
+        if self._total:
+            self._total -= 1
+        if self.indice < len(self.docs):
+            return True
+        # It was the last one in the window: try to load the next page
+        if self.docs:
+            nuevos = self._pagina(self.docs[-1]['_id'], ASCENDING)
+            if nuevos:
+                self.docs.extend(nuevos)
+                return True
+            self.indice = len(self.docs) - 1
+            self.posicion -= 1
+            return True
+        # The window is empty: reload from the beginning
+        self.docs = self._pagina(None, ASCENDING)
+        self.indice = 0
+        self.posicion = 0
+        return bool(self.docs)
+
+class ResumenPersonas:
+    """
+    Colección 'personas' con una entrada por persona y el número de imágenes en que aparece.
+
+    Se mantiene de forma incremental al etiquetar, de modo que al arrancar basta con leer
+    esta colección pequeña en lugar de recorrer todas las imágenes. Si está vacía se
+    reconstruye una vez a partir de las imágenes.
+    """
+
+    def __init__(self, db, collection):
+        """
+        Preparar el resumen.
+
+        Args:
+            db: Base de datos de MongoDB
+            collection: Colección de imágenes con el campo 'personas'
+        """
+        self.collection = collection
+        self.coleccion = db['personas']
+        if self.coleccion.estimated_document_count() == 0:
+            self.reconstruir()
+
+    def reconstruir(self):
+        """Recalcular el resumen desde la colección de imágenes."""
+        self.collection.aggregate([
+            {'$match': {'personas': {'$type': 'string'}}},
+            {'$unwind': '$personas'},
+            {'$group': {'_id': '$personas', 'usos': {'$sum': 1}}},
+            {'$out': self.coleccion.name}
+        ])
+
+    def nombres(self):
+        """Devolver los nombres de las personas en uso, ordenados."""
+        cursor = self.coleccion.find({'usos': {'$gt': 0}}, {'_id': 1}).sort('_id', ASCENDING)
+        return [doc['_id'] for doc in cursor if isinstance(doc['_id'], str)]
+
+    def aplicar(self, cambios):
+        """Sumar (o restar) usos a varias personas en una sola escritura."""
+        operaciones = [UpdateOne({'_id': persona}, {'$inc': {'usos': cantidad}}, upsert=True)
+                       for persona, cantidad in cambios.items() if cantidad]
+        if operaciones:
+            self.coleccion.bulk_write(operaciones, ordered=False)
+
+class ColaEscrituras(QObject):
+    """
+    Escrituras diferidas de etiquetas.
+
+    Las altas y bajas de personas se acumulan por imagen y se escriben juntas
+    ($pull / $addToSet en un bulk_write, más los contadores del resumen) en un hilo
+    aparte, de modo que etiquetar seguido nunca espera a la base de datos. Se vacía
+    con un temporizador, al navegar y al cerrar la ventana.
+    """
+    error = pyqtSignal(str)  # Emitted from the writer thread if a batch fails
+
+    def __init__(self, collection, resumen, intervalo=INTERVALO_ESCRITURA):
+        """
+        Inicializar la cola.
+
+        Args:
+            collection: Colección de imágenes
+            resumen (ResumenPersonas): Resumen cuyos contadores se actualizan con cada lote
+            intervalo (int): Milisegundos que esperan los cambios antes de escribirse
+        """
+        super().__init__()
+        self.collection = collection
+        self.resumen = resumen
+        self.añadir = defaultdict(set)
+        self.quitar = defaultdict(set)
+        self.usos = defaultdict(int)
+        # A single writer keeps batches in order
+        self.escritor = ThreadPoolExecutor(max_workers=1)
+        self.ultimo_lote = None
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(intervalo)
+        self.temporizador.timeout.connect(self.vaciar)
+
+    def añadir_persona(self, id_imagen, persona):
+        """Anotar que la persona se ha añadido a la imagen."""
+        if persona in self.quitar[id_imagen]:
+            self.quitar[id_imagen].discard(persona)
+        else:
+            self.añadir[id_imagen].add(persona)
+        self.ajustar_usos(persona, 1)
+
+    def quitar_persona(self, id_imagen, persona):
+        """Anotar que la persona se ha quitado de la imagen."""
+        if persona in self.añadir[id_imagen]:
+            self.añadir[id_imagen].discard(persona)
+        else:
+            self.quitar[id_imagen].add(persona)
+        self.ajustar_usos(persona, -1)
+
+    def ajustar_usos(self, persona, cantidad):
+        """Anotar un cambio en el número de usos de una persona."""
+        self.usos[persona] += cantidad
+        if not self.temporizador.isActive():
+            self.temporizador.start()
+
+    def hay_pendientes(self):
+        """Indicar si quedan cambios sin enviar."""
+        return any(self.añadir.values()) or any(self.quitar.values()) or any(self.usos.values())
+
+    def vaciar(self, esperar=False):
+        """
+        Enviar los cambios acumulados al hilo de escritura.
+
+        Args:
+            esperar (bool): Bloquear hasta que se hayan escrito (al cerrar)
+        """
+        self.temporizador.stop()
+        if self.hay_pendientes():
+            operaciones = []
+            # Mongo can't $pull and $addToSet the same field in one update
+            for id_imagen, personas in self.quitar.items():
+                if personas:
+                    operaciones.append(UpdateOne({'_id': id_imagen}, {'$pull': {'personas': {'$in': sorted(personas)}}}))
+            for id_imagen, personas in self.añadir.items():
+                if personas:
+                    operaciones.append(UpdateOne({'_id': id_imagen}, {'$addToSet': {'personas': {'$each': sorted(personas)}}}))
+            usos = dict(self.usos)
+            self.añadir.clear()
+            self.quitar.clear()
+            self.usos.clear()
+            self.ultimo_lote = self.escritor.submit(self._escribir, operaciones, usos)
+        if esperar and self.ultimo_lote is not None:
+            self.ultimo_lote.result()
+
+    def _escribir(self, operaciones, usos):
+        """Escribir un lote (en el hilo de escritura)."""
+        try:
+            if operaciones:
+                self.collection.bulk_write(operaciones, ordered=True)
+            self.resumen.aplicar(usos)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def cerrar(self):
+        """Escribir lo pendiente y detener el hilo de escritura."""
+        self.vaciar(esperar=True)
+        self.escritor.shutdown(wait=True)
+
+class ModeloMiniaturas(QAbstractListModel):
+    """
+    Modelo de lista de imágenes para la vista en cuadrícula.
+
+    Los documentos se piden por páginas de _id a medida que la vista se desplaza
+    (canFetchMore / fetchMore) y las miniaturas solo se encargan cuando la vista pide
+    la decoración de una fila, es decir, para las celdas visibles.
+    """
+
+    def __init__(self, collection, miniaturas, filtro=None, tamaño_pagina=500):
+        """
+        Inicializar el modelo y cargar la primera página.
+
+        Args:
+            collection: Colección de MongoDB con las imágenes
+            miniaturas (CacheMiniaturas): Caché de miniaturas
+            filtro (dict): Consulta que deben cumplir los documentos
+            tamaño_pagina (int): Documentos pedidos en cada consulta
+        """
+        super().__init__()
+        self.collection = collection
+        self.miniaturas = miniaturas
+        self.filtro = filtro or {}
+        self.tamaño_pagina = tamaño_pagina
+        self.docs = []
+        self.filas = {}  # ruta -> row
+        self.completo = False
+        # Later requests get higher priority, so visible cells decode first while scrolling
+        self.prioridad = 0
+        self.miniaturas.lista.connect(self._al_cargar_miniatura)
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.docs)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.completo
+
+    def fetchMore(self, parent):
+        consulta = self.filtro
+        if self.docs:
+            rango = {'_id': {'$gt': self.docs[-1]['_id']}}
+            consulta = {'$and': [self.filtro, rango]} if self.filtro else rango
+        nuevos = list(self.collection.find(consulta, PROYECCION_VISOR)
+                      .sort('_id', ASCENDING)
+                      .limit(self.tamaño_pagina))
+        if len(nuevos) < self.tamaño_pagina:
+            self.completo = True
+        if not nuevos:
+            return
+        inicio = len(self.docs)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevos) - 1)
+        self.docs.extend(nuevos)
+        for fila, doc in enumerate(nuevos, inicio):
+            self.filas[doc['ruta']] = fila
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        doc = self.docs[index.row()]
+        if role == Qt.DisplayRole:
+            return doc['nombre']
+        if role == Qt.ToolTipRole:
+            return ", ".join(doc.get('personas') or []) or "Sin personas"
+        if role == Qt.DecorationRole:
+            pixmap = self.miniaturas.obtener(doc['ruta'], ANCHO_MINIATURA)
+            if pixmap is None:
+                self.prioridad += 1
+                self.miniaturas.solicitar(doc['ruta'], ANCHO_MINIATURA, prioridad=self.prioridad)
+            return pixmap
+        return None
+
+    def documento(self, fila):
+        """Devolver el documento de una fila."""
+        return self.docs[fila]
+
+    def actualizar_filas(self, filas):
+        """Avisar a la vista de que han cambiado las etiquetas de unas filas."""
+        for fila in filas:
+            indice = self.index(fila)
+            self.dataChanged.emit(indice, indice, [Qt.ToolTipRole])
+
+    def actualizar_etiquetas(self, cambiadas):
+        """Copiar las personas editadas desde el visor ({_id: personas}) a los documentos cargados."""
+        filas = []
+        for fila, doc in enumerate(self.docs):
+            if doc['_id'] in cambiadas:
+                doc['personas'] = list(cambiadas[doc['_id']])
+                filas.append(fila)
+        self.actualizar_filas(filas)
+
+    def eliminar_documento(self, id_imagen):
+        """Quitar de la cuadrícula una imagen eliminada desde el visor."""
+        for fila, doc in enumerate(self.docs):
+            if doc['_id'] == id_imagen:
+                self.beginRemoveRows(QModelIndex(), fila, fila)
+                del self.docs[fila]
+                self.filas = {d['ruta']: f for f, d in enumerate(self.docs)}
+                self.endRemoveRows()
+                return
+
+    def _al_cargar_miniatura(self, ruta, ancho):
+        fila = self.filas.get(ruta)
+        if ancho == ANCHO_MINIATURA and fila is not None:
+            indice = self.index(fila)
+            self.dataChanged.emit(indice, indice, [Qt.DecorationRole])
+
+class VentanaCuadricula(QWidget):
+    """Vista en cuadrícula para etiquetar muchas imágenes a la vez."""
+    etiquetas_cambiadas = pyqtSignal(dict)  # {_id: personas} of the edited images
+
+    def __init__(self, collection, escrituras, personas_model, filtro=None, parent=None):
+        """
+        Inicializar la ventana.
+
+        Args:
+            collection: Colección de MongoDB con las imágenes
+            escrituras (ColaEscrituras): Cola de escrituras de etiquetas
+            personas_model (QStringListModel): Nombres de personas conocidos
+            filtro (dict): Consulta que deben cumplir los documentos
+            parent: Widget padre
+        """
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Cuadrícula de imágenes")
+        self.resize(1100, 800)
+        self.escrituras = escrituras
+        # The grid keeps more, smaller pixmaps in memory than the single-image viewer
+        self.miniaturas = CacheMiniaturas(max_memoria=600, hilos=max(2, QThread.idealThreadCount()))
+        self.collection = collection
+        self.modelo = ModeloMiniaturas(collection, self.miniaturas, filtro)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.vista = QListView()
+        self.vista.setViewMode(QListView.IconMode)
+        self.vista.setResizeMode(QListView.Adjust)
+        self.vista.setMovement(QListView.Static)
+        self.vista.setIconSize(QSize(ANCHO_MINIATURA, ANCHO_MINIATURA))
+        self.vista.setGridSize(QSize(ANCHO_MINIATURA + 20, ANCHO_MINIATURA + 30))
+        # Every cell has the same size: the view doesn't need to measure each row
+        self.vista.setUniformItemSizes(True)
+        self.vista.setLayoutMode(QListView.Batched)
+        self.vista.setBatchSize(500)
+        self.vista.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.vista.setModel(self.modelo)
+        layout.addWidget(self.vista)
+
+        acciones = QHBoxLayout()
+        acciones.addWidget(QLabel("Persona:"))
+        self.persona_combo = QComboBox()
+        self.persona_combo.setEditable(True)
+        self.persona_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.persona_combo.setModel(personas_model)
+        completer = QCompleter(personas_model, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        self.persona_combo.setCompleter(completer)
+        acciones.addWidget(self.persona_combo)
+
+        self.add_btn = QPushButton("Añadir a la selección")
+        self.add_btn.clicked.connect(lambda: self.apply_persona(True))
+        acciones.addWidget(self.add_btn)
+        self.remove_btn = QPushButton("Quitar de la selección")
+        self.remove_btn.clicked.connect(lambda: self.apply_persona(False))
+        acciones.addWidget(self.remove_btn)
+        layout.addLayout(acciones)
+
+    def set_filter(self, filtro):
+        """Mostrar solo las imágenes que cumplen el filtro."""
+        anterior = self.modelo
+        self.miniaturas.lista.disconnect(anterior._al_cargar_miniatura)
+        self.modelo = ModeloMiniaturas(self.collection, self.miniaturas, filtro)
+        self.vista.setModel(self.modelo)
+        anterior.deleteLater()
+
+    def apply_persona(self, añadir):
+        """Añadir (o quitar) la persona del desplegable a todas las imágenes seleccionadas."""
+        persona = self.persona_combo.currentText().strip()
+        filas = sorted(indice.row() for indice in self.vista.selectionModel().selectedIndexes())
+        if not persona or not filas:
+            QMessageBox.warning(self, "Advertencia", "Selecciona imágenes y una persona.")
+            return
+        cambiadas = {}
+        for fila in filas:
+            doc = self.modelo.documento(fila)
+            personas = doc.setdefault('personas', [])
+            if añadir and persona not in personas:
+                personas.append(persona)
+                self.escrituras.añadir_persona(doc['_id'], persona)
+            elif not añadir and persona in personas:
+                personas.remove(persona)
+                self.escrituras.quitar_persona(doc['_id'], persona)
+            else:
+                continue
+            cambiadas[doc['_id']] = personas
+        if cambiadas:
+            # Whole selection in a single bulk write
+            self.escrituras.vaciar()
+            self.modelo.actualizar_filas(filas)
+            self.etiquetas_cambiadas.emit(cambiadas)
+        accion = "añadida a" if añadir else "quitada de"
+        QMessageBox.information(self, "Éxito", f"{persona} {accion} {len(cambiadas)} imágenes.")
 
 class ImageViewer(QMainWindow):
     """Ventana de aplicación para visualizar y etiquetar imágenes con personas desde una base de datos MongoDB."""
@@ -17,21 +715,27 @@ class ImageViewer(QMainWindow):
         self.client = MongoClient('localhost', 27017)
         self.db = self.client['album']
         self.collection = self.db['imagenes_2']
+        # Date filter only when the documents actually store the date fields
+        self.con_fechas = hay_fechas(self.collection)
+        crear_indices(self.collection, fechas=self.con_fechas)
+
+        # Thumbnails decoded in background threads
+        self.miniaturas = CacheMiniaturas()
+        self.miniaturas.lista.connect(self.on_thumbnail_ready)
 
-        # Fetch all images
-        self.images = list(self.collection.find())
-        if not self.images:
+        # Fetch images page by page instead of the whole collection
+        self.documentos = DocumentosPaginados(self.collection)
+        if self.documentos.vacio():
             QMessageBox.critical(self, "Error", "No se han encontrado imagenes.")
             sys.exit()
-        self.current_index = 0
 
-        # Get all unique personas
-        all_personas = set()
-        for img in self.images:
-            if 'personas' in img and img['personas']:
-                if isinstance(img['personas'], list):
-                    all_personas.update(img['personas'])
-        self.all_personas = sorted(list(all_personas))
+        # Known personas, from the maintained summary collection
+        self.resumen_personas = ResumenPersonas(self.db, self.collection)
+        self.personas_model = QStringListModel(self.resumen_personas.nombres())
+
+        # Tag edits are written in the background, in batches
+        self.escrituras = ColaEscrituras(self.collection, self.resumen_personas)
+        self.escrituras.error.connect(self.on_write_error)
 
         # Layouts
         main_widget = QWidget()
@@ -64,6 +768,11 @@ class ImageViewer(QMainWindow):
         nav_layout.addWidget(self.delete_img_btn)
         right_layout.addLayout(nav_layout)
 
+        self.grid_btn = QPushButton("Cuadrícula")
+        self.grid_btn.clicked.connect(self.show_grid)
+        right_layout.addWidget(self.grid_btn)
+        self.cuadricula = None
+
         # Personas list
         right_layout.addWidget(QLabel("Personas etiquetadas:"))
         self.personas_layout = QVBoxLayout()
@@ -79,7 +788,12 @@ class ImageViewer(QMainWindow):
         add_layout.addWidget(QLabel("Seleccionar existente:"))
         self.persona_combo = QComboBox()
         self.persona_combo.setEditable(True)
-        self.persona_combo.addItems(self.all_personas)
+        self.persona_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.persona_combo.setModel(self.personas_model)
+        completer = QCompleter(self.personas_model, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchContains)
+        self.persona_combo.setCompleter(completer)
         add_layout.addWidget(self.persona_combo)
         right_layout.addLayout(add_layout)
 
@@ -98,6 +812,61 @@ class ImageViewer(QMainWindow):
         self.add_manual_btn.clicked.connect(self.add_manual_persona)
         right_layout.addWidget(self.add_manual_btn)
 
+        # Filters
+        filtros = QGroupBox("Filtrar")
+        filtros_layout = QVBoxLayout()
+        filtros.setLayout(filtros_layout)
+
+        persona_layout = QHBoxLayout()
+        persona_layout.addWidget(QLabel("Persona:"))
+        self.filter_persona = QComboBox()
+        self.filter_persona.setEditable(True)
+        self.filter_persona.setInsertPolicy(QComboBox.NoInsert)
+        self.filter_persona.setModel(self.personas_model)
+        filter_completer = QCompleter(self.personas_model, self)
+        filter_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        filter_completer.setFilterMode(Qt.MatchContains)
+        self.filter_persona.setCompleter(filter_completer)
+        self.filter_persona.setCurrentText("")
+        persona_layout.addWidget(self.filter_persona)
+        filtros_layout.addLayout(persona_layout)
+
+        self.filter_untagged = QCheckBox("Solo sin personas")
+        filtros_layout.addWidget(self.filter_untagged)
+
+        fechas_layout = QHBoxLayout()
+        self.filter_dates = QCheckBox("Entre")
+        fechas_layout.addWidget(self.filter_dates)
+        self.filter_from = QDateEdit(QDate.currentDate().addYears(-1))
+        self.filter_to = QDateEdit(QDate.currentDate())
+        for fecha in (self.filter_from, self.filter_to):
+            fecha.setCalendarPopup(True)
+            fecha.setDisplayFormat("yyyy-MM-dd")
+        fechas_layout.addWidget(self.filter_from)
+        fechas_layout.addWidget(QLabel("y"))
+        fechas_layout.addWidget(self.filter_to)
+        filtros_layout.addLayout(fechas_layout)
+        if not self.con_fechas:
+            for control in (self.filter_dates, self.filter_from, self.filter_to):
+                control.setEnabled(False)
+                control.setToolTip("Ninguna imagen de la colección tiene fecha de creación")
+
+        objeto_layout = QHBoxLayout()
+        objeto_layout.addWidget(QLabel("Objeto:"))
+        self.filter_object = QLineEdit()
+        objeto_layout.addWidget(self.filter_object)
+        filtros_layout.addLayout(objeto_layout)
+
+        botones_filtro = QHBoxLayout()
+        self.filter_btn = QPushButton("Aplicar filtro")
+        self.filter_btn.clicked.connect(self.apply_filter)
+        botones_filtro.addWidget(self.filter_btn)
+        self.clear_filter_btn = QPushButton("Quitar filtro")
+        self.clear_filter_btn.clicked.connect(self.clear_filter)
+        botones_filtro.addWidget(self.clear_filter_btn)
+        filtros_layout.addLayout(botones_filtro)
+        right_layout.addWidget(filtros)
+
         main_layout.addWidget(right_panel)
 
         # Load first image
@@ -105,61 +874,154 @@ class ImageViewer(QMainWindow):
 
     def load_current_image(self):
         """Cargar y mostrar la imagen actual, escalada a 515px de ancho con altura proporcional."""
-        img = self.images[self.current_index]
-        pixmap = QPixmap(img['ruta'])
+        img = self.documentos.actual()
+        self.setWindowTitle(f"Imagenes Etiquetadas - {self.documentos.posicion + 1}/{self.documentos.total()}")
+        pixmap = self.miniaturas.obtener(img['ruta'], ANCHO_VISOR)
+        if pixmap is None:
+            # Not decoded yet: on_thumbnail_ready will show it
+            self.image_label.setText("Cargando...")
+            self.miniaturas.solicitar(img['ruta'], ANCHO_VISOR, prioridad=1)
+        else:
+            self.show_pixmap(pixmap)
+
+        # Prefetch the next and previous images
+        for vecino in self.documentos.vecinos():
+            self.miniaturas.solicitar(vecino['ruta'], ANCHO_VISOR)
+
+        self.update_personas()
+
+    def show_pixmap(self, pixmap):
+        """Mostrar el pixmap escalado a 515px de ancho, o un aviso si la imagen no se pudo cargar."""
         if pixmap.isNull():
             self.image_label.setText("Imagen no encontrada")
         else:
             # Scale to width 515, height proportional
-            scaled_width = 515
+            scaled_width = ANCHO_VISOR
             aspect_ratio = pixmap.height() / pixmap.width()
             scaled_height = int(scaled_width * aspect_ratio)
             self.image_label.setPixmap(pixmap.scaled(scaled_width, scaled_height, Qt.KeepAspectRatio))
 
-        self.update_personas()
+    def on_thumbnail_ready(self, ruta, ancho):
+        """Mostrar la imagen decodificada en segundo plano si sigue siendo la actual."""
+        if ancho == ANCHO_VISOR and not self.documentos.vacio() and self.documentos.actual()['ruta'] == ruta:
+            self.show_pixmap(self.miniaturas.obtener(ruta, ancho))
 
     def update_personas(self):
         """Actualizar el widget de lista que muestra las personas (etiquetas) de la imagen actual."""
         self.personas_list.clear()
-        img = self.images[self.current_index]
+        img = self.documentos.actual()
         if 'personas' in img and img['personas']:
             for persona in img['personas']:
                 self.personas_list.addItem(persona)
 
+    def current_filter(self):
+        """Construir la consulta a partir de los controles de filtro."""
+        desde = hasta = None
+        if self.con_fechas and self.filter_dates.isChecked():
+            desde = tuple(self.filter_from.date().toString(f) for f in ("yyyy", "MM", "dd"))
+            hasta = tuple(self.filter_to.date().toString(f) for f in ("yyyy", "MM", "dd"))
+        return construir_filtro(persona=self.filter_persona.currentText().strip(),
+                                sin_personas=self.filter_untagged.isChecked(),
+                                desde=desde, hasta=hasta,
+                                objeto=self.filter_object.text().strip())
+
+    def set_filter(self, filtro):
+        """Recorrer solo las imágenes que cumplen el filtro. Devuelve False si no hay ninguna."""
+        self.escrituras.vaciar()
+        documentos = DocumentosPaginados(self.collection, filtro)
+        if documentos.vacio():
+            return False
+        self.documentos = documentos
+        if self.cuadricula is not None:
+            self.cuadricula.set_filter(filtro)
+        self.load_current_image()
+        return True
+
+    def apply_filter(self):
+        """Aplicar el filtro de los controles."""
+        if not self.set_filter(self.current_filter()):
+            QMessageBox.information(self, "Filtro", "Ninguna imagen cumple el filtro.")
+
+    def clear_filter(self):
+        """Volver a recorrer todas las imágenes."""
+        self.filter_persona.setCurrentText("")
+        self.filter_untagged.setChecked(False)
+        self.filter_dates.setChecked(False)
+        self.filter_object.clear()
+        self.set_filter({})
+
+    def show_grid(self):
+        """Abrir la vista en cuadrícula con las mismas imágenes que el visor."""
+        if self.cuadricula is None:
+            self.cuadricula = VentanaCuadricula(self.collection, self.escrituras, self.personas_model,
+                                                self.documentos.filtro, self)
+            self.cuadricula.etiquetas_cambiadas.connect(self.on_grid_tags_changed)
+        self.cuadricula.show()
+        self.cuadricula.raise_()
+
+    def on_grid_tags_changed(self, cambiadas):
+        """Reflejar en el visor las etiquetas cambiadas desde la cuadrícula."""
+        for doc in self.documentos.docs:
+            if doc['_id'] in cambiadas:
+                doc['personas'] = list(cambiadas[doc['_id']])
+        # Only a name that was added can be new; a removal never registers it
+        persona = self.cuadricula.persona_combo.currentText().strip()
+        if any(persona in personas for personas in cambiadas.values()):
+            self.register_persona_name(persona)
+        self.update_personas()
+
+    def notify_grid(self, img):
+        """Reflejar en la cuadrícula, si está abierta, las etiquetas editadas en el visor."""
+        if self.cuadricula is not None:
+            self.cuadricula.modelo.actualizar_etiquetas({img['_id']: img['personas']})
+
+    def on_write_error(self, mensaje):
+        """Avisar de que un lote de etiquetas no se pudo guardar."""
+        QMessageBox.warning(self, "Error", f"No se pudieron guardar las etiquetas: {mensaje}")
+
+    def closeEvent(self, event):
+        """Escribir las etiquetas pendientes antes de cerrar."""
+        self.escrituras.cerrar()
+        super().closeEvent(event)
+
     def show_next(self):
         """Navegar a la siguiente imagen si está disponible."""
-        if self.current_index < len(self.images) - 1:
-            self.current_index += 1
+        self.escrituras.vaciar()
+        if self.documentos.siguiente():
             self.load_current_image()
         else:
             QMessageBox.information(self, "Fin", "No hay más imágenes.")
 
     def show_prev(self):
         """Navegar a la imagen anterior si está disponible."""
-        if self.current_index > 0:
-            self.current_index -= 1
+        self.escrituras.vaciar()
+        if self.documentos.anterior():
             self.load_current_image()
         else:
             QMessageBox.information(self, "Inicio", "Es la primera imagen.")
 
+    def register_persona_name(self, persona):
+        """Añadir la persona al modelo del desplegable, en su posición ordenada, si es nueva."""
+        nombres = self.personas_model.stringList()
+        pos = bisect.bisect_left(nombres, persona)
+        if pos < len(nombres) and nombres[pos] == persona:
+            return
+        self.personas_model.insertRows(pos, 1)
+        self.personas_model.setData(self.personas_model.index(pos), persona)
+
     def add_persona(self):
         """Añadir la persona seleccionada del menú desplegable a las etiquetas de la imagen actual."""
         selected_persona = self.persona_combo.currentText().strip()
         if selected_persona:
-            img = self.images[self.current_index]
+            img = self.documentos.actual()
             if 'personas' not in img:
                 img['personas'] = []
             if selected_persona not in img['personas']:
                 img['personas'].append(selected_persona)
-                self.collection.update_one({'_id': img['_id']}, {'$set': {'personas': img['personas']}})
-                # Update all_personas if its new
-                if selected_persona not in self.all_personas:
-                    self.all_personas.append(selected_persona)
-                    self.all_personas.sort()
-                    self.persona_combo.clear()
-                    self.persona_combo.addItems(self.all_personas)
-                    self.persona_combo.setCurrentText(selected_persona)
+                self.escrituras.añadir_persona(img['_id'], selected_persona)
+                self.register_persona_name(selected_persona)
                 self.update_personas()
+                self.notify_grid(img)
                 QMessageBox.information(self, "Éxito", f"{selected_persona} añadida.")
             else:
                 QMessageBox.warning(self, "Advertencia", f"{selected_persona} ya está en la lista.")
@@ -168,11 +1030,12 @@ class ImageViewer(QMainWindow):
         """Eliminar la persona seleccionada de las etiquetas de la imagen actual."""
         current_row = self.personas_list.currentRow()
         if current_row >= 0:
-            img = self.images[self.current_index]
+            img = self.documentos.actual()
             if 'personas' in img and current_row < len(img['personas']):
                 removed = img['personas'].pop(current_row)
-                self.collection.update_one({'_id': img['_id']}, {'$set': {'personas': img['personas']}})
+                self.escrituras.quitar_persona(img['_id'], removed)
                 self.update_personas()
+                self.notify_grid(img)
                 QMessageBox.information(self, "Éxito", f"{removed} eliminada.")
         else:
             QMessageBox.warning(self, "Advertencia", "Selecciona una persona para eliminar.")
@@ -181,19 +1044,15 @@ class ImageViewer(QMainWindow):
         """Añadir una persona introducida manualmente a las etiquetas de la imagen actual."""
         manual_persona = self.manual_input.text().strip()
         if manual_persona:
-            img = self.images[self.current_index]
+            img = self.documentos.actual()
             if 'personas' not in img:
                 img['personas'] = []
             if manual_persona not in img['personas']:
                 img['personas'].append(manual_persona)
-                self.collection.update_one({'_id': img['_id']}, {'$set': {'personas': img['personas']}})
-                # Update all_personas if its new
-                if manual_persona not in self.all_personas:
-                    self.all_personas.append(manual_persona)
-                    self.all_personas.sort()
-                    self.persona_combo.clear()
-                    self.persona_combo.addItems(self.all_personas)
+                self.escrituras.añadir_persona(img['_id'], manual_persona)
+                self.register_persona_name(manual_persona)
                 self.update_personas()
+                self.notify_grid(img)
                 self.manual_input.clear()
                 QMessageBox.information(self, "Éxito", f"{manual_persona} añadida.")
             else:
@@ -201,7 +1060,7 @@ class ImageViewer(QMainWindow):
 
     def delete_image(self):
         """Eliminar la imagen actual del sistema de archivos y la base de datos."""
-        img = self.images[self.current_index]
+        img = self.documentos.actual()
         reply = QMessageBox.question(self, "Confirmar", f"¿Eliminar la imagen '{img['nombre']}' de forma permanente?", QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             try:
@@ -210,12 +1069,16 @@ class ImageViewer(QMainWindow):
                 QMessageBox.warning(self, "Error", f"No se pudo eliminar el archivo: {e}")
                 return
             self.collection.delete_one({'_id': img['_id']})
-            del self.images[self.current_index]
-            if len(self.images) == 0:
+            for persona in img.get('personas') or []:
+                self.escrituras.ajustar_usos(persona, -1)
+            if self.cuadricula is not None:
+                self.cuadricula.modelo.eliminar_documento(img['_id'])
+            if not self.documentos.eliminar_actual():
                 QMessageBox.information(self, "Fin", "No hay más imágenes.")
-                sys.exit()
-            if self.current_index >= len(self.images):
-                self.current_index = len(self.images) - 1
+                # Close through closeEvent so queued tag edits are written first
+                self.close()
+                QApplication.instance().quit()
+                return
             self.load_current_image()
             QMessageBox.information(self, "Éxito", "Imagen eliminada del sistema y base de datos.")
 
@@ -40,6 +40,9 @@ import tempfile
 from pathlib import Path
 import argparse
 from datetime import datetime, timedelta
+
+from cliente_ollama import ErrorOllama, obtener_cliente
+
 try:
     from googletrans import Translator
     GOOGLETRANS_AVAILABLE = True
@@ -102,12 +105,8 @@ def transcribe_with_ollama(audio_path, model="dimavz/whisper-tiny"):
     
     # Verificar que el modelo esté disponible
     try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, check=True)
-        model_name = model.split('/')[-1]  # Obtener solo el nombre del modelo
-        if model_name not in result.stdout:
-            print(f"Modelo {model} no encontrado. Descargando...")
-            subprocess.run(['ollama', 'pull', model], check=True)
-    except subprocess.CalledProcessError as e:
+        obtener_cliente().asegurar_modelo(model)
+    except ErrorOllama as e:
         print(f"Error verificando/descargando modelo: {e}")
         return None
     
@@ -206,14 +205,9 @@ def translate_with_googletrans(text, target_lang='es'):
 def translate_with_ollama(text, target_lang='es', model='llama3.2'):
     """Traduce texto usando Ollama con un modelo LLM"""
     try:
-        # Verificar que Ollama esté disponible
-        subprocess.run(['ollama', 'list'], capture_output=True, check=True)
-
-        # Verificar si el modelo está disponible, si no, descargarlo
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, check=True)
-        if model not in result.stdout:
-            print(f"Modelo {model} no encontrado. Descargando...")
-            subprocess.run(['ollama', 'pull', model], check=True)
+        # Verificar si el modelo está disponible, si no, descargarlo (solo la primera vez)
+        cliente = obtener_cliente()
+        cliente.asegurar_modelo(model)
 
         # Mapear códigos de idioma a nombres completos para el prompt
         lang_names = {
@@ -235,10 +229,7 @@ def translate_with_ollama(text, target_lang='es', model='llama3.2'):
         prompt = f"Translate the following text to {target_lang_name}. Only provide the translation, no explanations:\n\n{text}"
 
         # Usar Ollama para traducir
-        cmd = ['ollama', 'run', model, prompt]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-        translated_text = result.stdout.strip()
+        translated_text = cliente.generar(model, prompt).strip()
         return translated_text if translated_text else text
 
     except Exception as e:
@@ -251,6 +242,9 @@ def translate_segments(transcription, method='googletrans', target_lang='es', ol
 
     translated_segments = []
 
+    if method == 'ollama':
+        obtener_cliente().precalentar(ollama_model)
+
     for i, segment in enumerate(transcription["segments"]):
         original_text = segment["text"].strip()
         if not original_text:
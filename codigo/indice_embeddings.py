@@ -0,0 +1,264 @@
+"""
+Índice vectorial de las descripciones de imágenes para búsqueda semántica.
+
+Calcula un embedding para el campo 'descripcion' de cada imagen de MongoDB con un
+modelo local de Ollama y lo guarda en una matriz float32 en disco, accesible
+mediante memoria mapeada. Las consultas ("fotos que parezcan un mercado en una calle
+con lluvia") se convierten en vector y se comparan con toda la matriz de una vez
+(similitud coseno vectorizada con NumPy), devolviendo los k resultados más parecidos
+en milisegundos incluso con cientos de miles de imágenes.
+
+Archivos del índice:
+- embeddings.f32: matriz N x D de vectores normalizados (float32, sin cabecera)
+- embeddings_ids.json: modelo, dimensión, identificadores de MongoDB por fila y
+  hash de la descripción con la que se calculó cada vector
+
+La construcción es incremental: solo se calculan los vectores de las imágenes nuevas
+o cuya descripción ha cambiado.
+
+Uso:
+    python indice_embeddings.py construir
+    python indice_embeddings.py buscar "calle con mercado bajo la lluvia" -k 10
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+from pymongo import MongoClient
+
+from cliente_ollama import obtener_cliente
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "album_2"
+COLLECTION_NAME = "imagenes"
+
+MODELO_EMBEDDINGS = "nomic-embed-text"
+ARCHIVO_MATRIZ = "embeddings.f32"
+ARCHIVO_IDS = "embeddings_ids.json"
+TAMAÑO_LOTE = 64  # Descripciones enviadas en cada petición de embeddings
+
+
+def hash_descripcion(texto):
+    """Devuelve un hash corto de la descripción para detectar cambios."""
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def normalizar(vectores):
+    """Normaliza las filas a norma 1 para que el producto escalar sea la similitud coseno."""
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return vectores / normas
+
+
+class IndiceEmbeddings:
+    """Matriz de embeddings en memoria mapeada con su mapa de identificadores."""
+
+    def __init__(self, directorio=".", modelo=MODELO_EMBEDDINGS):
+        """
+        Abre el índice del directorio indicado (vacío si aún no existe).
+
+        Args:
+            directorio (str): Carpeta donde se guardan los archivos del índice
+            modelo (str): Modelo de embeddings de Ollama
+        """
+        self.ruta_matriz = os.path.join(directorio, ARCHIVO_MATRIZ)
+        self.ruta_ids = os.path.join(directorio, ARCHIVO_IDS)
+        self.modelo = modelo
+        self.dimension = None
+        self.ids = []
+        self.hashes = []
+        self.matriz = None
+
+        if os.path.exists(self.ruta_ids):
+            with open(self.ruta_ids, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            if datos.get("modelo") == modelo:
+                self.dimension = datos["dimension"]
+                self.ids = datos["ids"]
+                self.hashes = datos["hashes"]
+            else:
+                print(f"El índice se creó con el modelo {datos.get('modelo')}; se reconstruirá con {modelo}")
+        self._abrir_matriz()
+
+    def _abrir_matriz(self):
+        """Mapea la matriz del disco en memoria (solo lectura)."""
+        if self.ids and os.path.exists(self.ruta_matriz):
+            self.matriz = np.memmap(self.ruta_matriz, dtype=np.float32, mode="r",
+                                    shape=(len(self.ids), self.dimension))
+        else:
+            self.matriz = None
+
+    def _guardar_ids(self):
+        """Guarda el mapa de identificadores de forma atómica."""
+        temporal = f"{self.ruta_ids}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"modelo": self.modelo, "dimension": self.dimension,
+                       "ids": self.ids, "hashes": self.hashes}, f)
+        os.replace(temporal, self.ruta_ids)
+
+    def _calcular(self, textos):
+        """Calcula y normaliza los embeddings de una lista de textos."""
+        vectores = np.asarray(obtener_cliente().embeber(self.modelo, textos), dtype=np.float32)
+        return normalizar(vectores)
+
+    def construir(self, coleccion):
+        """
+        Calcula los embeddings de las descripciones nuevas o modificadas.
+
+        Los vectores de descripciones modificadas se sobrescriben en su fila y los
+        nuevos se añaden al final de la matriz.
+
+        Args:
+            coleccion: Colección de MongoDB con los campos 'descripcion'
+
+        Returns:
+            int: Número de vectores calculados
+        """
+        if self.matriz is None:
+            # Índice nuevo o de otro modelo: empezar de cero
+            self.ids, self.hashes = [], []
+            if os.path.exists(self.ruta_matriz):
+                os.remove(self.ruta_matriz)
+
+        posiciones = {id_: i for i, id_ in enumerate(self.ids)}
+        pendientes = []
+        cursor = coleccion.find({"descripcion": {"$type": "string", "$ne": ""}}, {"descripcion": 1})
+        for doc in cursor:
+            id_ = str(doc["_id"])
+            h = hash_descripcion(doc["descripcion"])
+            fila = posiciones.get(id_)
+            if fila is None or self.hashes[fila] != h:
+                pendientes.append((id_, h, doc["descripcion"]))
+
+        if not pendientes:
+            print("El índice está actualizado")
+            return 0
+
+        print(f"Calculando {len(pendientes)} embeddings con {self.modelo}...")
+        self.matriz = None  # Liberar el mapeo antes de modificar el archivo
+        calculados = 0
+        for inicio in range(0, len(pendientes), TAMAÑO_LOTE):
+            lote = pendientes[inicio:inicio + TAMAÑO_LOTE]
+            vectores = self._calcular([texto for _, _, texto in lote])
+            if self.dimension is None:
+                self.dimension = vectores.shape[1]
+
+            nuevos = []
+            for (id_, h, _), vector in zip(lote, vectores):
+                fila = posiciones.get(id_)
+                if fila is None:
+                    posiciones[id_] = len(self.ids) + len(nuevos)
+                    nuevos.append((id_, h, vector))
+                else:
+                    # Descripción modificada: sobrescribir su fila
+                    matriz = np.memmap(self.ruta_matriz, dtype=np.float32, mode="r+",
+                                       shape=(len(self.ids), self.dimension))
+                    matriz[fila] = vector
+                    matriz.flush()
+                    del matriz
+                    self.hashes[fila] = h
+
+            if nuevos:
+                # Escribir justo detrás de la última fila con identificador: si una
+                # construcción anterior se interrumpió tras añadir filas y antes de
+                # guardar el mapa, esas filas huérfanas se descartan
+                modo = "r+b" if os.path.exists(self.ruta_matriz) else "wb"
+                with open(self.ruta_matriz, modo) as f:
+                    f.truncate(len(self.ids) * self.dimension * np.dtype(np.float32).itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.stack([v for _, _, v in nuevos]).astype(np.float32).tobytes())
+                self.ids.extend(id_ for id_, _, _ in nuevos)
+                self.hashes.extend(h for _, h, _ in nuevos)
+
+            # Guardar el mapa tras cada lote para poder reanudar si se interrumpe
+            self._guardar_ids()
+            calculados += len(lote)
+            print(f"  {calculados}/{len(pendientes)}")
+
+        self._abrir_matriz()
+        return calculados
+
+    def buscar(self, consulta, k=10):
+        """
+        Devuelve las k imágenes cuya descripción es más parecida a la consulta.
+
+        Args:
+            consulta (str): Texto en lenguaje natural
+            k (int): Número de resultados
+
+        Returns:
+            list: Tuplas (id de MongoDB, similitud) ordenadas de mayor a menor similitud
+        """
+        if self.matriz is None or not self.ids:
+            return []
+        vector = self._calcular([consulta])[0]
+        similitudes = self.matriz @ vector
+        k = min(k, len(similitudes))
+        # argpartition evita ordenar toda la matriz: O(N) + O(k log k)
+        mejores = np.argpartition(-similitudes, k - 1)[:k]
+        mejores = mejores[np.argsort(-similitudes[mejores])]
+        return [(self.ids[i], float(similitudes[i])) for i in mejores]
+
+
+def busqueda_semantica(coleccion, consulta, k=10, indice=None):
+    """
+    Busca imágenes por significado y devuelve sus documentos de MongoDB.
+
+    Args:
+        coleccion: Colección de MongoDB de imágenes
+        consulta (str): Texto en lenguaje natural
+        k (int): Número de resultados
+        indice (IndiceEmbeddings): Índice ya abierto (se abre uno nuevo si no se indica)
+
+    Returns:
+        list: Documentos con nombre_archivo, ruta_completa, descripcion y 'similitud'
+    """
+    indice = indice or IndiceEmbeddings()
+    resultados = indice.buscar(consulta, k)
+    if not resultados:
+        return []
+    ids = [id_ for id_, _ in resultados]
+    documentos = {str(doc["_id"]): doc for doc in coleccion.find(
+        {"_id": {"$in": ids}}, {"nombre_archivo": 1, "ruta_completa": 1, "descripcion": 1})}
+    salida = []
+    for id_, similitud in resultados:
+        if id_ in documentos:
+            doc = documentos[id_]
+            doc["similitud"] = similitud
+            salida.append(doc)
+    return salida
+
+
+def main():
+    """Punto de entrada por línea de comandos."""
+    parser = argparse.ArgumentParser(description="Índice de embeddings de las descripciones de imágenes")
+    parser.add_argument("--modelo", default=MODELO_EMBEDDINGS, help="Modelo de embeddings de Ollama")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("construir", help="Calcular los embeddings nuevos o modificados")
+    buscar = subparsers.add_parser("buscar", help="Buscar imágenes por significado")
+    buscar.add_argument("consulta", help="Texto de la búsqueda")
+    buscar.add_argument("-k", type=int, default=10, help="Número de resultados (por defecto: 10)")
+    args = parser.parse_args()
+
+    client = MongoClient(MONGO_URI)
+    coleccion = client[DB_NAME][COLLECTION_NAME]
+    indice = IndiceEmbeddings(modelo=args.modelo)
+
+    try:
+        if args.comando == "construir":
+            calculados = indice.construir(coleccion)
+            print(f"✅ Índice con {len(indice.ids)} imágenes ({calculados} vectores calculados)")
+        else:
+            for doc in busqueda_semantica(coleccion, args.consulta, args.k, indice):
+                print(f"{doc['similitud']:.3f}  {doc.get('ruta_completa') or doc.get('nombre_archivo')}")
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,17 +11,48 @@ Características principales:
 - Redimensionado proporcional con ancho fijo de 1024px
 - Optimización automática para web (calidad 85%, JPEG progresivo)
 - Conversión a RGB para compatibilidad
+- Decodificación JPEG a escala reducida antes del remuestreo final
 - Informe detallado del procesamiento con estadísticas de reducción
 - Manejo de errores robusto con mensajes descriptivos
+- Procesamiento en paralelo con varios procesos (opción --jobs)
+- Modo rendiciones: varios anchos en JPEG y WebP a partir de una sola
+  decodificación, con un manifiesto JSON de dimensiones y tamaños
+- Seguimiento de dependencias: las imágenes cuyas salidas ya existen, son más
+  recientes que el original y se generaron con los mismos ajustes se reutilizan
+  sin volver a codificarlas (opción --forzar para regenerarlas todas)
+
+Uso:
+    python redimensionar_imagen.py            # Todos los núcleos
+    python redimensionar_imagen.py --jobs 4   # Cuatro procesos
+    python redimensionar_imagen.py --jobs 1   # Secuencial, sin procesos auxiliares
+    python redimensionar_imagen.py --rendiciones
+    python redimensionar_imagen.py --rendiciones --anchos 480,960 --formatos jpg
+    python redimensionar_imagen.py --forzar     # Regenerar aunque no haya cambios
 
 Autor: Benito González Piñeiro
 Fecha de creación: Agosto 2025
 Versión: 1.0
 """
 
+import argparse
+import hashlib
+import json
 import os
-from PIL import Image
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
+
+# Modo rendiciones: anchos y formatos generados por defecto
+ANCHOS_RENDICIONES = (320, 640, 1024, 2048)
+FORMATOS_RENDICIONES = ("jpg", "webp")
+# Manifiesto con las rendiciones de cada imagen, dentro de MODIFICADAS
+MANIFIESTO = "manifest.json"
+# Estado del seguimiento de dependencias (ajustes y salidas de cada original), dentro de MODIFICADAS
+ESTADO = ".redimensionado.json"
+# Calidades de compresión; forman parte de la huella de ajustes
+CALIDAD_JPEG = 85
+CALIDAD_WEBP = 80
 
 def crear_carpeta_modificadas():
     """
@@ -81,12 +112,19 @@ def redimensionar_imagen(ruta_origen, nombre_archivo):
         nombre_archivo (str): Nombre del archivo de imagen (sin ruta)
 
     Returns:
-        None
+        dict: Resultado del procesamiento con las claves:
+            - nombre_archivo, nombre_salida: nombres de entrada y salida
+            - dimensiones_originales, dimensiones_nuevas: tuplas (ancho, alto)
+            - tamaño_original, tamaño_nuevo: bytes de la imagen original y la generada
+            - segundos: tiempo empleado en la imagen
+            - error: mensaje de error, o None si se procesó correctamente
 
     Características del procesamiento:
         - Ancho fijo: 1024 píxeles
         - Alto proporcional calculado automáticamente
         - Conversión a RGB si es necesario
+        - Originales JPEG decodificados a escala reducida (draft) cuando la
+          reducción sigue siendo mayor que el tamaño final: menos tiempo y memoria
         - Algoritmo de remuestreo: LANCZOS (alta calidad)
         - Formato de salida: JPEG optimizado
         - Calidad: 85% (balance entre tamaño y calidad)
@@ -95,19 +133,16 @@ def redimensionar_imagen(ruta_origen, nombre_archivo):
 
     Side effects:
         - Crea archivo en la carpeta MODIFICADAS
-        - Imprime información del procesamiento en consola
-        - Maneja errores y muestra mensajes descriptivos
 
-    Raises:
-        Exception: Si ocurre un error durante el procesamiento de la imagen
+    La función no imprime nada: puede ejecutarse en un proceso auxiliar y el
+    proceso principal muestra los resultados en orden con mostrar_resultado().
+    Los errores se devuelven en la clave 'error' en lugar de propagarse.
     """
+    inicio = time.perf_counter()
+    resultado = {'nombre_archivo': nombre_archivo, 'nombre_salida': None, 'error': None}
     try:
         # Abrir la imagen original
         with Image.open(ruta_origen) as img:
-            # Convertir a RGB si es necesario (para PNG con transparencia, etc.)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            
             # Obtener dimensiones originales
             ancho_original, alto_original = img.size
             
@@ -115,6 +150,15 @@ def redimensionar_imagen(ruta_origen, nombre_archivo):
             ancho_nuevo = 1024
             alto_nuevo = int((alto_original * ancho_nuevo) / ancho_original)
             
+            # En JPEG, decodificar directamente a 1/2, 1/4 o 1/8 de escala (en el
+            # dominio DCT) mientras el resultado siga siendo mayor que el destino
+            if img.format == 'JPEG':
+                img.draft(img.mode, (ancho_nuevo, alto_nuevo))
+            
+            # Convertir a RGB si es necesario (para PNG con transparencia, etc.)
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGB')
+            
             # Redimensionar la imagen
             img_redimensionada = img.resize((ancho_nuevo, alto_nuevo), Image.Resampling.LANCZOS)
             
@@ -127,25 +171,276 @@ def redimensionar_imagen(ruta_origen, nombre_archivo):
             img_redimensionada.save(
                 ruta_salida,
                 "JPEG",
-                quality=85,  # Calidad del 85% - buena para web
+                quality=CALIDAD_JPEG,  # Calidad del 85% - buena para web
                 optimize=True,  # Optimiza el archivo
                 progressive=True  # JPEG progresivo para carga web
             )
             
-            # Mostrar información del procesamiento
-            tamaño_original = os.path.getsize(ruta_origen)
-            tamaño_nuevo = os.path.getsize(ruta_salida)
-            reduccion = ((tamaño_original - tamaño_nuevo) / tamaño_original) * 100
-            
-            print(f"✓ {nombre_archivo} -> {nombre_salida}")
-            print(f"  Dimensiones: {ancho_original}x{alto_original} -> {ancho_nuevo}x{alto_nuevo}")
-            print(f"  Tamaño: {tamaño_original/1024:.1f}KB -> {tamaño_nuevo/1024:.1f}KB ({reduccion:.1f}% reducción)")
-            print()
+            # Recoger la información del procesamiento
+            resultado.update({
+                'nombre_salida': nombre_salida,
+                'dimensiones_originales': (ancho_original, alto_original),
+                'dimensiones_nuevas': (ancho_nuevo, alto_nuevo),
+                'tamaño_original': os.path.getsize(ruta_origen),
+                'tamaño_nuevo': os.path.getsize(ruta_salida),
+            })
             
     except Exception as e:
-        print(f"❌ Error procesando {nombre_archivo}: {str(e)}")
+        resultado['error'] = str(e)
+
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+def generar_rendiciones(ruta_origen, nombre_archivo, anchos=ANCHOS_RENDICIONES, formatos=FORMATOS_RENDICIONES):
+    """
+    Genera varias rendiciones de una imagen a partir de una sola decodificación.
+
+    La imagen original se decodifica una vez (a escala reducida si es JPEG, con
+    la mayor rendición como referencia) y cada ancho se obtiene remuestreando la
+    rendición inmediatamente mayor, de la más grande a la más pequeña. Cada
+    rendición se guarda en todos los formatos pedidos.
+
+    Args:
+        ruta_origen (str): Ruta completa del archivo de imagen original
+        nombre_archivo (str): Nombre del archivo de imagen (sin ruta)
+        anchos (tuple): Anchos en píxeles a generar
+        formatos (tuple): Formatos de salida ("jpg" y/o "webp")
+
+    Returns:
+        dict: Resultado del procesamiento, con las mismas claves que
+        redimensionar_imagen() más 'rendiciones': lista de diccionarios con
+        archivo, formato, ancho, alto y bytes de cada archivo generado.
+        'tamaño_nuevo' es la suma de todas las rendiciones.
+
+    Características del procesamiento:
+        - No se amplía: se omiten los anchos mayores que el original (si todos lo
+          son, se genera una única rendición al ancho original)
+        - Nombres de salida: <nombre>_<ancho>.jpg y <nombre>_<ancho>.webp
+        - JPEG: calidad 85%, optimizado y progresivo (igual que el modo normal)
+        - WebP: calidad 80%
+    """
+    inicio = time.perf_counter()
+    resultado = {'nombre_archivo': nombre_archivo, 'nombre_salida': None, 'error': None}
+    try:
+        with Image.open(ruta_origen) as img:
+            ancho_original, alto_original = img.size
+            anchos = sorted({a for a in anchos if a <= ancho_original}, reverse=True) or [ancho_original]
+
+            # Una sola decodificación, reducida en el dominio DCT si es JPEG
+            if img.format == 'JPEG':
+                img.draft(img.mode, (anchos[0], max(1, alto_original * anchos[0] // ancho_original)))
+            actual = img.convert('RGB') if img.mode != 'RGB' else img
+            actual.load()
+
+            nombre_base = os.path.splitext(nombre_archivo)[0]
+            rendiciones = []
+            for ancho in anchos:
+                alto = max(1, int((alto_original * ancho) / ancho_original))
+                # Remuestrear desde la rendición anterior, más grande y ya en memoria
+                if actual.size != (ancho, alto):
+                    actual = actual.resize((ancho, alto), Image.Resampling.LANCZOS)
+                for formato in formatos:
+                    nombre_salida = f"{nombre_base}_{ancho}.{formato}"
+                    ruta_salida = os.path.join("MODIFICADAS", nombre_salida)
+                    if formato == "webp":
+                        actual.save(ruta_salida, "WEBP", quality=CALIDAD_WEBP, method=4)
+                    else:
+                        actual.save(ruta_salida, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+                    rendiciones.append({'archivo': nombre_salida, 'formato': formato, 'ancho': ancho,
+                                        'alto': alto, 'bytes': os.path.getsize(ruta_salida)})
+
+            resultado.update({
+                'nombre_salida': f"{nombre_base}_{{{','.join(map(str, anchos))}}}",
+                'dimensiones_originales': (ancho_original, alto_original),
+                'dimensiones_nuevas': (anchos[0], rendiciones[0]['alto']),
+                'tamaño_original': os.path.getsize(ruta_origen),
+                'tamaño_nuevo': sum(r['bytes'] for r in rendiciones),
+                'rendiciones': rendiciones,
+            })
+
+    except Exception as e:
+        resultado['error'] = str(e)
+
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+def _redimensionar(argumentos):
+    """Adaptador para ProcessPoolExecutor.map: recibe (ruta_origen, nombre_archivo)."""
+    return redimensionar_imagen(*argumentos)
+
+def _rendiciones(argumentos):
+    """Adaptador para ProcessPoolExecutor.map: recibe (ruta_origen, nombre_archivo, anchos, formatos)."""
+    return generar_rendiciones(*argumentos)
+
+def huella_ajustes(anchos=None, formatos=FORMATOS_RENDICIONES):
+    """
+    Calcula la huella de los ajustes de redimensionado.
+
+    Si cambia cualquier ajuste que afecte a los archivos generados (modo, anchos,
+    formatos o calidades), cambia la huella y las salidas anteriores dejan de
+    considerarse válidas.
+
+    Args:
+        anchos (tuple): Anchos del modo rendiciones, o None en el modo normal
+        formatos (tuple): Formatos del modo rendiciones
+
+    Returns:
+        str: Hash SHA-1 de los ajustes
+    """
+    if anchos:
+        ajustes = {'modo': 'rendiciones', 'anchos': sorted(set(anchos)), 'formatos': sorted(set(formatos)),
+                   'calidad_jpeg': CALIDAD_JPEG, 'calidad_webp': CALIDAD_WEBP}
+    else:
+        ajustes = {'modo': 'normal', 'ancho': 1024, 'calidad_jpeg': CALIDAD_JPEG}
+    return hashlib.sha1(json.dumps(ajustes, sort_keys=True).encode("utf-8")).hexdigest()
+
+def leer_estado():
+    """
+    Lee el estado del seguimiento de dependencias de la carpeta MODIFICADAS.
+
+    Returns:
+        dict: nombre del original -> {'huella', 'salidas', 'resultado'}; vacío si
+        no existe o no se puede leer (en ese caso se regenera todo)
+    """
+    ruta = os.path.join("MODIFICADAS", ESTADO)
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_estado(estado, resultados, huella):
+    """
+    Registra las salidas de las imágenes procesadas y guarda el estado.
+
+    Las imágenes con error se eliminan del estado para que se reintenten en la
+    siguiente ejecución.
+
+    Args:
+        estado (dict): Estado leído con leer_estado()
+        resultados (list): Resultados de las imágenes regeneradas en esta ejecución
+        huella (str): Huella de los ajustes usados
+    """
+    for resultado in resultados:
+        if resultado['error']:
+            estado.pop(resultado['nombre_archivo'], None)
+            continue
+        salidas = [r['archivo'] for r in resultado.get('rendiciones', [])] or [resultado['nombre_salida']]
+        guardado = {k: v for k, v in resultado.items() if k not in ('segundos', 'reutilizada')}
+        estado[resultado['nombre_archivo']] = {'huella': huella, 'salidas': salidas, 'resultado': guardado}
+    ruta = os.path.join("MODIFICADAS", ESTADO)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(estado.items())), f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+def salidas_actualizadas(ruta_origen, entrada, huella):
+    """
+    Indica si las salidas registradas de una imagen siguen siendo válidas.
+
+    Son válidas, como en make, si se generaron con la misma huella de ajustes,
+    existen todas y ninguna es más antigua que el original.
+
+    Args:
+        ruta_origen (str): Ruta completa del archivo de imagen original
+        entrada (dict): Entrada del estado para esa imagen, o None
+        huella (str): Huella de los ajustes actuales
+
+    Returns:
+        bool: True si la imagen puede reutilizarse sin volver a procesarla
+    """
+    if not entrada or entrada.get('huella') != huella or not entrada.get('salidas'):
+        return False
+    try:
+        mtime_origen = os.stat(ruta_origen).st_mtime_ns
+        return all(os.stat(os.path.join("MODIFICADAS", salida)).st_mtime_ns >= mtime_origen
+                   for salida in entrada['salidas'])
+    except OSError:
+        return False
+
+def guardar_manifiesto(resultados):
+    """
+    Actualiza el manifiesto JSON de rendiciones de la carpeta MODIFICADAS.
+
+    Las entradas de imágenes no incluidas en esta ejecución se conservan, de modo
+    que el manifiesto describe siempre todo el contenido de la carpeta.
+
+    Args:
+        resultados (list): Resultados de generar_rendiciones()
+    """
+    ruta = os.path.join("MODIFICADAS", MANIFIESTO)
+    manifiesto = {}
+    if os.path.exists(ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+    for resultado in resultados:
+        if resultado['error']:
+            continue
+        ancho_original, alto_original = resultado['dimensiones_originales']
+        manifiesto[resultado['nombre_archivo']] = {
+            'ancho_original': ancho_original,
+            'alto_original': alto_original,
+            'rendiciones': resultado['rendiciones'],
+        }
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifiesto.items())), f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+def mostrar_resultado(resultado):
+    """
+    Muestra en consola el resultado de una imagen procesada.
+
+    Args:
+        resultado (dict): Resultado devuelto por redimensionar_imagen()
+    """
+    if resultado['error']:
+        print(f"❌ Error procesando {resultado['nombre_archivo']}: {resultado['error']}")
+        return
 
-def procesar_imagenes():
+    ancho_original, alto_original = resultado['dimensiones_originales']
+    ancho_nuevo, alto_nuevo = resultado['dimensiones_nuevas']
+    tamaño_original = resultado['tamaño_original']
+    tamaño_nuevo = resultado['tamaño_nuevo']
+    reduccion = ((tamaño_original - tamaño_nuevo) / tamaño_original) * 100
+
+    print(f"✓ {resultado['nombre_archivo']} -> {resultado['nombre_salida']}")
+    print(f"  Dimensiones: {ancho_original}x{alto_original} -> {ancho_nuevo}x{alto_nuevo}")
+    for rendicion in resultado.get('rendiciones', []):
+        print(f"    {rendicion['archivo']}: {rendicion['ancho']}x{rendicion['alto']}, {rendicion['bytes']/1024:.1f}KB")
+    print(f"  Tamaño: {tamaño_original/1024:.1f}KB -> {tamaño_nuevo/1024:.1f}KB ({reduccion:.1f}% reducción)")
+    print(f"  Tiempo: {resultado['segundos']:.2f}s")
+    print()
+
+def mostrar_estadisticas(resultados, segundos_totales, procesos):
+    """
+    Muestra las estadísticas agregadas de todo el procesamiento.
+
+    Args:
+        resultados (list): Resultados de todas las imágenes, regeneradas y reutilizadas
+        segundos_totales (float): Tiempo real transcurrido
+        procesos (int): Número de procesos utilizados
+    """
+    correctos = [r for r in resultados if not r['error']]
+    errores = len(resultados) - len(correctos)
+    reutilizadas = sum(1 for r in correctos if r.get('reutilizada'))
+    total_original = sum(r['tamaño_original'] for r in correctos)
+    total_nuevo = sum(r['tamaño_nuevo'] for r in correctos)
+    tiempos = [r['segundos'] for r in correctos if not r.get('reutilizada')]
+
+    print(f"📊 Estadísticas ({procesos} proceso{'s' if procesos > 1 else ''}):")
+    if correctos:
+        ahorro = total_original - total_nuevo
+        print(f"  Tamaño total: {total_original/1024/1024:.1f}MB -> {total_nuevo/1024/1024:.1f}MB "
+              f"({ahorro/1024/1024:.1f}MB ahorrados, {ahorro / total_original * 100:.1f}%)")
+    print(f"  Regeneradas: {len(correctos) - reutilizadas}, reutilizadas sin cambios: {reutilizadas}")
+    if tiempos:
+        print(f"  Tiempo por imagen: medio {sum(tiempos)/len(tiempos):.2f}s, máximo {max(tiempos):.2f}s")
+    if errores:
+        print(f"  Errores: {errores}")
+    print(f"  Tiempo total: {segundos_totales:.1f}s")
+
+def procesar_imagenes(procesos=None, anchos=None, formatos=FORMATOS_RENDICIONES, forzar=False):
     """
     Función principal que coordina el procesamiento completo de imágenes.
 
@@ -153,8 +448,17 @@ def procesar_imagenes():
     1. Verifica la existencia de la carpeta ORIGINALES
     2. Crea la carpeta MODIFICADAS si no existe
     3. Busca y filtra archivos de imagen válidos
-    4. Procesa cada imagen individualmente
-    5. Muestra estadísticas del procesamiento completo
+    4. Descarta las imágenes cuyas salidas siguen actualizadas
+    5. Procesa el resto, en paralelo si se usan varios procesos
+    6. Muestra estadísticas del procesamiento completo
+
+    Args:
+        procesos (int): Número de procesos (por defecto, uno por núcleo). Con 1 se
+            procesa secuencialmente en el proceso actual.
+        anchos (tuple): Si se indica, modo rendiciones con estos anchos en lugar
+            de la salida única de 1024px; se actualiza además el manifiesto JSON
+        formatos (tuple): Formatos de las rendiciones
+        forzar (bool): Regenerar todas las imágenes aunque sus salidas estén al día
 
     Returns:
         bool: True si el procesamiento se completó exitosamente,
@@ -163,7 +467,11 @@ def procesar_imagenes():
     Estructura del proceso:
         - Verificación de carpetas
         - Filtrado de archivos por extensión
-        - Procesamiento individual de cada imagen
+        - Seguimiento de dependencias: se reutilizan las imágenes cuyas salidas
+          existen, son más recientes que el original y tienen la misma huella de
+          ajustes (estado en MODIFICADAS/.redimensionado.json)
+        - Procesamiento de cada imagen en un pool de procesos; los resultados se
+          muestran en el orden de los archivos, aunque terminen desordenados
         - Reporte de estadísticas finales
 
     Side effects:
@@ -183,7 +491,7 @@ def procesar_imagenes():
     
     # Obtener lista de archivos en ORIGINALES
     archivos = os.listdir("ORIGINALES")
-    imagenes = [archivo for archivo in archivos if es_imagen(archivo)]
+    imagenes = sorted(archivo for archivo in archivos if es_imagen(archivo))
     
     if not imagenes:
         print("❌ No se encontraron imágenes en la carpeta ORIGINALES")
@@ -191,22 +499,91 @@ def procesar_imagenes():
         return False
     
     print(f"📁 Encontradas {len(imagenes)} imágenes para procesar")
+    
+    # Descartar las imágenes cuyas salidas siguen al día
+    huella = huella_ajustes(anchos, formatos)
+    estado = leer_estado()
+    reutilizadas = []
+    pendientes = []
+    for imagen in imagenes:
+        entrada = estado.get(imagen)
+        if not forzar and salidas_actualizadas(os.path.join("ORIGINALES", imagen), entrada, huella):
+            reutilizadas.append(dict(entrada['resultado'], segundos=0.0, reutilizada=True))
+        else:
+            pendientes.append(imagen)
+    if reutilizadas:
+        print(f"♻️  {len(reutilizadas)} imágenes sin cambios: se reutilizan sus salidas")
     print("=" * 60)
     
     # Procesar cada imagen
-    imagenes_procesadas = 0
-    for imagen in imagenes:
-        ruta_origen = os.path.join("ORIGINALES", imagen)
-        redimensionar_imagen(ruta_origen, imagen)
-        imagenes_procesadas += 1
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(pendientes) or 1))
+    if anchos:
+        funcion = _rendiciones
+        tareas = [(os.path.join("ORIGINALES", imagen), imagen, tuple(anchos), tuple(formatos))
+                  for imagen in pendientes]
+    else:
+        funcion = _redimensionar
+        tareas = [(os.path.join("ORIGINALES", imagen), imagen) for imagen in pendientes]
+    inicio = time.perf_counter()
+    resultados = []
+    if procesos == 1:
+        for tarea in tareas:
+            resultado = funcion(tarea)
+            mostrar_resultado(resultado)
+            resultados.append(resultado)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            # map devuelve los resultados en el orden de las tareas
+            for resultado in pool.map(funcion, tareas):
+                mostrar_resultado(resultado)
+                resultados.append(resultado)
+    segundos_totales = time.perf_counter() - inicio
+    if resultados:
+        guardar_estado(estado, resultados, huella)
+    if anchos:
+        # Las reutilizadas también, por si el manifiesto se borró o es de otros ajustes
+        guardar_manifiesto(resultados + reutilizadas)
+    resultados += reutilizadas
+    imagenes_procesadas = sum(1 for r in resultados if not r['error'] and not r.get('reutilizada'))
     
     print("=" * 60)
-    print(f"✅ Procesamiento completado: {imagenes_procesadas} imágenes redimensionadas")
+    mostrar_estadisticas(resultados, segundos_totales, procesos)
+    print(f"✅ Procesamiento completado: {imagenes_procesadas} imágenes redimensionadas, "
+          f"{len(reutilizadas)} reutilizadas")
     print(f"📂 Imágenes guardadas en la carpeta 'MODIFICADAS'")
+    if anchos:
+        print(f"🗂️  Manifiesto actualizado: MODIFICADAS/{MANIFIESTO}")
     
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Redimensiona las imágenes de ORIGINALES a 1024px de ancho")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Número de procesos (por defecto: uno por núcleo; 1 = secuencial)")
+    parser.add_argument("--rendiciones", action="store_true",
+                        help="Generar varios anchos en varios formatos y el manifiesto JSON")
+    parser.add_argument("--anchos", default=",".join(map(str, ANCHOS_RENDICIONES)),
+                        help="Anchos de las rendiciones separados por comas (por defecto: %(default)s)")
+    parser.add_argument("--formatos", default=",".join(FORMATOS_RENDICIONES),
+                        help="Formatos de las rendiciones: jpg y/o webp (por defecto: %(default)s)")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Regenerar todas las imágenes aunque sus salidas estén actualizadas")
+    args = parser.parse_args()
+
+    anchos = None
+    formatos = FORMATOS_RENDICIONES
+    if args.rendiciones:
+        try:
+            anchos = tuple(int(a) for a in args.anchos.split(",") if a.strip())
+        except ValueError:
+            parser.error("--anchos debe ser una lista de números separados por comas")
+        formatos = tuple(f.strip().lower() for f in args.formatos.split(",") if f.strip())
+        if not anchos or not formatos or any(f not in FORMATOS_RENDICIONES for f in formatos):
+            parser.error("Indica al menos un ancho y formatos entre: " + ", ".join(FORMATOS_RENDICIONES))
+        if "webp" in formatos and not features.check("webp"):
+            print("⚠️  Pillow no tiene soporte WebP: solo se generará JPEG")
+            formatos = tuple(f for f in formatos if f != "webp") or ("jpg",)
+
     print("🖼️  Script de Redimensionado de Imágenes")
     print("Redimensiona imágenes a 1024px de ancho manteniendo proporción")
     print()
@@ -220,7 +597,7 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Ejecutar el procesamiento
-    if procesar_imagenes():
+    if procesar_imagenes(args.jobs, anchos, formatos, args.forzar):
         print("🎉 ¡Proceso completado con éxito!")
     else:
         print("❌ El proceso terminó con errores")
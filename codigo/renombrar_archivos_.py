@@ -1,84 +1,325 @@
+"""
+Renombra archivos reemplazando espacios por guiones bajos (_)
+
+Por defecto procesa la carpeta 'data'; con --recursivo recorre también todas sus
+subcarpetas (con os.scandir). El renombrado se hace en tres pasos:
+
+1. Plan: se calculan todos los cambios antes de tocar nada. Las colisiones se
+   resuelven de forma determinista: los archivos se recorren en orden alfabético
+   y, si el nombre nuevo ya existe o lo ha reservado otro archivo, se añade un
+   sufijo _1, _2... antes de la extensión.
+2. Aplicación: cada renombrado correcto se anota en un diario JSONL
+   (renombrados_<fecha>.jsonl), junto con el directorio desde el que se
+   ejecutó, que permite deshacerlo con --deshacer desde cualquier carpeta.
+3. MongoDB: se actualizan 'ruta' (album.imagenes_2) y 'ruta_completa'
+   (album_2.imagenes), junto con el nombre de archivo, con un único bulk_write
+   por colección para que los demás scripts sigan encontrando las imágenes.
+
+Solo se renombran archivos; los nombres de las carpetas no se modifican.
+
+Uso:
+    python renombrar_archivos_.py
+    python renombrar_archivos_.py fotos --recursivo --simular
+    python renombrar_archivos_.py fotos --recursivo
+    python renombrar_archivos_.py --deshacer renombrados_20250830_120000.jsonl
+"""
+
+import argparse
+import json
 import os
-import sys
+from datetime import datetime
+
+try:
+    from pymongo import MongoClient, UpdateMany
+    PYMONGO_AVAILABLE = True
+except ImportError:
+    PYMONGO_AVAILABLE = False
+
+MONGO_URI = "mongodb://localhost:27017/"
+# (base de datos, colección, campo con la ruta, campo con el nombre del archivo)
+MONGO_DESTINOS = [
+    ("album", "imagenes_2", "ruta", "nombre"),
+    ("album_2", "imagenes", "ruta_completa", "nombre_archivo"),
+]
+
+
+def new_name(filename):
+    """Devuelve el nombre de archivo con los espacios reemplazados por guiones bajos."""
+    return filename.replace(' ', '_')
+
+
+def iter_folder(folder, recursive):
+    """
+    Recorre una carpeta con os.scandir en orden alfabético.
+
+    Args:
+        folder (str): Carpeta a recorrer
+        recursive (bool): Entrar también en las subcarpetas
+
+    Yields:
+        tuple: (carpeta, lista ordenada de nombres de archivo, conjunto de todos
+        los nombres presentes en la carpeta, incluidas las subcarpetas)
+    """
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except OSError as e:
+            print(f"❌ No se puede leer la carpeta '{current}': {e}")
+            continue
+        files = []
+        subfolders = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    files.append(entry.name)
+            except OSError:
+                continue
+        yield current, files, {entry.name for entry in entries}
+        if recursive:
+            # Apilar al revés para visitar las subcarpetas en orden alfabético
+            pending.extend(reversed(subfolders))
+
+
+def plan_renames(folder, recursive):
+    """
+    Calcula todos los renombrados sin modificar nada.
 
-def rename_files_in_data_folder():
+    Args:
+        folder (str): Carpeta raíz
+        recursive (bool): Incluir las subcarpetas
+
+    Returns:
+        list: Pares (ruta antigua, ruta nueva) en orden de recorrido
+    """
+    plan = []
+    for current, files, present in iter_folder(folder, recursive):
+        # Nombres ocupados: todo lo que hay en la carpeta y no se va a renombrar,
+        # más los destinos ya asignados
+        taken = present - {f for f in files if new_name(f) != f}
+        for filename in files:
+            target = new_name(filename)
+            if target == filename:
+                continue
+            base, ext = os.path.splitext(target)
+            counter = 1
+            while target in taken:
+                target = f"{base}_{counter}{ext}"
+                counter += 1
+            taken.add(target)
+            plan.append((os.path.join(current, filename), os.path.join(current, target)))
+    return plan
+
+
+def apply_plan(plan, journal_path):
     """
-    Renombra todos los archivos en la carpeta 'data' 
-    reemplazando espacios por guiones bajos (_)
+    Ejecuta el plan de renombrado y anota cada cambio en el diario.
+
+    Cada línea del diario se escribe y se vuelca a disco justo después del
+    renombrado correspondiente, de modo que el diario refleja el estado real
+    aunque el proceso se interrumpa. Las rutas del plan son relativas al
+    directorio actual, que se guarda en cada línea ('directorio').
+
+    Args:
+        plan (list): Pares (ruta antigua, ruta nueva)
+        journal_path (str): Archivo JSONL del diario
+
+    Returns:
+        list: Tuplas (ruta antigua, ruta nueva, directorio) renombradas correctamente
+    """
+    base = os.getcwd()
+    done = []
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        for old_path, new_path in plan:
+            if os.path.exists(new_path):
+                print(f"⚠️  Saltando '{old_path}' -> ya existe '{new_path}'")
+                continue
+            try:
+                os.rename(old_path, new_path)
+            except OSError as e:
+                print(f"❌ Error al renombrar '{old_path}': {e}")
+                continue
+            journal.write(json.dumps({"origen": old_path, "destino": new_path, "directorio": base,
+                                      "fecha": datetime.now().isoformat(timespec="seconds")},
+                                     ensure_ascii=False) + "\n")
+            journal.flush()
+            print(f"✅ Renombrado: '{old_path}' -> '{new_path}'")
+            done.append((old_path, new_path, base))
+    return done
+
+
+def path_variants(old_path, new_path, base):
+    """
+    Formas en que una ruta puede estar guardada en MongoDB.
+
+    Los scripts de carga guardan la ruta tal como la construyen: relativa, con
+    './' (descripcion_imagenes_ollama.py usa './imagenes/...') o absoluta. Se busca
+    cada forma y se sustituye por la misma forma de la ruta nueva. La forma
+    absoluta se calcula desde 'base', el directorio del renombrado, y no desde el
+    directorio actual, que puede ser otro al deshacer.
+
+    Args:
+        old_path (str): Ruta antigua, relativa a base o absoluta
+        new_path (str): Ruta nueva, en la misma forma
+        base (str): Directorio desde el que se hizo el renombrado
+
+    Returns:
+        list: Pares (ruta antigua, ruta nueva) sin repeticiones
+    """
+    old_norm, new_norm = os.path.normpath(old_path), os.path.normpath(new_path)
+    variants = [(old_path, new_path), (old_norm, new_norm)]
+    if not os.path.isabs(old_norm):
+        variants.append((f".{os.sep}{old_norm}", f".{os.sep}{new_norm}"))
+    variants.append((os.path.normpath(os.path.join(base, old_path)),
+                     os.path.normpath(os.path.join(base, new_path))))
+    return list(dict.fromkeys(variants))
+
+
+def update_mongo(renames):
+    """
+    Actualiza las rutas de las imágenes renombradas en MongoDB.
+
+    Para cada colección de MONGO_DESTINOS se envía un único bulk_write con una
+    operación por ruta renombrada (y forma de la ruta), que cambia la ruta y el
+    nombre del archivo.
+
+    Args:
+        renames (list): Tuplas (ruta antigua, ruta nueva, directorio del renombrado)
+
+    Returns:
+        bool: True si se actualizaron todas las colecciones
+    """
+    if not renames:
+        return True
+    if not PYMONGO_AVAILABLE:
+        print("⚠️  pymongo no está instalado: no se actualizan las rutas en MongoDB")
+        return False
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+    ok = True
+    try:
+        for db_name, collection_name, path_field, name_field in MONGO_DESTINOS:
+            operations = [
+                UpdateMany({path_field: old}, {"$set": {path_field: new, name_field: os.path.basename(new)}})
+                for old_path, new_path, base in renames
+                for old, new in path_variants(old_path, new_path, base)
+            ]
+            try:
+                result = client[db_name][collection_name].bulk_write(operations, ordered=False)
+                print(f"🗄️  {db_name}.{collection_name}: {result.modified_count} documentos actualizados")
+            except Exception as e:
+                print(f"❌ Error al actualizar {db_name}.{collection_name}: {e}")
+                ok = False
+    finally:
+        client.close()
+    return ok
+
+
+def undo(journal_path, use_mongo):
+    """
+    Deshace los renombrados de un diario, del último al primero.
+
+    Args:
+        journal_path (str): Diario JSONL generado por apply_plan()
+        use_mongo (bool): Restaurar también las rutas en MongoDB
+    """
+    with open(journal_path, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    restored = []
+    for entry in reversed(entries):
+        old_path, new_path = entry["origen"], entry["destino"]
+        # Diarios sin 'directorio': se supone que se deshace desde el mismo sitio
+        base = entry.get("directorio", os.getcwd())
+        if os.path.exists(os.path.join(base, old_path)):
+            print(f"⚠️  Saltando '{new_path}' -> ya existe '{old_path}'")
+            continue
+        try:
+            os.rename(os.path.join(base, new_path), os.path.join(base, old_path))
+        except OSError as e:
+            print(f"❌ Error al restaurar '{new_path}': {e}")
+            continue
+        print(f"↩️  Restaurado: '{new_path}' -> '{old_path}'")
+        restored.append((new_path, old_path, base))
+
+    print(f"\n🎉 Se restauraron {len(restored)} de {len(entries)} archivos.")
+    if use_mongo:
+        update_mongo(restored)
+
+
+def rename_files(data_folder, recursive=False, dry_run=False, use_mongo=True):
+    """
+    Renombra los archivos de una carpeta reemplazando espacios por guiones bajos (_)
+
+    Args:
+        data_folder (str): Carpeta a procesar
+        recursive (bool): Incluir las subcarpetas
+        dry_run (bool): Mostrar el plan sin renombrar nada
+        use_mongo (bool): Actualizar las rutas en MongoDB
     """
-    # Definir la ruta de la carpeta data
-    data_folder = "data"
-    
     # Verificar si la carpeta existe
     if not os.path.exists(data_folder):
         print(f"Error: La carpeta '{data_folder}' no existe.")
-        print("Asegúrate de que la carpeta 'data' esté en el mismo directorio que este script.")
+        print("Asegúrate de que la carpeta esté en el directorio actual o indica su ruta.")
         return
-    
+
     if not os.path.isdir(data_folder):
         print(f"Error: '{data_folder}' no es una carpeta.")
         return
-    
-    # Obtener lista de archivos en la carpeta
-    try:
-        files = os.listdir(data_folder)
-    except PermissionError:
-        print(f"Error: No tienes permisos para acceder a la carpeta '{data_folder}'.")
+
+    print(f"Procesando archivos en la carpeta '{data_folder}'{' y sus subcarpetas' if recursive else ''}...\n")
+
+    plan = plan_renames(data_folder, recursive)
+    if not plan:
+        print("No hay archivos con espacios en el nombre.")
         return
-    
-    # Filtrar solo archivos (no carpetas)
-    files = [f for f in files if os.path.isfile(os.path.join(data_folder, f))]
-    
-    if not files:
-        print(f"No se encontraron archivos en la carpeta '{data_folder}'.")
+
+    if dry_run:
+        for old_path, new_path in plan:
+            print(f"📝 '{old_path}' -> '{new_path}'")
+        print(f"\n🔍 Simulación: se renombrarían {len(plan)} archivos.")
         return
-    
-    renamed_count = 0
-    
-    print(f"Procesando archivos en la carpeta '{data_folder}'...\n")
-    
-    for filename in files:
-        # Verificar si el nombre contiene espacios
-        if ' ' in filename:
-            # Crear el nuevo nombre reemplazando espacios por guiones bajos
-            new_filename = filename.replace(' ', '_')
-            
-            # Rutas completas
-            old_path = os.path.join(data_folder, filename)
-            new_path = os.path.join(data_folder, new_filename)
-            
-            # Verificar si ya existe un archivo con el nuevo nombre
-            if os.path.exists(new_path):
-                print(f"⚠️  Saltando '{filename}' -> ya existe '{new_filename}'")
-                continue
-            
-            try:
-                # Renombrar el archivo
-                os.rename(old_path, new_path)
-                print(f"✅ Renombrado: '{filename}' -> '{new_filename}'")
-                renamed_count += 1
-            except OSError as e:
-                print(f"❌ Error al renombrar '{filename}': {e}")
-        else:
-            print(f"⏭️  Sin cambios: '{filename}' (no contiene espacios)")
-    
-    print(f"\n🎉 Proceso completado. Se renombraron {renamed_count} archivos.")
+
+    journal_path = f"renombrados_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+    done = apply_plan(plan, journal_path)
+    print(f"\n🎉 Proceso completado. Se renombraron {len(done)} archivos.")
+    if done:
+        print(f"📒 Diario para deshacer: {journal_path}")
+    else:
+        os.remove(journal_path)
+    if use_mongo:
+        update_mongo(done)
+
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Reemplaza espacios por guiones bajos en los nombres de archivo")
+    parser.add_argument("carpeta", nargs="?", default="data", help="Carpeta a procesar (por defecto: data)")
+    parser.add_argument("-r", "--recursivo", action="store_true", help="Procesar también las subcarpetas")
+    parser.add_argument("--simular", action="store_true", help="Mostrar el plan sin renombrar nada")
+    parser.add_argument("--sin-mongo", action="store_true", help="No actualizar las rutas en MongoDB")
+    parser.add_argument("--deshacer", metavar="DIARIO", help="Deshacer los renombrados de un diario JSONL")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("Script para renombrar archivos")
     print("Reemplaza espacios por guiones bajos (_)")
     print("=" * 50)
-    
+
     # Mostrar directorio actual
     current_dir = os.getcwd()
     print(f"Directorio actual: {current_dir}")
-    
-    # Ejecutar la función de renombrado
-    rename_files_in_data_folder()
-    
+
+    if args.deshacer:
+        undo(args.deshacer, not args.sin_mongo)
+    else:
+        rename_files(args.carpeta, args.recursivo, args.simular, not args.sin_mongo)
+
     print("\n" + "=" * 50)
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,6 @@
 import os
-import requests
+
+from cliente_ollama import ErrorOllama, obtener_cliente
 
 # Configuración
 carpeta_entrada = "entrada"
@@ -15,25 +16,10 @@ def traducir_texto(texto: str) -> str:
     prompt = f"Traduce al castellano de forma natural y concisa. Mantén el sentido original y usa un lenguaje natural, No hagas comentario ni des opciones, limitate a traducir:\n\n{texto}"
 
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": modelo,
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            return response.json().get("response", "").strip()
-        else:
-            print(f"⚠️ Error con Ollama: {response.status_code} - {response.text}")
-            return texto  # Si falla, deja el texto original
-
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Error de conexión con Ollama: {e}")
-        return texto
+        return obtener_cliente().generar(modelo, prompt).strip()
+    except ErrorOllama as e:
+        print(f"⚠️ Error con Ollama: {e}")
+        return texto  # Si falla, deja el texto original
 
 def es_linea_traducible(linea: str) -> bool:
     """Determina si una línea debe ser traducida."""
@@ -84,6 +70,7 @@ if __name__ == "__main__":
         print("⚠️ No se encontraron archivos .srt en la carpeta de entrada")
     else:
         print(f"🔍 Encontrados {len(archivos_srt)} archivos SRT para traducir")
+        obtener_cliente().precalentar(modelo)
 
         for archivo in archivos_srt:
             ruta_in = os.path.join(carpeta_entrada, archivo)
@@ -91,3 +78,7 @@ if __name__ == "__main__":
             print(f"🌐 Traduciendo '{archivo}' con {modelo} en Ollama...")
             procesar_srt(ruta_in, ruta_out)
             print(f"✅ Traducción completada: {ruta_out}")
+
+        cliente = obtener_cliente()
+        if cliente.cache is not None:
+            print(cliente.cache.resumen())
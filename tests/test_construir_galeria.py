@@ -0,0 +1,48 @@
+from PIL import Image
+
+import construir_galeria
+
+
+def crear_imagenes(carpeta, nombres):
+    carpeta.mkdir()
+    for nombre in nombres:
+        # Ancho real igual al del nombre (<nombre>_<ancho>.jpg)
+        ancho = int(nombre.rsplit("_", 1)[1].split(".")[0])
+        Image.new("RGB", (ancho, ancho * 3 // 4), "blue").save(carpeta / nombre)
+
+
+def miniaturas(pagina):
+    return [linea.split('src="MODIFICADAS/')[1].split('"')[0]
+            for linea in pagina.read_text(encoding="utf-8").splitlines() if 'class="thumbnail"' in linea]
+
+
+def test_conserva_el_orden_de_la_pagina_existente(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    crear_imagenes(tmp_path / "MODIFICADAS", ["IMG_2_1024.jpg", "IMG_10_1024.jpg", "IMG_3_1024.jpg",
+                                              "IMG_1_1024.jpg"])
+    # Página hecha a mano con un orden propio, sin IMG_1
+    pagina = tmp_path / "index.html"
+    pagina.write_text('const imageFiles = ["IMG_10_1024.jpg", "IMG_3_1024.jpg", "IMG_2_1024.jpg"];',
+                      encoding="utf-8")
+
+    assert construir_galeria.construir_galeria("Prueba", str(pagina))
+    esperado = ["IMG_10_1024.jpg", "IMG_3_1024.jpg", "IMG_2_1024.jpg", "IMG_1_1024.jpg"]
+    assert miniaturas(pagina) == esperado
+
+    # Regenerar no cambia el orden
+    assert construir_galeria.construir_galeria("Prueba", str(pagina))
+    assert miniaturas(pagina) == esperado
+
+
+def test_srcset_solo_con_varios_anchos(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    crear_imagenes(tmp_path / "MODIFICADAS", ["a_1024.jpg", "b_480.jpg", "b_1024.jpg"])
+    pagina = tmp_path / "index.html"
+
+    assert construir_galeria.construir_galeria("Prueba", str(pagina))
+    contenido = pagina.read_text(encoding="utf-8")
+    a, b = [linea for linea in contenido.splitlines() if 'class="thumbnail"' in linea]
+    assert "srcset" not in a and "sizes" not in a
+    assert 'srcset="MODIFICADAS/b_480.jpg 480w, MODIFICADAS/b_1024.jpg 1024w"' in b
+    # Marcador desenfocado solo en la imagen principal
+    assert contenido.count("data:image/webp;base64,") == 1
@@ -0,0 +1,94 @@
+import json
+
+from PIL import Image
+
+import descripcion_imagenes_ollama as descripcion
+
+
+class ClienteFalso:
+    """Cliente de Ollama que registra si cada petición podía usar la caché."""
+
+    cache = None
+
+    def __init__(self):
+        self.usos_cache = []
+
+    def precalentar(self, modelo):
+        pass
+
+    def chat(self, modelo, mensajes, usar_cache=True):
+        self.usos_cache.append(usar_cache)
+        return f"descripción {len(self.usos_cache)}"
+
+
+def preparar(tmp_path, monkeypatch):
+    carpeta = tmp_path / "imagenes"
+    carpeta.mkdir()
+    Image.new("RGB", (8, 8), "red").save(carpeta / "foto.jpg")
+    cliente = ClienteFalso()
+    monkeypatch.setattr(descripcion, "ruta", str(carpeta))
+    monkeypatch.setattr(descripcion, "indice", str(tmp_path / "indice.sqlite"))
+    monkeypatch.setattr(descripcion, "salida_jsonl", str(tmp_path / "salida.jsonl"))
+    monkeypatch.setattr(descripcion, "obtener_cliente", lambda: cliente)
+    return cliente
+
+
+def test_forzar_no_usa_la_cache_de_respuestas(tmp_path, monkeypatch):
+    cliente = preparar(tmp_path, monkeypatch)
+
+    descripcion.main()
+    descripcion.main()  # Ya descrita: no se vuelve a pedir
+    descripcion.main(forzar=True)
+
+    assert cliente.usos_cache == [True, False]
+    with open(tmp_path / "salida.jsonl", encoding="utf-8") as f:
+        registros = [json.loads(linea) for linea in f]
+    assert [r["descripcion"] for r in registros] == ["descripción 1", "descripción 2"]
+
+
+class ColeccionFalsa:
+    """Colección con solo lo que usa SalidaMongo."""
+
+    def __init__(self, rutas):
+        self.docs = [{"ruta": r} for r in rutas]
+
+    def find(self, consulta, proyeccion):
+        rutas = consulta["ruta"]["$in"]
+        return [{"ruta": d["ruta"]} for d in self.docs if d["ruta"] in rutas]
+
+    def bulk_write(self, operaciones, ordered):
+        for operacion in operaciones:
+            filtro, cambios = operacion._filter, operacion._doc
+            for d in self.docs:
+                if d["ruta"] in filtro["ruta"]["$in"]:
+                    d.update(cambios["$set"])
+
+
+class ClienteMongoFalso:
+    def __init__(self, coleccion):
+        self.coleccion = coleccion
+        self.cerrado = False
+
+    def __getitem__(self, nombre):
+        return {descripcion.mongo_coleccion: self.coleccion}
+
+    def close(self):
+        self.cerrado = True
+
+
+def test_salida_mongo_guarda_por_lotes_y_notifica_solo_las_existentes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    coleccion = ColeccionFalsa([str(tmp_path / "a.jpg")])
+    cliente = ClienteMongoFalso(coleccion)
+    monkeypatch.setattr(descripcion, "MongoClient", lambda uri: cliente)
+    notificados = []
+
+    salida = descripcion.SalidaMongo(tamaño_lote=2, al_guardar=notificados.extend)
+    salida.escribir({"ruta": "a.jpg", "descripcion": "una casa"})
+    assert notificados == [] and salida.pendientes
+    salida.escribir({"ruta": "b.jpg", "descripcion": "un perro"})  # Completa el lote
+
+    assert [r["ruta"] for r in notificados] == ["a.jpg"]  # b.jpg no está en MongoDB
+    assert coleccion.docs[0]["descripcion"] == "una casa" and coleccion.docs[0]["descrito"] is True
+    salida.cerrar()
+    assert cliente.cerrado
@@ -0,0 +1,43 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import detectar_jpg_corrupto
+from detectar_jpg_corrupto import DEPTH_FAST, VerificationCache, check_files
+
+
+def test_la_cache_encuentra_el_archivo_con_otra_ruta(tmp_path, monkeypatch):
+    carpeta = tmp_path / "fotos"
+    carpeta.mkdir()
+    foto = carpeta / "foto.jpg"
+    foto.write_bytes(b"\xff\xd8\xff\xd9")
+    cache = VerificationCache(str(tmp_path / "cache.sqlite"))
+    resultados = {"estructura": (True, "OK")}
+
+    monkeypatch.chdir(carpeta)
+    cache.store("foto.jpg", os.stat("foto.jpg"), DEPTH_FAST, True, resultados)
+
+    # Misma foto, ahora con ruta relativa desde el directorio padre y con ruta absoluta
+    monkeypatch.chdir(tmp_path)
+    for ruta in (os.path.join("fotos", "foto.jpg"), f".{os.sep}fotos{os.sep}foto.jpg", str(foto)):
+        assert cache.lookup(ruta, os.stat(ruta), DEPTH_FAST) == (True, resultados)
+    cache.close()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="los procesos del pool solo heredan el monkeypatch con fork")
+def test_cerrar_el_recorrido_cancela_los_lotes_en_curso(monkeypatch):
+    def analisis_lento(path, depth):
+        time.sleep(0.05)
+        return True, {}
+
+    monkeypatch.setattr(detectar_jpg_corrupto, "detect_corruption", analisis_lento)
+    resultados = check_files([f"foto_{i}.jpg" for i in range(200)], workers=1, batch_size=20)
+    next(resultados)
+
+    # Como al pulsar Ctrl+C: el generador se cierra con lotes de un segundo en curso
+    inicio = time.monotonic()
+    resultados.close()
+    assert time.monotonic() - inicio < 0.5
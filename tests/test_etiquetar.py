@@ -0,0 +1,39 @@
+from etiquetar import CAMPOS_FECHA, crear_indices, hay_fechas
+
+
+class ColeccionFalsa:
+    """Colección con solo lo que usan hay_fechas y crear_indices."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.indices = []
+
+    def find_one(self, consulta, proyeccion):
+        (campo, _), = consulta.items()
+        return next(({'_id': d['_id']} for d in self.docs if campo in d), None)
+
+    def create_index(self, claves):
+        self.indices.append([campo for campo, _ in claves])
+
+
+def test_sin_campos_de_fecha_no_hay_filtro_ni_indice_de_fechas():
+    # Documentos como los de album.imagenes_2: ruta, nombre y etiquetas, sin fecha
+    coleccion = ColeccionFalsa([{'_id': 1, 'ruta': 'a.jpg', 'nombre': 'a.jpg', 'personas': ['Ana']}])
+
+    fechas = hay_fechas(coleccion)
+    crear_indices(coleccion, fechas=fechas)
+
+    assert fechas is False
+    assert list(CAMPOS_FECHA) not in coleccion.indices
+
+
+def test_con_campos_de_fecha_se_crea_el_indice_de_fechas():
+    coleccion = ColeccionFalsa([{'_id': 1, 'ruta': 'a.jpg'},
+                                {'_id': 2, 'fecha_creacion_anio': '2024', 'fecha_creacion_mes': '05',
+                                 'fecha_creacion_dia': '01'}])
+
+    fechas = hay_fechas(coleccion)
+    crear_indices(coleccion, fechas=fechas)
+
+    assert fechas is True
+    assert list(CAMPOS_FECHA) in coleccion.indices
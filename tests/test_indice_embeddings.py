@@ -0,0 +1,52 @@
+import numpy as np
+
+import indice_embeddings
+from indice_embeddings import IndiceEmbeddings, normalizar
+
+DIMENSION = 4
+
+
+class ColeccionFalsa:
+    """Colección con solo lo que usa IndiceEmbeddings.construir."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, consulta, proyeccion):
+        return [dict(d) for d in self.docs]
+
+
+def vector_de(texto):
+    """Vector determinista por texto, para saber qué fila corresponde a cada id."""
+    semilla = sum(texto.encode("utf-8"))
+    return np.random.default_rng(semilla).random(DIMENSION).astype(np.float32)
+
+
+def calcular_falso(self, textos):
+    return normalizar(np.stack([vector_de(t) for t in textos]))
+
+
+def test_construir_descarta_filas_de_una_construccion_interrumpida(tmp_path, monkeypatch):
+    monkeypatch.setattr(IndiceEmbeddings, "_calcular", calcular_falso)
+    docs = [{"_id": f"id{i}", "descripcion": f"descripción {i}"} for i in range(5)]
+
+    indice = IndiceEmbeddings(str(tmp_path))
+    assert indice.construir(ColeccionFalsa(docs)) == 5
+
+    # Construcción interrumpida: filas añadidas a la matriz sin guardar su mapa de ids
+    ruta_matriz = tmp_path / indice_embeddings.ARCHIVO_MATRIZ
+    with open(ruta_matriz, "ab") as f:
+        f.write(np.ones((2, DIMENSION), dtype=np.float32).tobytes())
+
+    docs.append({"_id": "nuevo", "descripcion": "una descripción nueva"})
+    indice = IndiceEmbeddings(str(tmp_path))
+    assert indice.construir(ColeccionFalsa(docs)) == 1
+
+    assert ruta_matriz.stat().st_size == 6 * DIMENSION * 4
+    indice = IndiceEmbeddings(str(tmp_path))
+    assert indice.ids[-1] == "nuevo"
+    esperado = normalizar(vector_de("una descripción nueva")[None, :])[0]
+    np.testing.assert_allclose(indice.matriz[-1], esperado, rtol=1e-6)
+    for fila, doc in enumerate(docs[:5]):
+        np.testing.assert_allclose(indice.matriz[fila], normalizar(vector_de(doc["descripcion"])[None, :])[0],
+                                   rtol=1e-6)